@@ -0,0 +1,85 @@
+"""
+Compares the stock MemoryJobStore with the IndexedMemoryJobStore.
+
+Each store is filled with N jobs, then a burst of jobs is added, rescheduled and removed at random next run times.
+
+    python -m benchmarks.jobstores --sizes 10000,100000,1000000 --burst 10000
+"""
+
+import argparse
+import random
+import time
+
+from apscheduler.jobstores.memory import MemoryJobStore
+from datetime import datetime, timedelta, timezone
+from flask_apscheduler.jobstores.memory import IndexedMemoryJobStore
+
+EPOCH = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+
+class BenchmarkJob(object):
+    """A stand-in for a Job, job stores only read its id and next run time."""
+
+    __slots__ = ("id", "next_run_time")
+
+    def __init__(self, id, next_run_time):
+        self.id = id
+        self.next_run_time = next_run_time
+
+
+def random_run_time(rng, size):
+    return EPOCH + timedelta(seconds=rng.randrange(size))
+
+
+def run(store_class, size, burst, seed):
+    rng = random.Random(seed)
+    store = store_class()
+
+    # fills the store in order of next run time, which is the cheapest insertion for both stores.
+    for i in range(size):
+        store.add_job(BenchmarkJob(f"job-{i}", EPOCH + timedelta(seconds=i)))
+
+    timings = {}
+
+    start = time.perf_counter()
+    for i in range(burst):
+        store.add_job(BenchmarkJob(f"burst-{i}", random_run_time(rng, size)))
+    timings["add"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(burst):
+        store.update_job(BenchmarkJob(f"burst-{i}", random_run_time(rng, size)))
+    timings["reschedule"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(burst):
+        store.remove_job(f"burst-{i}")
+    timings["remove"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(burst):
+        store.lookup_job(f"job-{rng.randrange(size)}")
+    timings["lookup"] = time.perf_counter() - start
+
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="comma separated job counts")
+    parser.add_argument("--burst", type=int, default=10000, help="number of jobs added, rescheduled and removed")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'store':<24}{'jobs':>10}{'add':>12}{'reschedule':>12}{'remove':>12}{'lookup':>12}  (us/op)")
+
+    for size in (int(size) for size in args.sizes.split(",")):
+        for store_class in (MemoryJobStore, IndexedMemoryJobStore):
+            timings = run(store_class, size, args.burst, args.seed)
+            per_op = {name: timing / args.burst * 1e6 for name, timing in timings.items()}
+            print(f"{store_class.__name__:<24}{size:>10}{per_op['add']:>12.2f}{per_op['reschedule']:>12.2f}"
+                  f"{per_op['remove']:>12.2f}{per_op['lookup']:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Measures the memory held per job by the IndexedMemoryJobStore, with and without compact jobs.
+
+Each store is filled with N jobs added through a scheduler, the way the API adds them: the function is given as a
+textual reference, without arguments. The jobs either share 120 cron schedules or all have their own.
+
+    python -m benchmarks.memory --count 20000
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from datetime import datetime, timedelta, timezone
+from flask_apscheduler.jobstores.memory import IndexedMemoryJobStore
+
+START_DATE = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+
+def noop():
+    pass
+
+
+def shared_trigger_args(i):
+    return dict(hour=i % 24, minute=i % 60 // 5 * 5, start_date=START_DATE)
+
+
+def distinct_trigger_args(i):
+    # every job starts at its own second, so no two triggers are the same.
+    return dict(hour=i % 24, minute=i % 60, start_date=START_DATE + timedelta(seconds=i))
+
+
+SCHEDULES = {"shared": shared_trigger_args, "distinct": distinct_trigger_args}
+
+
+def run(compact, count, trigger_args):
+    """Return the number of bytes held per job by a store filled with ``count`` jobs."""
+    scheduler = BackgroundScheduler(jobstores={"default": IndexedMemoryJobStore(compact=compact)},
+                                    timezone=timezone.utc)
+    # jobs are scheduled but never run.
+    scheduler.start(paused=True)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    for i in range(count):
+        # a new string per job, like the references parsed from the requests.
+        scheduler.add_job(f"{__name__}:noop", "cron", id=f"job-{i}", name=f"job-{i % 100}", timezone=timezone.utc,
+                          **trigger_args(i))
+
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    scheduler.shutdown(wait=False)
+
+    return held / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=20000, help="number of jobs added to each store")
+    args = parser.parse_args()
+
+    print(f"{'schedules':<12}{'jobs':>10}{'regular':>12}{'compact':>12}{'saved':>10}  (bytes/job)")
+
+    for name, trigger_args in SCHEDULES.items():
+        regular = run(False, args.count, trigger_args)
+        compact = run(True, args.count, trigger_args)
+        print(f"{name:<12}{args.count:>10}{regular:>12.0f}{compact:>12.0f}{1 - compact / regular:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
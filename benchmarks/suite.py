@@ -0,0 +1,279 @@
+"""
+Benchmarks the scheduler API and the serialization hot paths, and compares the results with a baseline.
+
+Every benchmark reports the best time per operation over several rounds. The results can be saved as a JSON
+baseline, then later runs compared with it: the run fails when an operation is slower than its baseline by more
+than the threshold. Every run also times a fixed reference workload and the baseline is scaled by the ratio between
+the reference times of the run and of the baseline, so a baseline recorded on another machine still applies.
+
+    python -m benchmarks.suite --save benchmarks/baseline.json
+    python -m benchmarks.suite --compare benchmarks/baseline.json --threshold 0.25
+"""
+
+import argparse
+import base64
+import fnmatch
+import functools
+import itertools
+import json
+import platform
+import sys
+import timeit
+
+from apscheduler.triggers.cron import CronTrigger
+from datetime import datetime, timedelta, timezone
+from flask import Flask
+from flask_apscheduler import APScheduler, utils
+from flask_apscheduler.auth import AuthenticationCache, HTTPBasicAuth, HTTPTokenAuth
+from flask_apscheduler.triggers import SpreadTrigger, intern_trigger
+
+BENCHMARKS = []
+
+# the operation measured by every run, whatever the filter, to scale the baseline.
+REFERENCE = "reference"
+
+START_DATE = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+JOB_DEFS = {
+    "date": dict(trigger="date", run_date="2030-01-01T12:00:00+00:00"),
+    "interval": dict(trigger="interval", minutes=5, start_date="2030-01-01T00:00:00+00:00"),
+    "cron": dict(trigger="cron", day_of_week="mon-fri", hour="9-17", minute="*/15",
+                 start_date="2030-01-01T00:00:00+00:00", end_date="2031-01-01T00:00:00+00:00"),
+    "legacy": dict(trigger=dict(type="cron", hour=1, minute=30), start_date="2030-01-01T00:00:00+00:00"),
+}
+
+
+def benchmark(func):
+    """
+    Register a benchmark, a function yielding ``(name, measure)`` tuples where ``measure`` returns the seconds per
+    operation. Only the operations selected by the filter are measured.
+    """
+    BENCHMARKS.append(func)
+    return func
+
+
+def measure(func, number=1, repeat=5):
+    """Return the best time per call of a function, in seconds, over ``repeat`` rounds of ``number`` calls."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def noop():
+    pass
+
+
+def create_scheduler(**config):
+    app = Flask(__name__)
+    app.config["SCHEDULER_API_ENABLED"] = True
+    app.config.update(config)
+
+    scheduler = APScheduler(app=app)
+    # jobs are scheduled but never run.
+    scheduler.start(paused=True)
+
+    return app, scheduler
+
+
+def add_jobs(scheduler, count):
+    for i in range(count):
+        scheduler.add_job(f"job-{i}", noop, trigger="interval", minutes=1 + i % 60, start_date=START_DATE)
+
+
+@benchmark
+def reference(args):
+    # pure Python work close to the serialization of jobs, it only depends on the interpreter and the machine.
+    def workload():
+        return [dict(id=str(i), next_run_time=(START_DATE + timedelta(minutes=i)).isoformat()) for i in range(100)]
+
+    yield REFERENCE, lambda: measure(workload, number=1000)
+
+
+@benchmark
+def get_jobs(args):
+    def measure_size(size):
+        app, scheduler = create_scheduler()
+        add_jobs(scheduler, size)
+        client = app.test_client()
+
+        def request():
+            response = client.get("/scheduler/jobs")
+            assert response.status_code == 200
+
+        try:
+            return measure(request, repeat=3 if size > 10000 else 5)
+        finally:
+            scheduler.shutdown(wait=False)
+
+    for size in args.sizes:
+        yield f"api.get_jobs[{size}]", functools.partial(measure_size, size)
+
+
+@benchmark
+def serialization(args):
+    app, scheduler = create_scheduler()
+
+    for trigger_name, job_def in JOB_DEFS.items():
+        job_def = dict(job_def)
+        utils.fix_job_def(job_def)
+        job = scheduler.add_job(f"{trigger_name}-job", noop, **job_def)
+
+        yield f"utils.job_to_dict[{trigger_name}]", lambda: measure(lambda: utils.job_to_dict(job), number=10000)
+        yield (f"utils.trigger_to_dict[{trigger_name}]",
+               lambda: measure(lambda: utils.trigger_to_dict(job.trigger), number=10000))
+
+    trigger = SpreadTrigger(scheduler.get_job("cron-job").trigger, 60, 0)
+    yield "utils.trigger_to_dict[spread]", lambda: measure(lambda: utils.trigger_to_dict(trigger), number=10000)
+
+    scheduler.shutdown(wait=False)
+
+
+@benchmark
+def fix_job_def(args):
+    for trigger_name, job_def in JOB_DEFS.items():
+        # the job definition is modified in place, a copy is parsed every time.
+        yield (f"utils.fix_job_def[{trigger_name}]",
+               lambda: measure(lambda: utils.fix_job_def(dict(job_def)), number=10000))
+
+
+@benchmark
+def apply_auth(args):
+    app, scheduler = create_scheduler()
+    view = scheduler._apply_auth(noop)
+    basic = "Basic " + base64.b64encode(b"user:secret").decode()
+
+    def authenticate(auth):
+        return auth["username"] == "user" and auth.get("password", "secret") == "secret"
+
+    scheduler.authenticate(authenticate)
+
+    cases = [
+        ("none", None, None, None),
+        ("basic", HTTPBasicAuth(), None, basic),
+        ("basic_cached", HTTPBasicAuth(), AuthenticationCache(60), basic),
+        ("token", HTTPTokenAuth(tokens={"secret-token": "user"}), None, "Bearer secret-token"),
+    ]
+
+    for name, auth, cache, header in cases:
+        scheduler.auth = auth
+        scheduler.auth_cache = cache
+        headers = {"Authorization": header} if header else {}
+
+        with app.test_request_context("/scheduler", headers=headers):
+            yield f"scheduler.apply_auth[{name}]", lambda: measure(view, number=10000)
+
+    scheduler.shutdown(wait=False)
+
+
+@benchmark
+def add_job_burst(args):
+    app, scheduler = create_scheduler()
+    client = app.test_client()
+    rounds = iter(range(sys.maxsize))
+
+    def burst():
+        prefix = next(rounds)
+
+        for i in range(args.burst):
+            response = client.post("/scheduler/jobs", json=dict(id=f"burst-{prefix}-{i}", func=f"{__name__}:noop",
+                                                                trigger="interval", minutes=5))
+            assert response.status_code == 200
+
+    yield f"api.add_job[burst={args.burst}]", lambda: measure(burst, repeat=3) / args.burst
+    scheduler.shutdown(wait=False)
+
+
+@benchmark
+def reschedule(args):
+    # the scheduler computes the next fire time of every job that fired, here all at the same instant.
+    fire_time = START_DATE.replace(hour=3)
+    ticks = itertools.count()
+
+    def measure_triggers(create):
+        triggers = [create(CronTrigger(hour=3, minute=0, timezone=timezone.utc)) for _ in range(args.burst)]
+
+        def tick():
+            now = fire_time + timedelta(microseconds=next(ticks))
+
+            for trigger in triggers:
+                trigger.get_next_fire_time(fire_time, now)
+
+        return measure(tick, repeat=3) / args.burst
+
+    for name, create in (("distinct", lambda trigger: trigger), ("interned", intern_trigger)):
+        yield f"triggers.reschedule[{name}]", functools.partial(measure_triggers, create)
+
+
+def run(args):
+    results = {}
+
+    for func in BENCHMARKS:
+        for name, measure_operation in func(args):
+            if name == REFERENCE or not args.filter or fnmatch.fnmatch(name, args.filter):
+                results[name] = measure_operation()
+                print(f"{name:<44}{results[name] * 1e6:>14.2f} us/op")
+
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Return the operations slower than their baseline by more than the threshold, as ``(name, baseline, result)``
+    tuples. The baseline is scaled by the ratio between the reference times of the results and of the baseline. The
+    operations missing from the results or from the baseline are ignored.
+    """
+    if REFERENCE not in baseline:
+        raise ValueError("The baseline has no reference time, it must be saved again.")
+
+    scale = results[REFERENCE] / baseline[REFERENCE]
+    regressions = []
+
+    for name, seconds in sorted(results.items()):
+        expected = baseline.get(name)
+
+        if name != REFERENCE and expected is not None and seconds > expected * scale * (1 + threshold):
+            regressions.append((name, expected * scale, seconds))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma separated job counts of GET /jobs")
+    parser.add_argument("--burst", type=int, default=1000, help="number of jobs added per add_job burst")
+    parser.add_argument("--filter", help="only measure the operations matching this glob pattern")
+    parser.add_argument("--save", metavar="PATH", help="save the results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare the results with a baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="slowdown ratio from which an operation is a regression")
+    args = parser.parse_args()
+    args.sizes = [int(size) for size in args.sizes.split(",")]
+
+    results = run(args)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(dict(python=platform.python_version(), results=results), f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+        try:
+            regressions = compare(results, baseline, args.threshold)
+        except ValueError as e:
+            sys.exit(str(e))
+
+        print(f"Baseline scaled by {results[REFERENCE] / baseline[REFERENCE]:.2f} from the reference times.")
+
+        for name, expected, seconds in regressions:
+            print(f"REGRESSION {name}: {expected * 1e6:.2f} -> {seconds * 1e6:.2f} us/op "
+                  f"(+{(seconds / expected - 1) * 100:.0f}%)")
+
+        if regressions:
+            sys.exit(1)
+
+        print(f"No regression above {args.threshold * 100:.0f}%.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,5 @@
 """Example using flask context."""
 
-from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 
@@ -28,9 +27,11 @@ class Config:
 
     JOBS = [{"id": "job1", "func": show_users, "trigger": "interval", "seconds": 2}]
 
-    SCHEDULER_JOBSTORES = {
-        "default": SQLAlchemyJobStore(url="sqlite:///flask_context.db")
-    }
+    SQLALCHEMY_DATABASE_URI = "sqlite:///flask_context.db"
+
+    # the job store shares the engine and connection pool of Flask-SQLAlchemy
+    SCHEDULER_JOBSTORES = {"default": {"type": "sqlalchemy"}}
+    SCHEDULER_SQLALCHEMY_ENGINE = "sqlalchemy"
 
     SCHEDULER_API_ENABLED = True
 
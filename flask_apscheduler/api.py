@@ -14,11 +14,16 @@
 
 import logging
 
+from datetime import datetime, timedelta
 from apscheduler.jobstores.base import ConflictingIdError, JobLookupError
 from apscheduler.schedulers import SchedulerAlreadyRunningError, SchedulerNotRunningError
 from collections import OrderedDict
 from flask import current_app, request, Response
 from .json import jsonify
+from .utils import job_to_dict, parse_datetime
+
+MAX_DENSITY_BUCKETS = 10000
+MAX_CALENDAR_RUNS = 10000
 
 
 def get_scheduler_info():
@@ -35,6 +40,93 @@ def get_scheduler_info():
     return jsonify(d)
 
 
+def get_run_time_density():
+    """
+    Gets how many jobs are due per bucket of time over the next hour.
+
+    The window and the bucket size can be changed by the ``window`` and ``bucket`` query parameters, in seconds.
+    """
+
+    window = request.args.get("window", 3600, type=int)
+    bucket = request.args.get("bucket", 60, type=int)
+
+    if window <= 0 or bucket <= 0 or window / bucket > MAX_DENSITY_BUCKETS:
+        return jsonify(dict(error_message="window and bucket must be positive and make at most "
+                                          f"{MAX_DENSITY_BUCKETS} buckets."), status=400)
+
+    scheduler = current_app.apscheduler
+    start = datetime.now(scheduler.scheduler.timezone)
+    end = start + timedelta(seconds=window)
+    counts, truncated = scheduler.get_calendar(start, end, bucket, count_due=True)
+
+    d = OrderedDict([
+        ("start", start),
+        ("end", end),
+        ("bucket", bucket),
+        ("counts", counts),
+        ("peak", max(counts)),
+        ("truncated", truncated)
+    ])
+
+    return jsonify(d)
+
+
+def get_calendar():
+    """
+    Gets the upcoming runs of the jobs over the next 24 hours.
+
+    The period can be changed by the ``from`` and ``to`` query parameters, as ISO 8601 datetimes.
+    With the ``bucket`` query parameter, in seconds, the runs are counted per bucket of time, otherwise
+    at most ``limit`` runs are listed.
+    """
+
+    scheduler = current_app.apscheduler
+    timezone = scheduler.scheduler.timezone
+
+    try:
+        start = parse_datetime(request.args.get("from"), timezone) or datetime.now(timezone)
+        end = parse_datetime(request.args.get("to"), timezone) or start + timedelta(days=1)
+    except ValueError:
+        return jsonify(dict(error_message="from and to must be ISO 8601 datetimes."), status=400)
+
+    bucket = request.args.get("bucket", type=int)
+    limit = request.args.get("limit", 1000, type=int)
+
+    if end <= start:
+        return jsonify(dict(error_message="to must be after from."), status=400)
+
+    if bucket is not None and (bucket <= 0 or (end - start).total_seconds() / bucket > MAX_DENSITY_BUCKETS):
+        return jsonify(dict(error_message="bucket must be positive and make at most "
+                                          f"{MAX_DENSITY_BUCKETS} buckets."), status=400)
+
+    if not 0 < limit <= MAX_CALENDAR_RUNS:
+        return jsonify(dict(error_message=f"limit must be between 1 and {MAX_CALENDAR_RUNS}."), status=400)
+
+    runs, truncated = scheduler.get_calendar(start, end, bucket, limit)
+
+    if bucket is not None:
+        d = OrderedDict([
+            ("from", start),
+            ("to", end),
+            ("bucket", bucket),
+            ("counts", runs),
+            ("total", sum(runs)),
+            ("peak", max(runs)),
+            ("truncated", truncated)
+        ])
+
+        return jsonify(d)
+
+    d = OrderedDict([
+        ("from", start),
+        ("to", end),
+        ("runs", [OrderedDict([("job_id", job_id), ("run_time", run_time)]) for run_time, job_id in runs]),
+        ("truncated", truncated)
+    ])
+
+    return jsonify(d)
+
+
 def pause_scheduler():
     """
     Pauses job processing in the scheduler.
@@ -66,8 +158,14 @@ def start_scheduler():
     Starts the scheduler.
     """
 
+    scheduler = current_app.apscheduler
+
+    # the scheduler process runs for as long as a worker can reach it, it is started on its own.
+    if scheduler.remote:
+        return jsonify(dict(error_message="The scheduler runs in another process."), status=409)
+
     try:
-        current_app.apscheduler.start()
+        scheduler.start()
         return Response(status=204)
     except SchedulerAlreadyRunningError as e:
         return jsonify(dict(error_message=str(e)), status=400)
@@ -78,14 +176,30 @@ def start_scheduler():
 def shutdown_scheduler():
     """
     Shuts down the scheduler. Does not interrupt any currently running jobs.
+
+    If ``drain_timeout`` is given, it returns the jobs that were still running when the scheduler was shut down.
     """
 
     try:
         data = request.get_json(silent=True, force=True) or {}
         wait = data.get("wait") is not False
+        drain_timeout = data.get("drain_timeout")
 
-        current_app.apscheduler.shutdown(wait=wait)
-        return Response(status=204)
+        is_number = isinstance(drain_timeout, (int, float)) and not isinstance(drain_timeout, bool)
+
+        if drain_timeout is not None and not is_number:
+            return jsonify(dict(error_message="drain_timeout must be a number."), status=400)
+
+        scheduler = current_app.apscheduler
+
+        # a worker shuts the scheduler process down, not only its connection.
+        shutdown = scheduler.shutdown_remote if scheduler.remote else scheduler.shutdown
+        running_jobs = shutdown(wait=wait, drain_timeout=drain_timeout)
+
+        if drain_timeout is None:
+            return Response(status=204)
+
+        return jsonify(dict(running_jobs=running_jobs))
     except SchedulerNotRunningError as e:
         return jsonify(dict(error_message=str(e)), status=400)
     except Exception as e:
@@ -131,18 +245,19 @@ def get_job(job_id):
         logging.warning(f"Job {job_id} not found.")
         return jsonify(dict(error_message=f"Job {job_id} not found"), status=404)
 
-    return jsonify(job)
+    return jsonify(_get_job_info(job, current_app.apscheduler.get_job_memory_usage(job_id)))
 
 
 def get_jobs():
     """Gets all scheduled jobs."""
 
     jobs = current_app.apscheduler.get_jobs()
+    memory_usages = current_app.apscheduler.get_jobs_memory_usage()
 
     job_states = []
 
     for job in jobs:
-        job_states.append(job)
+        job_states.append(_get_job_info(job, memory_usages.get(job.id)))
 
     return jsonify(job_states)
 
@@ -153,8 +268,7 @@ def update_job(job_id):
     data = request.get_json(force=True)
 
     try:
-        current_app.apscheduler.modify_job(job_id, **data)
-        job = current_app.apscheduler.get_job(job_id)
+        job = current_app.apscheduler.modify_job(job_id, **data)
         return jsonify(job)
     except JobLookupError:
         logging.warning(f"Job {job_id} not found.")
@@ -168,8 +282,7 @@ def pause_job(job_id):
     """Pauses a job."""
 
     try:
-        current_app.apscheduler.pause_job(job_id)
-        job = current_app.apscheduler.get_job(job_id)
+        job = current_app.apscheduler.pause_job(job_id)
         return jsonify(job)
     except JobLookupError:
         logging.warning(f"Job {job_id} not found.")
@@ -183,8 +296,7 @@ def resume_job(job_id):
     """Resumes a job."""
 
     try:
-        current_app.apscheduler.resume_job(job_id)
-        job = current_app.apscheduler.get_job(job_id)
+        job = current_app.apscheduler.resume_job(job_id)
         return jsonify(job)
     except JobLookupError:
         logging.warning(f"Job {job_id} not found.")
@@ -198,8 +310,7 @@ def run_job(job_id):
     """Executes a job."""
 
     try:
-        current_app.apscheduler.run_job(job_id)
-        job = current_app.apscheduler.get_job(job_id)
+        job = current_app.apscheduler.run_job(job_id)
         return jsonify(job)
     except JobLookupError:
         logging.warning(f"Job {job_id} not found.")
@@ -207,3 +318,72 @@ def run_job(job_id):
     except Exception as e:
         logging.error(e, exc_info=True)
         return jsonify(dict(error_message=str(e)), status=500)
+
+
+def get_job_runs(job_id):
+    """Gets the stored results of a job, the most recent first."""
+
+    backend = current_app.apscheduler.result_backend
+
+    if not backend:
+        return jsonify(dict(error_message="Job results are not stored."), status=404)
+
+    return jsonify([result.to_dict() for result in backend.get_results(job_id)])
+
+
+def get_job_run_result(job_id, run_id):
+    """
+    Gets the result of a job execution, streamed as it is stored.
+
+    It is the JSON serialized return value of the job or, if the job raised an exception, an object with
+    the exception and its traceback. The ``X-Job-Status`` header tells them apart.
+    """
+
+    backend = current_app.apscheduler.result_backend
+
+    if not backend:
+        return jsonify(dict(error_message="Job results are not stored."), status=404)
+
+    result = backend.get_result(job_id, run_id)
+
+    if result is None:
+        return jsonify(dict(error_message=f"Result of run {run_id} of job {job_id} not found"), status=404)
+
+    if not result.stored:
+        return jsonify(dict(error_message=f"Result of run {run_id} was not stored, its {result.size} bytes exceed "
+                                          "the maximum result size."), status=404)
+
+    # the result is opened last, the early returns would leave its file open.
+    chunks = backend.open_result(job_id, run_id)
+
+    if chunks is None:
+        return jsonify(dict(error_message=f"Result of run {run_id} of job {job_id} not found"), status=404)
+
+    headers = {"X-Job-Status": result.status, "Content-Length": str(result.size)}
+    return Response(chunks, mimetype="application/json", headers=headers)
+
+
+def get_job_profile(job_id):
+    """
+    Gets the stacks sampled during the profiled executions of a job, in the collapsed format read by
+    flamegraph.pl and speedscope.
+    """
+
+    profile = current_app.apscheduler.get_job_profile(job_id)
+
+    if profile is None:
+        return jsonify(dict(error_message=f"Job {job_id} has not been profiled"), status=404)
+
+    headers = {"X-Profile-Runs": str(profile.runs), "X-Profile-Samples": str(profile.samples)}
+    return Response(profile.to_collapsed(), mimetype="text/plain", headers=headers)
+
+
+def _get_job_info(job, memory_usage):
+    """Adds the memory usage of the last traced execution of a job to its details, if any."""
+
+    if memory_usage is None:
+        return job
+
+    d = job_to_dict(job)
+    d["memory_usage"] = memory_usage.to_dict()
+    return d
@@ -15,7 +15,13 @@
 """Provides classes for authentication."""
 
 import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
 
+from collections import OrderedDict
 from flask import request
 from .utils import bytes_to_wsgi, wsgi_to_bytes
 
@@ -58,6 +64,10 @@ class HTTPAuth(object):
     A base class from which all authentication classes should inherit.
     """
 
+    # whether the authentication result of an `Authorization` header can be reused for the next requests, only
+    # when the header alone decides it.
+    cacheable = False
+
     def get_authorization(self):
         """
         Get the authorization header.
@@ -72,12 +82,21 @@ class HTTPAuth(object):
         """
         pass
 
+    def get_username(self):
+        """
+        Get the username of an already authenticated request, used to tell clients apart.
+        :return str: The username or None if the authorization data has none.
+        """
+        auth = self.get_authorization()
+        return auth.get("username") if auth else None
+
 
 class HTTPBasicAuth(HTTPAuth):
     """
     HTTP Basic authentication.
     """
     www_authenticate_realm = "Authentication Required"
+    cacheable = True
 
     def get_authorization(self):
         """
@@ -107,3 +126,281 @@ class HTTPBasicAuth(HTTPAuth):
         `401 Unauthenticated` response.
         """
         return f'Basic realm="{self.www_authenticate_realm}"'
+
+
+class HTTPTokenAuth(HTTPAuth):
+    """
+    HTTP Bearer token authentication.
+
+    :param str scheme: the authentication scheme of the header
+    :param dict tokens: optional mapping of token to username, when given the tokens are verified
+        without calling the authentication callback with an unknown token
+    """
+    www_authenticate_realm = "Authentication Required"
+    cacheable = True
+
+    def __init__(self, scheme="Bearer", tokens=None):
+        self.scheme = scheme
+        self._tokens = None
+
+        if tokens is not None:
+            # tokens are looked up by digest, so the lookup time tells nothing about the token.
+            self._tokens = {hashlib.sha256(wsgi_to_bytes(token)).digest(): username
+                            for token, username in tokens.items()}
+
+    def get_authorization(self):
+        """
+        Get the token for Bearer authentication header.
+        :return Authentication: The authentication data or None if it is not present or invalid.
+        """
+        auth = get_authorization_header()
+
+        if not auth:
+            return None
+
+        auth_type, auth_info = auth
+
+        if auth_type != wsgi_to_bytes(self.scheme.lower()):
+            return None
+
+        token = auth_info.strip()
+
+        if self._tokens is None:
+            return Authorization("bearer", token=bytes_to_wsgi(token))
+
+        username = self._tokens.get(hashlib.sha256(token).digest())
+
+        if username is None:
+            return None
+
+        return Authorization("bearer", token=bytes_to_wsgi(token), username=username)
+
+    def get_authenticate_header(self):
+        """
+        Return the value of `WWW-Authenticate` header in a
+        `401 Unauthenticated` response.
+        """
+        return f'{self.scheme} realm="{self.www_authenticate_realm}"'
+
+
+class HTTPSignatureAuth(HTTPAuth):
+    """
+    HMAC-SHA256 request signing authentication.
+
+    The client signs the method, the path, the query string, a timestamp, a nonce and the SHA-256 of the body
+    with a secret shared with the server, see :func:`sign_request`. The signature is verified in constant time,
+    requests older than ``max_skew`` seconds are refused and a nonce is accepted only once within that window.
+
+    :param keys: mapping of key id to secret, or a function returning the secret of a key id or None
+    :param int max_skew: maximum difference in seconds between the clocks of the client and the server
+    :param int max_nonces: maximum number of nonces remembered, the oldest ones are forgotten first
+    """
+    scheme = "HMAC-SHA256"
+
+    # every signed request carries a new nonce, caching it would allow replaying it.
+    cacheable = False
+
+    def __init__(self, keys, max_skew=300, max_nonces=100000):
+        self.get_secret = keys.get if isinstance(keys, dict) else keys
+        self.max_skew = max_skew
+        self.max_nonces = max_nonces
+
+        self._lock = threading.Lock()
+        self._nonces = OrderedDict()  # (key id, nonce) -> expiry time
+
+    def get_authorization(self):
+        """
+        Get the key id of a valid signature authentication header.
+        :return Authentication: The authentication data or None if it is not present or invalid.
+        """
+        auth = get_authorization_header()
+
+        if not auth:
+            return None
+
+        auth_type, auth_info = auth
+
+        if auth_type != wsgi_to_bytes(self.scheme.lower()):
+            return None
+
+        try:
+            params = dict(param.strip().split(b'=', 1) for param in auth_info.split(b','))
+            key_id = bytes_to_wsgi(params[b'keyId'])
+            timestamp = int(params[b'timestamp'])
+            nonce = bytes_to_wsgi(params[b'nonce'])
+            signature = params[b'signature']
+        except (KeyError, ValueError):
+            return None
+
+        now = time.time()
+
+        if abs(now - timestamp) > self.max_skew:
+            return None
+
+        secret = self.get_secret(key_id)
+
+        if secret is None:
+            return None
+
+        expected = get_request_signature(secret, request.method, request.path,
+                                         request.query_string, timestamp, nonce,
+                                         request.get_data(cache=True))
+
+        if not hmac.compare_digest(wsgi_to_bytes(expected), signature):
+            return None
+
+        if not self._remember_nonce(key_id, nonce, now):
+            return None
+
+        return Authorization("hmac", key_id=key_id, timestamp=timestamp, nonce=nonce)
+
+    def get_authenticate_header(self):
+        """
+        Return the value of `WWW-Authenticate` header in a
+        `401 Unauthenticated` response.
+        """
+        return self.scheme
+
+    def get_username(self):
+        """
+        Get the key id of an already authenticated request, used to tell clients apart.
+        :return str: The key id or None if the header is not present or invalid.
+        """
+        auth = get_authorization_header()
+
+        if not auth or auth[0] != wsgi_to_bytes(self.scheme.lower()):
+            return None
+
+        for param in auth[1].split(b','):
+            name, _, value = param.strip().partition(b'=')
+
+            if name == b'keyId':
+                return bytes_to_wsgi(value)
+
+        return None
+
+    def _remember_nonce(self, key_id, nonce, now):
+        """
+        Remember a nonce until its request expires.
+        :return bool: False if the nonce was already used.
+        """
+        with self._lock:
+            while self._nonces and next(iter(self._nonces.values())) <= now:
+                self._nonces.popitem(last=False)
+
+            if (key_id, nonce) in self._nonces:
+                return False
+
+            # a request is accepted up to max_skew seconds before and after its timestamp.
+            self._nonces[(key_id, nonce)] = now + 2 * self.max_skew
+
+            while len(self._nonces) > self.max_nonces:
+                self._nonces.popitem(last=False)
+
+            return True
+
+
+def get_request_signature(secret, method, path, query_string, timestamp, nonce, body):
+    """
+    Return the hex HMAC-SHA256 signature of a request.
+    """
+    parts = (method.upper(), path, query_string, str(timestamp), nonce, hashlib.sha256(body).hexdigest())
+    message = b"\n".join(part if isinstance(part, bytes) else part.encode("utf-8") for part in parts)
+
+    if not isinstance(secret, bytes):
+        secret = secret.encode("utf-8")
+
+    return hmac.new(secret, message, hashlib.sha256).hexdigest()
+
+
+def sign_request(key_id, secret, method, path, query_string="", body=b"", timestamp=None, nonce=None):
+    """
+    Return the value of the `Authorization` header of a request signed for :class:`HTTPSignatureAuth`.
+
+    :param str key_id: the id of the key
+    :param secret: the secret of the key
+    :param str method: the HTTP method
+    :param str path: the path of the URL, without the query string
+    :param str query_string: the query string as sent, without the leading ``?``
+    :param bytes body: the body of the request
+    :param int timestamp: the unix time of the request, defaults to now
+    :param str nonce: a unique value, defaults to a random one
+    """
+    if timestamp is None:
+        timestamp = int(time.time())
+
+    if nonce is None:
+        nonce = base64.urlsafe_b64encode(os.urandom(16)).decode('ascii').rstrip('=')
+
+    signature = get_request_signature(secret, method, path, query_string, timestamp, nonce, body)
+
+    return f"{HTTPSignatureAuth.scheme} keyId={key_id},timestamp={timestamp},nonce={nonce},signature={signature}"
+
+
+class AuthenticationCache(object):
+    """
+    Caches the authentication results by a hash of the `Authorization` header,
+    so the authentication callback is not called on every request.
+
+    :param float ttl: number of seconds a successful authentication is cached
+    :param float negative_ttl: number of seconds a failed authentication is cached, ``0`` to not cache failures
+    :param int max_size: maximum number of cached results, the least recently used ones are evicted first
+    """
+
+    def __init__(self, ttl, negative_ttl=0, max_size=1024):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+
+        self._lock = threading.Lock()
+        self._results = OrderedDict()  # header hash -> (authenticated, expiry time)
+
+    def get(self, header):
+        """
+        Get the cached authentication result of an `Authorization` header.
+        :return: ``True`` or ``False`` if the result is cached, ``None`` otherwise.
+        """
+        key = self._hash(header)
+
+        with self._lock:
+            result = self._results.get(key)
+
+            if result is None:
+                return None
+
+            authenticated, expires_at = result
+
+            if expires_at <= time.monotonic():
+                del self._results[key]
+                return None
+
+            self._results.move_to_end(key)
+            return authenticated
+
+    def set(self, header, authenticated):
+        """
+        Cache the authentication result of an `Authorization` header.
+        """
+        ttl = self.ttl if authenticated else self.negative_ttl
+
+        if not ttl:
+            return
+
+        key = self._hash(header)
+
+        with self._lock:
+            self._results[key] = (authenticated, time.monotonic() + ttl)
+            self._results.move_to_end(key)
+
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove all the cached results, e.g. after a password change.
+        """
+        with self._lock:
+            self._results.clear()
+
+    def _hash(self, header):
+        return hashlib.sha256(wsgi_to_bytes(header)).digest()
@@ -0,0 +1,29 @@
+# Copyright 2015 Vinicius Chiele. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Provides the ``flask scheduler`` commands."""
+
+import click
+
+from flask import current_app
+from flask.cli import AppGroup
+
+scheduler_cli = AppGroup("scheduler", help="Manage the scheduler.")
+
+
+@scheduler_cli.command("run")
+@click.option("--socket", "path", help="Path of the Unix socket, defaults to SCHEDULER_SOCKET.")
+def run_command(path):
+    """Run the scheduler in this process and serve the other processes over a Unix socket."""
+    current_app.apscheduler.serve(path)
@@ -0,0 +1,68 @@
+# Copyright 2015 Vinicius Chiele. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Scheduler events specific to Flask-APScheduler."""
+
+from apscheduler.events import EVENT_ALL as APSCHEDULER_EVENT_ALL, JobEvent
+
+EVENT_JOB_TIMEOUT = 2 ** 20
+EVENT_JOB_MEMORY_THRESHOLD = 2 ** 21
+EVENT_JOB_MISFIRE_DECISION = 2 ** 22
+EVENT_ALL = APSCHEDULER_EVENT_ALL | EVENT_JOB_TIMEOUT | EVENT_JOB_MEMORY_THRESHOLD | EVENT_JOB_MISFIRE_DECISION
+
+
+class JobTimeoutEvent(JobEvent):
+    """
+    An event that concerns a job execution that has exceeded its timeout.
+
+    :ivar scheduled_run_times: a list of datetimes when the job was intended to run
+    :ivar timeout: the timeout of the job, in seconds
+    """
+
+    def __init__(self, code, job_id, jobstore, scheduled_run_times, timeout):
+        super(JobTimeoutEvent, self).__init__(code, job_id, jobstore)
+        self.scheduled_run_times = scheduled_run_times
+        self.timeout = timeout
+
+
+class JobMemoryEvent(JobEvent):
+    """
+    An event that concerns a job execution that has retained more memory than its threshold.
+
+    :ivar scheduled_run_times: a list of datetimes when the job was intended to run
+    :ivar memory_usage: the memory usage of the job execution
+    :ivar threshold: the memory threshold of the job, in bytes
+    """
+
+    def __init__(self, code, job_id, jobstore, scheduled_run_times, memory_usage, threshold):
+        super(JobMemoryEvent, self).__init__(code, job_id, jobstore)
+        self.scheduled_run_times = scheduled_run_times
+        self.memory_usage = memory_usage
+        self.threshold = threshold
+
+
+class JobMisfireDecisionEvent(JobEvent):
+    """
+    An event that concerns the decision taken by the adaptive misfire policy for a late job execution.
+
+    :ivar scheduled_run_times: a list of datetimes when the job was intended to run
+    :ivar decision: ``run`` to run every run time, ``coalesce`` to run once or ``skip`` to not run
+    :ivar reason: why the decision was taken
+    """
+
+    def __init__(self, code, job_id, jobstore, scheduled_run_times, decision, reason):
+        super(JobMisfireDecisionEvent, self).__init__(code, job_id, jobstore)
+        self.scheduled_run_times = scheduled_run_times
+        self.decision = decision
+        self.reason = reason
@@ -0,0 +1,438 @@
+# Copyright 2015 Vinicius Chiele. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Executors that let Flask-APScheduler observe every job execution."""
+
+import concurrent.futures
+import contextlib
+import contextvars
+import heapq
+import itertools
+import sys
+import threading
+import time
+import uuid
+
+from apscheduler.executors import asyncio, pool
+from apscheduler.executors.base import run_job
+
+try:
+    from apscheduler.executors.base import run_coroutine_job
+except ImportError:  # APScheduler < 3.11
+    from apscheduler.executors.base_py3 import run_coroutine_job
+from apscheduler.util import iscoroutinefunction_partial
+from collections import deque
+
+_current_run = contextvars.ContextVar("flask_apscheduler_current_run", default=None)
+
+
+def get_current_run():
+    """
+    Return the job execution running in the current thread or task.
+
+    :rtype: JobRun
+    """
+    return _current_run.get()
+
+
+def get_cancel_event():
+    """
+    Return the event that is set when the job execution running in the current thread or task is cancelled,
+    e.g. because it has exceeded its timeout. Jobs that can stop early should check it regularly.
+
+    :return: the cancel event or ``None`` if it is not called from a job execution
+    :rtype: threading.Event
+    """
+    run = _current_run.get()
+    return run.cancel_event if run else None
+
+
+def get_max_workers(executor):
+    """
+    Return the maximum number of jobs an executor runs at the same time, ``None`` if it is not bounded.
+    """
+    pool = getattr(executor, "_pool", None)
+    return getattr(executor, "max_workers", None) or getattr(pool, "_max_workers", None)
+
+
+def reset_executor(executor):
+    """
+    Reset the state an executor inherited from the parent process after a fork: the threads of its pool and the
+    job executions submitted in the parent do not exist in the forked process.
+    """
+    if getattr(executor, "_lock", None) is not None:
+        executor._lock = executor._scheduler._create_lock()
+
+    executor._instances.clear()
+    pool = getattr(executor, "_pool", None)
+
+    if isinstance(pool, concurrent.futures.ThreadPoolExecutor):
+        executor._pool = concurrent.futures.ThreadPoolExecutor(pool._max_workers, pool._thread_name_prefix,
+                                                               pool._initializer, pool._initargs)
+
+    if hasattr(executor, "_reset_after_fork"):
+        executor._reset_after_fork()
+
+
+class JobRun(object):
+    """
+    Holds the state of a job execution.
+
+    :param executor: the executor running the job
+    :param job: the job being executed
+    :param list[datetime] run_times: the datetimes when the job should have been run
+    """
+
+    def __init__(self, executor, job, run_times):
+        self.id = uuid.uuid4().hex
+        self.executor = executor
+        self.job = job
+        self.run_times = run_times
+        self.cancel_event = threading.Event()
+        self.context = None
+        self.priority = 0
+        self.released = False
+        self._cancel_callback = None
+
+    @property
+    def cancelled(self):
+        """Get true whether the job execution has been cancelled."""
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        """
+        Ask the job execution to stop.
+
+        Coroutine jobs are cancelled, other jobs are expected to check :func:`get_cancel_event`.
+        """
+        self.cancel_event.set()
+
+        if self._cancel_callback:
+            self._cancel_callback()
+
+    def release(self):
+        """
+        Free the instance slot taken by this job execution, so other executions of the job can be submitted.
+        """
+        self.executor._release_run(self)
+
+
+class RunTrackingMixin(object):
+    """
+    Tracks every job submitted to the executor as a :class:`JobRun`.
+
+    ``run_context`` is set by :class:`~flask_apscheduler.APScheduler` when the scheduler starts. It is called
+    with the :class:`JobRun` when the job is submitted and returns a context manager that wraps the job execution.
+    ``run_finished`` is called with the :class:`JobRun` and the events of the execution once the job has finished.
+    ``run_priority`` is called with the job when it is submitted and returns the priority of the execution.
+    ``misfire_handler`` is called with the executor, the job and its due run times when it is submitted and returns
+    the run times to execute, the job is not submitted if there are none.
+    """
+
+    run_context = None
+    run_finished = None
+    run_priority = None
+    misfire_handler = None
+
+    def submit_job(self, job, run_times):
+        if self.misfire_handler:
+            run_times = self.misfire_handler(self, job, run_times)
+
+            if not run_times:
+                return
+
+        super(RunTrackingMixin, self).submit_job(job, run_times)
+
+    def get_load(self):
+        """
+        Return the number of job executions submitted and not finished yet per worker, ``0`` if the number of
+        workers is not bounded.
+        """
+        workers = get_max_workers(self)
+
+        if not workers:
+            return 0
+
+        with self._lock:
+            return sum(self._instances.values()) / workers
+
+    def _create_run(self, job, run_times):
+        run = JobRun(self, job, run_times)
+        run.priority = self.run_priority(job) if self.run_priority else 0
+        run.context = self.run_context(run) if self.run_context else contextlib.nullcontext()
+        return run
+
+    def _release_run(self, run):
+        with self._lock:
+            if run.released:
+                return
+
+            run.released = True
+            self._instances[run.job.id] -= 1
+
+            if self._instances[run.job.id] <= 0:
+                del self._instances[run.job.id]
+
+    def _run_finished(self, run, events=None, exc=None, tb=None):
+        self._release_run(run)
+
+        if exc is not None:
+            exc_info = (exc.__class__, exc, tb)
+            self._logger.error("Error running job %s", run.job.id, exc_info=exc_info)
+            return
+
+        if self.run_finished:
+            try:
+                self.run_finished(run, events)
+            except Exception:
+                self._logger.exception("Error handling the end of job %s", run.job.id)
+
+        for event in events:
+            self._scheduler._dispatch_event(event)
+
+    def _run_job(self, run):
+        token = _current_run.set(run)
+
+        try:
+            with run.context:
+                return run_job(run.job, run.job._jobstore_alias, run.run_times, self._logger.name)
+        finally:
+            _current_run.reset(token)
+
+    async def _run_coroutine_job(self, run):
+        token = _current_run.set(run)
+
+        try:
+            with run.context:
+                return await run_coroutine_job(run.job, run.job._jobstore_alias, run.run_times, self._logger.name)
+        finally:
+            _current_run.reset(token)
+
+
+class ThreadPoolExecutor(RunTrackingMixin, pool.ThreadPoolExecutor):
+    """
+    An executor that runs jobs in a thread pool.
+
+    :param max_workers: the maximum number of spawned threads.
+    :param pool_kwargs: dict of keyword arguments to pass to the underlying ThreadPoolExecutor constructor
+    """
+
+    def _do_submit_job(self, job, run_times):
+        run = self._create_run(job, run_times)
+
+        def callback(f):
+            exc = f.exception()
+
+            if exc:
+                self._run_finished(run, exc=exc, tb=getattr(exc, "__traceback__", None))
+            else:
+                self._run_finished(run, events=f.result())
+
+        f = self._pool.submit(self._run_job, run)
+        f.add_done_callback(callback)
+
+
+class AsyncIOExecutor(RunTrackingMixin, asyncio.AsyncIOExecutor):
+    """
+    An executor that runs coroutine jobs in the event loop and other jobs in the default executor of the event loop.
+    """
+
+    def _do_submit_job(self, job, run_times):
+        run = self._create_run(job, run_times)
+
+        def callback(f):
+            self._pending_futures.discard(f)
+
+            try:
+                events = f.result()
+            except BaseException:
+                self._run_finished(run, exc=sys.exc_info()[1], tb=sys.exc_info()[2])
+            else:
+                self._run_finished(run, events=events)
+
+        if iscoroutinefunction_partial(job.func):
+            f = self._eventloop.create_task(self._run_coroutine_job(run))
+            run._cancel_callback = lambda: self._eventloop.call_soon_threadsafe(f.cancel)
+        else:
+            f = self._eventloop.run_in_executor(None, self._run_job, run)
+
+        f.add_done_callback(callback)
+        self._pending_futures.add(f)
+
+
+class PriorityThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    An executor that runs jobs in a thread pool and, once all the threads are busy, queues the job executions
+    and runs them by priority then by scheduled run time, instead of the order they were submitted in.
+
+    The priority of a job is set by the ``priority`` option of :meth:`~flask_apscheduler.APScheduler.add_job`,
+    the higher the sooner. An execution waiting for more than ``max_wait`` seconds runs before any other
+    execution, so low priority jobs are not starved. Once the queue is full, the lowest priority execution
+    is dropped.
+
+    :param max_workers: the maximum number of spawned threads.
+    :param int max_queue_size: the maximum number of queued executions, ``None`` for no limit
+    :param float max_wait: the number of seconds after which a queued execution runs first, ``None`` to disable it
+    :param pool_kwargs: dict of keyword arguments to pass to the underlying ThreadPoolExecutor constructor
+    """
+
+    def __init__(self, max_workers=10, max_queue_size=None, max_wait=60, pool_kwargs=None):
+        super(PriorityThreadPoolExecutor, self).__init__(max_workers, pool_kwargs)
+        self.max_workers = int(max_workers)
+        self.max_queue_size = max_queue_size
+        self.max_wait = max_wait
+
+        self._queue = []  # heap of [-priority, scheduled run time, counter, queued at, run], run is None once removed
+        self._queue_order = deque()  # the heap entries by time queued, to find starved executions
+        self._queue_size = 0
+        self._counter = itertools.count()
+        self._busy = 0
+        self._dropped_runs = []
+        self._stats = {}  # priority -> dict of counters
+
+    def submit_job(self, job, run_times):
+        with self._lock:
+            super(PriorityThreadPoolExecutor, self).submit_job(job, run_times)
+
+            # the instance slot of an execution is taken once it has been submitted, it can only be freed now.
+            dropped_runs, self._dropped_runs = self._dropped_runs, []
+
+            for run in dropped_runs:
+                self._logger.warning('Execution of job "%s" dropped: the executor queue is full', run.job)
+                self._release_run(run)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            while self._queue_order:
+                entry = self._queue_order.popleft()
+
+                if entry[4] is not None:
+                    self._release_run(entry[4])
+                    entry[4] = None
+
+            self._queue = []
+            self._queue_size = 0
+
+        super(PriorityThreadPoolExecutor, self).shutdown(wait)
+
+    def get_stats(self):
+        """
+        Return the queue statistics per priority: the number of queued, dispatched, dropped and starved executions
+        and the longest time an execution has waited, in seconds.
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {priority: dict(stats) for priority, stats in self._stats.items()}
+
+    def _reset_after_fork(self):
+        self._queue = []
+        self._queue_order = deque()
+        self._queue_size = 0
+        self._busy = 0
+        self._dropped_runs = []
+
+    def _do_submit_job(self, job, run_times):
+        run = self._create_run(job, run_times)
+        entry = [-run.priority, run_times[0], next(self._counter), time.monotonic(), run]
+
+        heapq.heappush(self._queue, entry)
+        self._queue_order.append(entry)
+        self._queue_size += 1
+        self._get_stats(run.priority)["queued"] += 1
+
+        if self.max_queue_size is not None and self._queue_size > self.max_queue_size + self._free_workers():
+            self._drop_lowest_priority_run()
+
+        self._dispatch()
+
+    def _free_workers(self):
+        return self.max_workers - self._busy
+
+    def _dispatch(self):
+        while self._busy < self.max_workers:
+            entry = self._pop_starved_entry() or self._pop_entry()
+
+            if entry is None:
+                return
+
+            run = entry[4]
+            entry[4] = None
+            self._queue_size -= 1
+            self._busy += 1
+
+            stats = self._get_stats(run.priority)
+            stats["queued"] -= 1
+            stats["dispatched"] += 1
+            stats["max_wait"] = max(stats["max_wait"], time.monotonic() - entry[3])
+
+            self._pool.submit(self._run_job, run).add_done_callback(
+                lambda f, run=run: self._dispatched_run_finished(run, f))
+
+    def _pop_entry(self):
+        while self._queue:
+            entry = heapq.heappop(self._queue)
+
+            if entry[4] is not None:
+                return entry
+
+        return None
+
+    def _pop_starved_entry(self):
+        while self._queue_order and self._queue_order[0][4] is None:
+            self._queue_order.popleft()
+
+        if self.max_wait is None or not self._queue_order:
+            return None
+
+        entry = self._queue_order[0]
+
+        if time.monotonic() - entry[3] < self.max_wait:
+            return None
+
+        self._queue_order.popleft()
+        self._get_stats(entry[4].priority)["starved"] += 1
+        return entry
+
+    def _drop_lowest_priority_run(self):
+        # the lowest priority execution is the largest live entry of the heap, executions scheduled later first.
+        entry = max(entry for entry in self._queue if entry[4] is not None)
+        run = entry[4]
+        entry[4] = None
+        self._queue_size -= 1
+
+        stats = self._get_stats(run.priority)
+        stats["queued"] -= 1
+        stats["dropped"] += 1
+        self._dropped_runs.append(run)
+
+    def _dispatched_run_finished(self, run, f):
+        with self._lock:
+            self._busy -= 1
+            self._dispatch()
+
+        exc = f.exception()
+
+        if exc:
+            self._run_finished(run, exc=exc, tb=getattr(exc, "__traceback__", None))
+        else:
+            self._run_finished(run, events=f.result())
+
+    def _get_stats(self, priority):
+        stats = self._stats.get(priority)
+
+        if stats is None:
+            stats = self._stats[priority] = dict(queued=0, dispatched=0, dropped=0, starved=0, max_wait=0)
+
+        return stats
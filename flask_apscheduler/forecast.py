@@ -0,0 +1,316 @@
+# Copyright 2015 Vinicius Chiele. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Forecasts the upcoming runs of jobs."""
+
+import bisect
+import heapq
+import itertools
+import math
+import pickle
+import threading
+
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from collections import OrderedDict
+from datetime import timedelta, timezone
+from .triggers import CalendarIntervalTrigger, SpreadTrigger
+
+# maximum number of run times computed per job, an every second job would otherwise expand forever.
+MAX_RUNS_PER_JOB = 10000
+
+# triggers whose fire times only depend on their state, so they can be shared between jobs.
+_DETERMINISTIC_TRIGGERS = (CronTrigger, DateTrigger, IntervalTrigger) + (
+    (CalendarIntervalTrigger,) if CalendarIntervalTrigger else ())
+
+
+def iter_run_times(trigger, first, end):
+    """
+    Return an iterator over the fire times of a trigger from a first fire time until a given datetime, excluded.
+    """
+    next_run_time = first
+
+    while next_run_time and next_run_time < end:
+        yield next_run_time
+        next_run_time = trigger.get_next_fire_time(next_run_time, next_run_time)
+
+
+def expand_run_times(trigger, first, end, limit=MAX_RUNS_PER_JOB):
+    """
+    Return the fire times of a trigger from a first fire time until a given datetime, at most ``limit`` of them.
+    """
+    return list(itertools.islice(iter_run_times(trigger, first, end), limit))
+
+
+class RunTimeCache(object):
+    """
+    Caches the fire times computed for a trigger, so jobs sharing a schedule and successive forecasts
+    do not expand it again.
+
+    Only the stock triggers without jitter are cached, the fire times of the other ones may not be reproducible.
+
+    :param int max_size: maximum number of triggers cached, the least recently used ones are evicted first
+    :param int max_run_times: maximum number of fire times cached for all the triggers, the least recently used
+        triggers are evicted first and the fire times of a trigger exceeding it alone are not cached
+    """
+
+    def __init__(self, max_size=1024, max_run_times=100000):
+        self.max_size = max_size
+        self.max_run_times = max_run_times
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # trigger key -> (run times, time until which they are complete or None)
+        self._run_time_count = 0
+
+    def get_run_times(self, trigger, first, end, limit=MAX_RUNS_PER_JOB):
+        """
+        Return the fire times of a trigger from a first fire time until a given datetime, at most ``limit`` of them.
+        """
+        key = self._get_key(trigger)
+
+        if key is None:
+            return expand_run_times(trigger, first, end, limit)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is not None:
+            run_times, complete_until = entry
+            index = bisect.bisect_left(run_times, first)
+
+            # the cached fire times are only reused if the first fire time is one of them.
+            if (index < len(run_times) and run_times[index] == first and
+                    (complete_until is None or end <= complete_until)):
+                return run_times[index:bisect.bisect_left(run_times, end, index)][:limit]
+
+        run_times = expand_run_times(trigger, first, end, limit)
+
+        if len(run_times) == limit:
+            complete_until = run_times[-1]
+        elif run_times and trigger.get_next_fire_time(run_times[-1], run_times[-1]) is None:
+            complete_until = None  # the trigger will not fire anymore
+        else:
+            complete_until = end
+
+        if len(run_times) > self.max_run_times:
+            return run_times
+
+        with self._lock:
+            previous_entry = self._entries.pop(key, None)
+
+            if previous_entry is not None:
+                self._run_time_count -= len(previous_entry[0])
+
+            self._entries[key] = (run_times, complete_until)
+            self._run_time_count += len(run_times)
+
+            while len(self._entries) > self.max_size or self._run_time_count > self.max_run_times:
+                _, (evicted_run_times, _) = self._entries.popitem(last=False)
+                self._run_time_count -= len(evicted_run_times)
+
+        return run_times
+
+    def clear(self):
+        """
+        Remove all the cached fire times.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._run_time_count = 0
+
+    def _get_key(self, trigger):
+        inner_trigger = trigger.trigger if isinstance(trigger, SpreadTrigger) else trigger
+
+        if not isinstance(inner_trigger, _DETERMINISTIC_TRIGGERS) or getattr(inner_trigger, "jitter", None):
+            return None
+
+        try:
+            return trigger.__class__, pickle.dumps(trigger.__getstate__())
+        except Exception:
+            return None
+
+
+def get_upcoming_runs(jobs, end, cache=None):
+    """
+    Return an iterator over the upcoming runs of the given jobs until a given datetime, as ``(run time, job)``
+    tuples sorted by run time. Every job contributes at most ``MAX_RUNS_PER_JOB`` runs.
+
+    :param list[Job] jobs: the jobs
+    :param datetime end: the datetime until which runs are returned, excluded
+    :param RunTimeCache cache: the cache of fire times to use, if any
+    """
+    iterables = []
+
+    for index, job in enumerate(jobs):
+        if job.next_run_time is None:
+            continue
+
+        if cache is not None:
+            run_times = cache.get_run_times(job.trigger, job.next_run_time, end)
+        else:
+            run_times = expand_run_times(job.trigger, job.next_run_time, end)
+
+        iterables.append(_tag_run_times(run_times, index, job))
+
+    return ((run_time, job) for run_time, _, job in heapq.merge(*iterables))
+
+
+def list_run_times(jobs, start, end, limit):
+    """
+    Return the first runs of the given jobs between two datetimes, as ``(run time, job)`` tuples sorted by run time.
+
+    The fire times are computed lazily, so the work depends on ``limit`` rather than on how often the jobs run.
+
+    :param list[Job] jobs: the jobs
+    :param datetime start: the datetime from which runs are returned
+    :param datetime end: the datetime until which runs are returned, excluded
+    :param int limit: the maximum number of runs returned
+    :return: the runs and ``True`` if there are more runs than ``limit``
+    :rtype: tuple[list, bool]
+    """
+    iterables = []
+
+    for index, job in enumerate(jobs):
+        first = job.next_run_time
+
+        if first is None:
+            continue
+
+        if first < start:
+            # jumps to the first fire time from start instead of walking the ones before.
+            first = job.trigger.get_next_fire_time(None, start)
+
+        run_times = (run_time for run_time in iter_run_times(job.trigger, first, end) if run_time >= start)
+        iterables.append(_tag_run_times(run_times, index, job))
+
+    runs = [(run_time, job) for run_time, _, job in itertools.islice(heapq.merge(*iterables), limit + 1)]
+    return runs[:limit], len(runs) > limit
+
+
+def count_run_times(jobs, start, end, bucket, cache=None, count_due=False):
+    """
+    Count the upcoming runs of the given jobs per bucket of ``bucket`` seconds between two datetimes.
+
+    The runs of the interval triggers without jitter are counted without being expanded, the other triggers are
+    expanded up to ``MAX_RUNS_PER_JOB`` runs per job.
+
+    :param list[Job] jobs: the jobs
+    :param datetime start: the datetime from which runs are counted
+    :param datetime end: the datetime until which runs are counted, excluded
+    :param int bucket: the size of the buckets, in seconds
+    :param RunTimeCache cache: the cache of fire times to use, if any
+    :param bool count_due: ``True`` to count the runs before ``start`` in the first bucket, they are ignored otherwise
+    :return: the counts per bucket and ``True`` if the runs of a job have been left out past ``MAX_RUNS_PER_JOB``
+    :rtype: tuple[list[int], bool]
+    """
+    counts = [0] * math.ceil((end - start).total_seconds() / bucket)
+    truncated = False
+
+    for job in jobs:
+        first = job.next_run_time
+
+        if first is None or first >= end:
+            continue
+
+        progression = _get_progression(job.trigger)
+
+        if progression is not None:
+            _count_progression(counts, first, *progression, start, end, bucket, count_due)
+            continue
+
+        if first < start and not count_due:
+            # jumps to the first fire time from start instead of expanding the ones before, like list_run_times.
+            first = job.trigger.get_next_fire_time(None, start)
+
+            if first is None or first >= end:
+                continue
+
+        if cache is not None:
+            run_times = cache.get_run_times(job.trigger, first, end)
+        else:
+            run_times = expand_run_times(job.trigger, first, end)
+
+        if len(run_times) == MAX_RUNS_PER_JOB:
+            next_run_time = job.trigger.get_next_fire_time(run_times[-1], run_times[-1])
+            truncated = truncated or (next_run_time is not None and next_run_time < end)
+
+        for run_time in run_times:
+            if run_time >= start:
+                counts[int((run_time - start).total_seconds() // bucket)] += 1
+            elif count_due:
+                counts[0] += 1
+
+    return counts, truncated
+
+
+def _get_progression(trigger):
+    """
+    Return the interval between the fire times of an interval trigger without jitter, possibly spread, and its end
+    date, ``None`` for the other triggers.
+    """
+    offset = timedelta()
+
+    if isinstance(trigger, SpreadTrigger):
+        offset = trigger.offset
+        trigger = trigger.trigger
+
+    if not isinstance(trigger, IntervalTrigger) or trigger.jitter:
+        return None
+
+    return trigger.interval, trigger.end_date + offset if trigger.end_date else None
+
+
+def _count_progression(counts, first, interval, end_date, start, end, bucket, count_due):
+    # fire times are instants, computed in UTC so that the daylight saving time changes do not shift them.
+    first = first.astimezone(timezone.utc)
+    start = start.astimezone(timezone.utc)
+    end = end.astimezone(timezone.utc)
+    bucket = timedelta(seconds=bucket)
+    last_count = (end_date - first) // interval + 1 if end_date else None
+
+    def count_before(moment):
+        # the number of fire times before a moment, the ceiling of the number of intervals since the first one.
+        if moment <= first:
+            return 0
+
+        count = -((first - moment) // interval)
+        return count if last_count is None else min(count, last_count)
+
+    due_count = count_before(start)
+    total = count_before(end) - due_count
+
+    if count_due:
+        counts[0] += due_count
+
+    # visits the fire times or the buckets, whichever are fewer.
+    if total <= len(counts):
+        for i in range(due_count, due_count + total):
+            counts[(first + interval * i - start) // bucket] += 1
+    else:
+        previous_count = due_count
+
+        for i in range(len(counts)):
+            count = count_before(min(start + bucket * (i + 1), end))
+            counts[i] += count - previous_count
+            previous_count = count
+
+
+def _tag_run_times(run_times, index, job):
+    # the index breaks ties between jobs running at the same time, jobs are not comparable.
+    for run_time in run_times:
+        yield run_time, index, job
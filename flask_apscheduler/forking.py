@@ -0,0 +1,136 @@
+# Copyright 2015 Vinicius Chiele. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Keeps the schedulers usable in the processes forked from the one that created them."""
+
+import logging
+import os
+import tempfile
+import weakref
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+LOGGER = logging.getLogger("flask_apscheduler")
+
+# the scheduler keeps running in the process that started it, the forked processes get a stopped scheduler.
+FORK_MODE_PARENT = "parent"
+
+# the scheduler is paused before the first fork and started again in the first forked process taking the lock, the
+# other forked processes start it paused.
+FORK_MODE_CHILD = "child"
+
+# the scheduler keeps running in the process that started it, which serves the forked processes over a Unix socket.
+FORK_MODE_COORDINATOR = "coordinator"
+
+FORK_MODES = (FORK_MODE_PARENT, FORK_MODE_CHILD, FORK_MODE_COORDINATOR)
+
+_schedulers = weakref.WeakSet()
+_hooks_registered = False
+
+
+def register(scheduler):
+    """
+    Call the ``_before_fork``, ``_after_fork_in_parent`` and ``_after_fork_in_child`` methods of a scheduler around
+    every fork of the process, for as long as the scheduler exists.
+
+    The fork hooks of the process are registered by the first call.
+    """
+    global _hooks_registered
+
+    _schedulers.add(scheduler)
+
+    if not _hooks_registered and hasattr(os, "register_at_fork"):
+        os.register_at_fork(
+            before=lambda: _call_hooks("_before_fork"),
+            after_in_parent=lambda: _call_hooks("_after_fork_in_parent"),
+            after_in_child=lambda: _call_hooks("_after_fork_in_child"),
+        )
+        _hooks_registered = True
+
+
+def get_default_path(suffix, pid=None):
+    """
+    Return the path of a file shared by a process and the processes it forks, in the temporary directory.
+
+    :param str suffix: the extension of the file
+    :param int pid: the process that forks, defaults to the current one
+    """
+    return os.path.join(tempfile.gettempdir(), f"flask_apscheduler-{pid or os.getpid()}.{suffix}")
+
+
+def _call_hooks(name):
+    for scheduler in list(_schedulers):
+        try:
+            getattr(scheduler, name)()
+        except Exception:
+            LOGGER.exception(f"Error calling {name} of the scheduler")
+
+
+class ProcessLock(object):
+    """
+    An exclusive lock held by at most one process at a time, released when the process holding it exits.
+
+    :param str path: the path of the lock file
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+        self._file = None
+
+    @property
+    def locked(self):
+        """Get true whether this process holds the lock."""
+        return self._file is not None
+
+    def acquire(self):
+        """
+        Take the lock without waiting.
+
+        :return: ``True`` if the lock has been taken
+        """
+        if self._file is not None:
+            return True
+
+        if fcntl is None:
+            raise RuntimeError("Process locks are not supported on this platform.")
+
+        file = open(self.path, "a")
+
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            file.close()
+            return False
+
+        self._file = file
+        return True
+
+    def release(self):
+        """
+        Release the lock, if this process holds it.
+        """
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+    def _reset_after_fork(self):
+        # the lock belongs to the open file, which the forked process shares: closing its copy keeps the lock.
+        if self._file is not None:
+            self._file.close()
+            self._file = None
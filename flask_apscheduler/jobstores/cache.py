@@ -0,0 +1,302 @@
+# Copyright 2015 Vinicius Chiele. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Write-behind cache in front of another job store."""
+
+import threading
+import time
+
+from apscheduler.events import EVENT_JOB_ADDED, EVENT_JOB_MODIFIED, EVENT_JOB_REMOVED
+from apscheduler.jobstores.base import BaseJobStore, ConflictingIdError, JobLookupError
+from apscheduler.util import maybe_ref
+from .memory import IndexedMemoryJobStore
+
+ADD = "add"
+UPDATE = "update"
+REMOVE = "remove"
+
+# the write resulting from a pending write followed by a new one, None cancels both.
+_COALESCED_WRITES = {
+    (ADD, UPDATE): ADD,
+    (ADD, REMOVE): None,
+    (UPDATE, UPDATE): UPDATE,
+    (UPDATE, REMOVE): REMOVE,
+    (REMOVE, ADD): UPDATE,
+}
+
+
+class CachingJobStore(BaseJobStore):
+    """
+    Serves reads from an in-process snapshot of another job store and writes to it behind.
+
+    Reads never reach the wrapped job store, except to look up a job missing from the snapshot. Writes are applied
+    to the snapshot right away, coalesced per job and flushed to the wrapped job store every ``flush_interval``
+    seconds and at shutdown.
+
+    The snapshot follows the job events of the scheduler: a job added, modified or removed without being written
+    through this job store is patched in the snapshot. :class:`~flask_apscheduler.APScheduler` reloads the snapshot
+    when another process notifies its wakeup channel. As a backstop, the snapshot is also reloaded every
+    ``refresh_interval`` seconds.
+
+    :param jobstore: the job store to cache, or a textual reference to one
+    :param float flush_interval: number of seconds between two flushes of the pending writes
+    :param float refresh_interval: number of seconds between two reloads of the snapshot, ``None`` to never reload it
+    """
+
+    def __init__(self, jobstore, flush_interval=1, refresh_interval=60):
+        super(CachingJobStore, self).__init__()
+        self.jobstore = maybe_ref(jobstore)
+        self.flush_interval = flush_interval
+        self.refresh_interval = refresh_interval
+
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._snapshot = IndexedMemoryJobStore()
+        self._pending_writes = {}  # id -> (write, job)
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._listening = False
+        self._refreshed_at = None
+        self._hits = 0
+        self._misses = 0
+        self._flushed_writes = 0
+
+    def start(self, scheduler, alias):
+        super(CachingJobStore, self).start(scheduler, alias)
+        self.jobstore.start(scheduler, alias)
+        self.refresh()
+
+        if not self._listening:
+            scheduler.add_listener(self._handle_job_event, EVENT_JOB_ADDED | EVENT_JOB_MODIFIED | EVENT_JOB_REMOVED)
+            self._listening = True
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=f"APScheduler-JobStoreCache-{alias}", daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        if self._listening:
+            self._scheduler.remove_listener(self._handle_job_event)
+            self._listening = False
+
+        self._stop_event.set()
+
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+        self.flush()
+        self.jobstore.shutdown()
+
+    def get_stats(self):
+        """
+        Return the cache statistics.
+
+        The hit rate is the share of reads served from the snapshot without reaching the wrapped job store.
+
+        :rtype: dict
+        """
+        with self._lock:
+            reads = self._hits + self._misses
+
+            return dict(
+                hits=self._hits,
+                misses=self._misses,
+                hit_rate=self._hits / reads if reads else None,
+                pending_writes=len(self._pending_writes),
+                flushed_writes=self._flushed_writes,
+            )
+
+    def refresh(self):
+        """
+        Reload the snapshot from the wrapped job store, the pending writes are applied on top of it.
+        """
+        # no write may be flushed between reading the wrapped job store and swapping the snapshot.
+        with self._flush_lock:
+            snapshot = IndexedMemoryJobStore()
+
+            for job in self.jobstore.get_all_jobs():
+                snapshot.add_job(job)
+
+            with self._lock:
+                for job_id, (write, job) in self._pending_writes.items():
+                    if snapshot.lookup_job(job_id) is not None:
+                        snapshot.remove_job(job_id)
+
+                    if write != REMOVE:
+                        snapshot.add_job(job)
+
+                self._snapshot = snapshot
+                self._refreshed_at = time.monotonic()
+
+    def flush(self):
+        """
+        Write the pending writes to the wrapped job store.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending_writes = self._pending_writes
+                self._pending_writes = {}
+
+            for job_id, (write, job) in pending_writes.items():
+                try:
+                    self._apply_write(job_id, write, job)
+                except Exception:
+                    self._logger.exception('Unable to write job "%s" to the wrapped job store -- retrying later',
+                                           job_id)
+
+                    with self._lock:
+                        if job_id not in self._pending_writes:
+                            self._pending_writes[job_id] = (write, job)
+                else:
+                    with self._lock:
+                        self._flushed_writes += 1
+
+    def lookup_job(self, job_id):
+        with self._lock:
+            job = self._snapshot.lookup_job(job_id)
+
+            if job is not None or job_id in self._pending_writes:
+                self._hits += 1
+                return job
+
+            self._misses += 1
+
+        job = self.jobstore.lookup_job(job_id)
+
+        if job is not None:
+            with self._lock:
+                if self._snapshot.lookup_job(job_id) is None and job_id not in self._pending_writes:
+                    self._snapshot.add_job(job)
+
+        return job
+
+    def get_due_jobs(self, now):
+        with self._lock:
+            self._hits += 1
+            return self._snapshot.get_due_jobs(now)
+
+    def get_next_run_time(self):
+        with self._lock:
+            self._hits += 1
+            return self._snapshot.get_next_run_time()
+
+    def get_all_jobs(self):
+        with self._lock:
+            self._hits += 1
+            return self._snapshot.get_all_jobs()
+
+    def add_job(self, job):
+        with self._lock:
+            self._snapshot.add_job(job)
+            self._queue_write(ADD, job.id, job)
+
+    def update_job(self, job):
+        with self._lock:
+            self._snapshot.update_job(job)
+            self._queue_write(UPDATE, job.id, job)
+
+    def remove_job(self, job_id):
+        with self._lock:
+            job = self._snapshot.lookup_job(job_id)
+            self._snapshot.remove_job(job_id)
+            self._queue_write(REMOVE, job_id, job)
+
+    def remove_all_jobs(self):
+        self.flush()
+
+        with self._lock:
+            self._snapshot.remove_all_jobs()
+            self._pending_writes.clear()
+            self.jobstore.remove_all_jobs()
+
+    def _reset_after_fork(self):
+        # the pending writes are flushed by the parent process.
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._pending_writes = {}
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        if hasattr(self.jobstore, "_reset_after_fork"):
+            self.jobstore._reset_after_fork()
+
+    def _handle_job_event(self, event):
+        if event.jobstore != self._alias:
+            return
+
+        with self._lock:
+            # the jobs written through this job store are already up to date in the snapshot.
+            if event.job_id in self._pending_writes:
+                return
+
+            cached_job = self._snapshot.lookup_job(event.job_id)
+
+        if event.code == EVENT_JOB_REMOVED:
+            job = None
+        elif cached_job is None or event.code == EVENT_JOB_MODIFIED:
+            job = self.jobstore.lookup_job(event.job_id)
+        else:
+            return
+
+        with self._lock:
+            if event.job_id in self._pending_writes:
+                return
+
+            if self._snapshot.lookup_job(event.job_id) is not None:
+                self._snapshot.remove_job(event.job_id)
+
+            if job is not None:
+                self._snapshot.add_job(job)
+
+    def _queue_write(self, write, job_id, job):
+        pending = self._pending_writes.get(job_id)
+
+        if pending is not None:
+            write = _COALESCED_WRITES.get((pending[0], write), write)
+
+        if write is None:
+            del self._pending_writes[job_id]
+        else:
+            self._pending_writes[job_id] = (write, job)
+
+    def _apply_write(self, job_id, write, job):
+        if write == ADD:
+            try:
+                self.jobstore.add_job(job)
+            except ConflictingIdError:
+                self.jobstore.update_job(job)
+        elif write == UPDATE:
+            try:
+                self.jobstore.update_job(job)
+            except JobLookupError:
+                self.jobstore.add_job(job)
+        else:
+            try:
+                self.jobstore.remove_job(job_id)
+            except JobLookupError:
+                pass
+
+    def _run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+            if self.refresh_interval is not None and time.monotonic() - self._refreshed_at >= self.refresh_interval:
+                try:
+                    self.refresh()
+                except Exception:
+                    self._logger.exception("Unable to refresh the job store cache")
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} ({self.jobstore!r})>"
@@ -0,0 +1,281 @@
+# Copyright 2015 Vinicius Chiele. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""In-memory job store for very large job counts."""
+
+import functools
+import heapq
+import itertools
+import pickle
+import sys
+import threading
+import weakref
+import zlib
+
+from apscheduler.job import Job
+from apscheduler.jobstores.base import BaseJobStore, ConflictingIdError, JobLookupError
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.util import datetime_to_utc_timestamp
+from ..triggers import intern_trigger
+
+# positions in a heap entry, the counter breaks ties between a stale entry and a live one of the same job.
+_TIMESTAMP, _JOB_ID, _COUNTER, _JOB = range(4)
+
+# the triggers compact jobs keep compressed, each of them takes a few KB otherwise.
+COMPRESSED_TRIGGER_TYPES = (CronTrigger,)
+
+# number of triggers of compact jobs kept materialized, the jobs with the same schedule share theirs.
+MATERIALIZED_TRIGGERS_CACHE_SIZE = 1024
+
+# the slot of Job holding the trigger, hidden by the property of CompactJob.
+_trigger_slot = Job.__dict__["trigger"]
+
+_compressed_triggers = weakref.WeakValueDictionary()  # compressed pickle -> compressed trigger
+_compressed_lock = threading.Lock()
+
+
+class _CompressedTrigger(object):
+    """
+    The compressed pickle of a trigger, shared by the compact jobs with the same schedule.
+    """
+
+    __slots__ = ("data", "__weakref__")
+
+    def __init__(self, data):
+        self.data = data
+
+
+class _EmptyKwargs(dict):
+    """
+    An empty dict which cannot be modified, shared by all the compact jobs without keyword arguments.
+    """
+
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("The keyword arguments of a compact job cannot be modified in place.")
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        # unpickled as a regular dict.
+        return dict, ()
+
+
+EMPTY_KWARGS = _EmptyKwargs()
+
+
+class CompactJob(Job):
+    """
+    A job whose cron trigger is kept compressed and materialized on access.
+
+    Compact jobs are created by :func:`compact_job`, they behave like any other job.
+    """
+
+    __slots__ = ()
+
+    @property
+    def trigger(self):
+        trigger = _trigger_slot.__get__(self)
+
+        if isinstance(trigger, _CompressedTrigger):
+            return _materialize_trigger(trigger)
+
+        return trigger
+
+    @trigger.setter
+    def trigger(self, trigger):
+        _trigger_slot.__set__(self, trigger)
+
+
+def compact_job(job):
+    """
+    Reduce the memory held by a job, in place, and turn it into a :class:`CompactJob`.
+
+    The textual references are interned, empty keyword arguments are replaced by a shared empty dict and cron
+    triggers are compressed, once per schedule, until they are used.
+
+    :param Job job: the job to compact
+    :rtype: CompactJob
+    """
+    job.__class__ = CompactJob
+
+    if job.func_ref is not None:
+        job.func_ref = sys.intern(job.func_ref)
+
+    job.name = sys.intern(job.name)
+    job.executor = sys.intern(job.executor)
+
+    if not job.args:
+        job.args = ()
+
+    if not job.kwargs:
+        job.kwargs = EMPTY_KWARGS
+
+    trigger = _trigger_slot.__get__(job)
+
+    if isinstance(trigger, COMPRESSED_TRIGGER_TYPES):
+        _trigger_slot.__set__(job, _compress_trigger(trigger))
+
+    return job
+
+
+def _compress_trigger(trigger):
+    # interned first, the pickle of a shared trigger differs from the one of an identical trigger which is not.
+    data = zlib.compress(pickle.dumps(intern_trigger(trigger), pickle.HIGHEST_PROTOCOL))
+
+    with _compressed_lock:
+        compressed_trigger = _compressed_triggers.get(data)
+
+        if compressed_trigger is None:
+            compressed_trigger = _compressed_triggers[data] = _CompressedTrigger(data)
+
+    return compressed_trigger
+
+
+@functools.lru_cache(maxsize=MATERIALIZED_TRIGGERS_CACHE_SIZE)
+def _materialize_trigger(compressed_trigger):
+    # the materialized trigger is shared, so it computes the next fire time of the jobs firing together once.
+    return intern_trigger(pickle.loads(zlib.decompress(compressed_trigger.data)))
+
+
+class IndexedMemoryJobStore(BaseJobStore):
+    """
+    Stores jobs in RAM, in a heap ordered by next run time and a dict indexed by job id.
+    Provides no persistence support.
+
+    Unlike :class:`~apscheduler.jobstores.memory.MemoryJobStore`, which keeps a sorted list, adding, updating and
+    removing a job is O(log n), so it stays fast with hundreds of thousands of jobs.
+
+    :param bool compact: compact the jobs with :func:`compact_job` to hold millions of them, at the cost of
+        decompressing the cron triggers not shared with other jobs whenever they are used
+    """
+
+    def __init__(self, compact=False):
+        super(IndexedMemoryJobStore, self).__init__()
+        self.compact = compact
+        self._heap = []  # [timestamp, job id, counter, job] of the scheduled jobs
+        self._entries = {}  # id -> heap entry of the scheduled jobs
+        self._paused_jobs = {}  # id -> job of the paused jobs
+        self._stale_entries = 0
+        self._counter = itertools.count()
+
+    def lookup_job(self, job_id):
+        entry = self._entries.get(job_id)
+
+        if entry is not None:
+            return entry[_JOB]
+
+        return self._paused_jobs.get(job_id)
+
+    def get_due_jobs(self, now):
+        now_timestamp = datetime_to_utc_timestamp(now)
+        due_entries = []
+
+        while self._heap and self._heap[0][_TIMESTAMP] <= now_timestamp:
+            entry = heapq.heappop(self._heap)
+
+            if entry[_JOB] is not None:
+                due_entries.append(entry)
+            else:
+                self._stale_entries -= 1
+
+        for entry in due_entries:
+            heapq.heappush(self._heap, entry)
+
+        return [entry[_JOB] for entry in due_entries]
+
+    def get_next_run_time(self):
+        self._drop_stale_head()
+        return self._heap[0][_JOB].next_run_time if self._heap else None
+
+    def get_all_jobs(self):
+        entries = sorted(self._entries.values())
+        paused_jobs = sorted(self._paused_jobs.values(), key=lambda job: job.id)
+        return [entry[_JOB] for entry in entries] + paused_jobs
+
+    def add_job(self, job):
+        if job.id in self._entries or job.id in self._paused_jobs:
+            raise ConflictingIdError(job.id)
+
+        self._insert(job)
+
+    def update_job(self, job):
+        if job.id not in self._entries and job.id not in self._paused_jobs:
+            raise JobLookupError(job.id)
+
+        entry = self._entries.get(job.id)
+        timestamp = datetime_to_utc_timestamp(job.next_run_time)
+
+        # If the next run time has not changed, simply replace the job in its heap entry.
+        if entry is not None and entry[_TIMESTAMP] == timestamp:
+            entry[_JOB] = compact_job(job) if self.compact else job
+            return
+
+        self._discard(job.id)
+        self._insert(job)
+
+    def remove_job(self, job_id):
+        if job_id not in self._entries and job_id not in self._paused_jobs:
+            raise JobLookupError(job_id)
+
+        self._discard(job_id)
+
+    def remove_all_jobs(self):
+        self._heap = []
+        self._entries = {}
+        self._paused_jobs = {}
+        self._stale_entries = 0
+
+    def shutdown(self):
+        self.remove_all_jobs()
+
+    def _insert(self, job):
+        if self.compact:
+            compact_job(job)
+
+        timestamp = datetime_to_utc_timestamp(job.next_run_time)
+
+        if timestamp is None:
+            self._paused_jobs[job.id] = job
+            return
+
+        entry = [timestamp, job.id, next(self._counter), job]
+        self._entries[job.id] = entry
+        heapq.heappush(self._heap, entry)
+
+    def _discard(self, job_id):
+        """
+        Remove a job from the index. Its heap entry is marked as stale and dropped later.
+        """
+        if self._paused_jobs.pop(job_id, None) is not None:
+            return
+
+        entry = self._entries.pop(job_id)
+        entry[_JOB] = None
+        self._stale_entries += 1
+
+        # rebuild the heap once stale entries make up most of it, to bound the memory they hold.
+        if self._stale_entries > 1024 and self._stale_entries * 2 > len(self._heap):
+            self._heap = list(self._entries.values())
+            heapq.heapify(self._heap)
+            self._stale_entries = 0
+
+    def _drop_stale_head(self):
+        while self._heap and self._heap[0][_JOB] is None:
+            heapq.heappop(self._heap)
+            self._stale_entries -= 1
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}>"
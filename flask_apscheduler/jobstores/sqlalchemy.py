@@ -0,0 +1,185 @@
+# Copyright 2015 Vinicius Chiele. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""SQL job store sharing the engine, and its connection pool, of the application."""
+
+import contextvars
+import functools
+import threading
+import time
+
+try:
+    from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore as BaseSQLAlchemyJobStore
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+except ImportError as exc:  # pragma: no cover
+    raise ImportError("SQLAlchemyJobStore requires SQLAlchemy installed") from exc
+
+# the job store whose method is running in the current thread or task.
+_current_jobstore = contextvars.ContextVar("flask_apscheduler_current_jobstore", default=None)
+
+
+def get_engine(app, engine, bind=None):
+    """
+    Return the SQLAlchemy engine of an application.
+
+    :param app: the Flask application
+    :param engine: an :class:`~sqlalchemy.engine.Engine`, a Flask-SQLAlchemy extension or the name it is
+        registered under in ``app.extensions``, e.g. ``sqlalchemy``
+    :param str bind: the bind key of the engine of the Flask-SQLAlchemy extension, ``None`` for the default engine
+    """
+    if isinstance(engine, str):
+        if engine not in app.extensions:
+            raise ValueError(f"Extension {engine} is not registered, it must be initialized before the scheduler.")
+
+        engine = app.extensions[engine]
+
+    if isinstance(engine, Engine):
+        return engine
+
+    # Flask-SQLAlchemy < 3 registers a state holding the extension.
+    engine = getattr(engine, "db", engine)
+
+    with app.app_context():
+        if hasattr(engine, "engines"):
+            return engine.engines[bind]
+
+        return engine.get_engine(app, bind)
+
+
+def _tracked(method):
+    """
+    Decorate a method so the connections it checks out of the pool are accounted to the job store.
+    """
+    @functools.wraps(method)
+    def decorated(self, *args, **kwargs):
+        token = _current_jobstore.set(self)
+
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            _current_jobstore.reset(token)
+
+    return decorated
+
+
+class SQLAlchemyJobStore(BaseSQLAlchemyJobStore):
+    """
+    Stores jobs in a database table using SQLAlchemy, like the APScheduler job store, and counts the connections
+    it checks out of the pool, which may be shared with the application.
+
+    An engine passed as ``engine`` belongs to the application, it is not disposed when the job store shuts down.
+
+    Takes the same parameters as :class:`apscheduler.jobstores.sqlalchemy.SQLAlchemyJobStore`.
+    """
+
+    def __init__(self, url=None, engine=None, **kwargs):
+        super(SQLAlchemyJobStore, self).__init__(url, engine, **kwargs)
+        self.owns_engine = not engine
+
+        self._lock = threading.Lock()
+        self._info_key = f"flask_apscheduler.jobstore.{id(self)}"
+        self._checkouts = 0
+        self._checked_out = 0
+        self._peak_checked_out = 0
+        self._total_hold_time = 0
+        self._max_hold_time = 0
+
+    @_tracked
+    def start(self, scheduler, alias):
+        # the listeners only live while the job store is started, a shared engine outlives the job stores using it.
+        for identifier, listener in self._listeners:
+            if not event.contains(self.engine, identifier, listener):
+                event.listen(self.engine, identifier, listener)
+
+        super(SQLAlchemyJobStore, self).start(scheduler, alias)
+
+    def shutdown(self):
+        for identifier, listener in self._listeners:
+            if event.contains(self.engine, identifier, listener):
+                event.remove(self.engine, identifier, listener)
+
+        if self.owns_engine:
+            super(SQLAlchemyJobStore, self).shutdown()
+
+    def get_pool_stats(self):
+        """
+        Return the connection statistics of the job store: the number of connections it has checked out of the
+        pool, holds right now and held at most at the same time, and for how long it held them, in seconds. The
+        ``pool`` entry describes the whole pool, the connections used by the application included.
+
+        :rtype: dict
+        """
+        pool = self.engine.pool
+
+        with self._lock:
+            return dict(
+                checkouts=self._checkouts,
+                checked_out=self._checked_out,
+                peak_checked_out=self._peak_checked_out,
+                mean_hold_time=self._total_hold_time / self._checkouts if self._checkouts else 0,
+                max_hold_time=self._max_hold_time,
+                pool=dict(
+                    size=pool.size() if hasattr(pool, "size") else None,
+                    checked_out=pool.checkedout() if hasattr(pool, "checkedout") else None,
+                    overflow=pool.overflow() if hasattr(pool, "overflow") else None,
+                    status=pool.status(),
+                ),
+            )
+
+    lookup_job = _tracked(BaseSQLAlchemyJobStore.lookup_job)
+    get_due_jobs = _tracked(BaseSQLAlchemyJobStore.get_due_jobs)
+    get_next_run_time = _tracked(BaseSQLAlchemyJobStore.get_next_run_time)
+    get_all_jobs = _tracked(BaseSQLAlchemyJobStore.get_all_jobs)
+    add_job = _tracked(BaseSQLAlchemyJobStore.add_job)
+    update_job = _tracked(BaseSQLAlchemyJobStore.update_job)
+    remove_job = _tracked(BaseSQLAlchemyJobStore.remove_job)
+    remove_all_jobs = _tracked(BaseSQLAlchemyJobStore.remove_all_jobs)
+
+    @property
+    def _listeners(self):
+        return (("checkout", self._handle_checkout), ("checkin", self._handle_checkin))
+
+    def _reset_after_fork(self):
+        # the connections of the parent process must not be used, nor closed, by the forked process. An engine of
+        # the application is left to the application, which may have reset it already.
+        self._lock = threading.Lock()
+        self._checked_out = 0
+
+        if self.owns_engine:
+            self.engine.dispose(close=False)
+
+    def _handle_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        if _current_jobstore.get() is not self:
+            return
+
+        connection_record.info[self._info_key] = time.monotonic()
+
+        with self._lock:
+            self._checkouts += 1
+            self._checked_out += 1
+            self._peak_checked_out = max(self._peak_checked_out, self._checked_out)
+
+    def _handle_checkin(self, dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop(self._info_key, None) if connection_record else None
+
+        if checked_out_at is None:
+            return
+
+        hold_time = time.monotonic() - checked_out_at
+
+        with self._lock:
+            self._checked_out -= 1
+            self._total_hold_time += hold_time
+            self._max_hold_time = max(self._max_hold_time, hold_time)
@@ -0,0 +1,295 @@
+# Copyright 2015 Vinicius Chiele. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Persistent job store tuned for a local SQLite database."""
+
+import heapq
+import itertools
+import pickle
+import sqlite3
+import threading
+
+from apscheduler.job import Job
+from apscheduler.jobstores.base import BaseJobStore, ConflictingIdError, JobLookupError
+from apscheduler.util import datetime_to_utc_timestamp, utc_timestamp_to_datetime
+
+# SQLite limits the number of host parameters of a statement.
+MAX_PARAMETERS = 500
+
+
+class RunTimeIndex(object):
+    """
+    Indexes the next run time of every job by id, in a heap ordered by next run time.
+    """
+
+    def __init__(self):
+        self._heap = []  # [timestamp, job id, counter, live]
+        self._entries = {}  # id -> heap entry, None for paused jobs
+        self._counter = itertools.count()
+
+    def __contains__(self, job_id):
+        return job_id in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def set(self, job_id, timestamp):
+        self.discard(job_id)
+
+        if timestamp is None:
+            self._entries[job_id] = None
+            return
+
+        entry = [timestamp, job_id, next(self._counter), True]
+        self._entries[job_id] = entry
+        heapq.heappush(self._heap, entry)
+
+        # drop stale entries once they make up most of the heap.
+        if len(self._heap) > 1024 and len(self._heap) > 2 * len(self._entries):
+            self._heap = [entry for entry in self._heap if entry[3]]
+            heapq.heapify(self._heap)
+
+    def discard(self, job_id):
+        entry = self._entries.pop(job_id, None)
+
+        if entry is not None:
+            entry[3] = False
+
+    def clear(self):
+        self._heap = []
+        self._entries = {}
+
+    def get_due_job_ids(self, timestamp):
+        """Return the ids of the jobs due at the given timestamp, sorted by next run time."""
+        due_entries = []
+
+        while self._heap and self._heap[0][0] <= timestamp:
+            entry = heapq.heappop(self._heap)
+
+            if entry[3]:
+                due_entries.append(entry)
+
+        for entry in due_entries:
+            heapq.heappush(self._heap, entry)
+
+        return [entry[1] for entry in due_entries]
+
+    def get_next_timestamp(self):
+        while self._heap and not self._heap[0][3]:
+            heapq.heappop(self._heap)
+
+        return self._heap[0][0] if self._heap else None
+
+
+class SQLiteJobStore(BaseJobStore):
+    """
+    Stores jobs in a local SQLite database, for single-node deployments.
+
+    The database runs in WAL mode and the writes made while the scheduler processes due jobs are committed
+    together once the round is over, instead of one transaction per job. The next run times are indexed in
+    memory, so looking for due jobs does not read the database until jobs are actually due.
+
+    The in-memory index assumes the store is the only writer of its table, it must not be shared between
+    schedulers.
+
+    :param str path: path of the database file
+    :param str tablename: name of the table to store jobs in
+    :param int pickle_protocol: pickle protocol level to use (for serialization), defaults to the
+        highest available
+    :param str synchronous: value of the ``synchronous`` pragma, ``NORMAL`` is durable in WAL mode
+        except for the transactions committed right before a power loss
+    """
+
+    def __init__(self, path="jobs.sqlite", tablename="apscheduler_jobs", pickle_protocol=pickle.HIGHEST_PROTOCOL,
+                 synchronous="NORMAL"):
+        super(SQLiteJobStore, self).__init__()
+        self.path = path
+        self.tablename = tablename
+        self.pickle_protocol = pickle_protocol
+        self.synchronous = synchronous
+
+        self._connection = None
+        self._lock = threading.RLock()
+        self._index = RunTimeIndex()
+        self._pending_updates = {}  # id -> (timestamp, job state), flushed together
+        self._in_batch = False
+
+        # statements are kept as constants, sqlite3 prepares them once and reuses them from its statement cache.
+        self._select_ids_sql = f"SELECT id, next_run_time FROM {tablename}"
+        self._select_job_sql = f"SELECT job_state FROM {tablename} WHERE id = ?"
+        self._select_all_sql = (f"SELECT id, job_state FROM {tablename} "
+                                "ORDER BY next_run_time IS NULL, next_run_time, id")
+        self._insert_sql = f"INSERT INTO {tablename} (id, next_run_time, job_state) VALUES (?, ?, ?)"
+        self._update_sql = f"UPDATE {tablename} SET next_run_time = ?, job_state = ? WHERE id = ?"
+        self._delete_sql = f"DELETE FROM {tablename} WHERE id = ?"
+        self._delete_all_sql = f"DELETE FROM {tablename}"
+
+    def start(self, scheduler, alias):
+        super(SQLiteJobStore, self).start(scheduler, alias)
+
+        with self._lock:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(f"PRAGMA synchronous={self.synchronous}")
+            self._connection.execute(f"CREATE TABLE IF NOT EXISTS {self.tablename} "
+                                     "(id TEXT PRIMARY KEY, next_run_time REAL, job_state BLOB NOT NULL)")
+            self._connection.execute(f"CREATE INDEX IF NOT EXISTS ix_{self.tablename}_next_run_time "
+                                     f"ON {self.tablename} (next_run_time)")
+
+            self._index.clear()
+
+            for job_id, timestamp in self._connection.execute(self._select_ids_sql):
+                self._index.set(job_id, timestamp)
+
+    def shutdown(self):
+        with self._lock:
+            if self._connection is None:
+                return
+
+            self._commit()
+            self._connection.close()
+            self._connection = None
+
+    def lookup_job(self, job_id):
+        with self._lock:
+            if job_id not in self._index:
+                return None
+
+            self._flush_updates()
+            row = self._connection.execute(self._select_job_sql, (job_id,)).fetchone()
+            return self._reconstitute_job(row[0]) if row else None
+
+    def get_due_jobs(self, now):
+        with self._lock:
+            job_ids = self._index.get_due_job_ids(datetime_to_utc_timestamp(now))
+
+            if not job_ids:
+                return []
+
+            # the updates made while the scheduler processes the due jobs are committed by get_next_run_time().
+            self._begin()
+            self._flush_updates()
+
+            job_states = {}
+
+            for i in range(0, len(job_ids), MAX_PARAMETERS):
+                chunk = job_ids[i:i + MAX_PARAMETERS]
+                sql = f"SELECT id, job_state FROM {self.tablename} WHERE id IN ({','.join('?' * len(chunk))})"
+                job_states.update(self._connection.execute(sql, chunk))
+
+            return self._reconstitute_jobs((job_id, job_states.get(job_id)) for job_id in job_ids)
+
+    def get_next_run_time(self):
+        with self._lock:
+            self._commit()
+            return utc_timestamp_to_datetime(self._index.get_next_timestamp())
+
+    def get_all_jobs(self):
+        with self._lock:
+            self._flush_updates()
+            return self._reconstitute_jobs(self._connection.execute(self._select_all_sql).fetchall())
+
+    def add_job(self, job):
+        with self._lock:
+            if job.id in self._index:
+                raise ConflictingIdError(job.id)
+
+            timestamp = datetime_to_utc_timestamp(job.next_run_time)
+            job_state = pickle.dumps(job.__getstate__(), self.pickle_protocol)
+
+            self._connection.execute(self._insert_sql, (job.id, timestamp, job_state))
+            self._index.set(job.id, timestamp)
+
+    def update_job(self, job):
+        with self._lock:
+            if job.id not in self._index:
+                raise JobLookupError(job.id)
+
+            timestamp = datetime_to_utc_timestamp(job.next_run_time)
+            job_state = pickle.dumps(job.__getstate__(), self.pickle_protocol)
+
+            self._index.set(job.id, timestamp)
+
+            if self._in_batch:
+                self._pending_updates[job.id] = (timestamp, job_state)
+            else:
+                self._connection.execute(self._update_sql, (timestamp, job_state, job.id))
+
+    def remove_job(self, job_id):
+        with self._lock:
+            if job_id not in self._index:
+                raise JobLookupError(job_id)
+
+            self._pending_updates.pop(job_id, None)
+            self._connection.execute(self._delete_sql, (job_id,))
+            self._index.discard(job_id)
+
+    def remove_all_jobs(self):
+        with self._lock:
+            self._pending_updates.clear()
+            self._connection.execute(self._delete_all_sql)
+            self._index.clear()
+
+    def _reset_after_fork(self):
+        # the connection is left open for the parent process, SQLite connections must not be used across a fork.
+        self._lock = threading.RLock()
+        self._connection = None
+        self._pending_updates = {}
+        self._in_batch = False
+
+    def _begin(self):
+        if not self._in_batch:
+            self._connection.execute("BEGIN")
+            self._in_batch = True
+
+    def _commit(self):
+        if self._in_batch:
+            self._flush_updates()
+            self._connection.execute("COMMIT")
+            self._in_batch = False
+
+    def _flush_updates(self):
+        if self._pending_updates:
+            params = [(timestamp, job_state, job_id)
+                      for job_id, (timestamp, job_state) in self._pending_updates.items()]
+            self._pending_updates.clear()
+            self._connection.executemany(self._update_sql, params)
+
+    def _reconstitute_job(self, job_state):
+        job_state = pickle.loads(job_state)
+        job_state["jobstore"] = self
+        job = Job.__new__(Job)
+        job.__setstate__(job_state)
+        job._scheduler = self._scheduler
+        job._jobstore_alias = self._alias
+        return job
+
+    def _reconstitute_jobs(self, rows):
+        jobs = []
+        failed_job_ids = []
+
+        for job_id, job_state in rows:
+            try:
+                jobs.append(self._reconstitute_job(job_state))
+            except BaseException:
+                self._logger.exception('Unable to restore job "%s" -- removing it', job_id)
+                failed_job_ids.append(job_id)
+
+        for job_id in failed_job_ids:
+            self.remove_job(job_id)
+
+        return jobs
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} (path={self.path})>"
@@ -2,6 +2,7 @@ from __future__ import absolute_import
 
 import datetime
 import flask
+import json
 
 from apscheduler.job import Job
 from .utils import job_to_dict
@@ -12,6 +13,21 @@ def jsonify(data, status=None):
     return flask.current_app.response_class(content, status=status, mimetype="application/json")
 
 
+def dumps(data):
+    """
+    Serialize data to JSON outside of an application context, objects that are not serializable are
+    replaced by their representation.
+    """
+    return json.dumps(data, default=_repr_default).encode("utf-8")
+
+
+def _repr_default(obj):
+    try:
+        return _default(obj)
+    except TypeError:
+        return repr(obj)
+
+
 def _default(obj):
     if isinstance(obj, datetime.datetime):
         return obj.isoformat()
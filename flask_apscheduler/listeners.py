@@ -0,0 +1,153 @@
+# Copyright 2015 Vinicius Chiele. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Provides event listeners that run off the scheduler thread."""
+
+import logging
+import os
+import threading
+
+from collections import deque
+
+LOGGER = logging.getLogger("flask_apscheduler")
+
+OVERFLOW_DROP_NEWEST = "drop_newest"
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_BLOCK = "block"
+
+OVERFLOW_POLICIES = (OVERFLOW_DROP_NEWEST, OVERFLOW_DROP_OLDEST, OVERFLOW_BLOCK)
+
+
+class AsyncListener(object):
+    """
+    Queues the events it is called with and delivers them to a callback from a dedicated daemon thread, so a slow
+    listener does not delay the scheduler.
+
+    When the queue is full, ``drop_newest`` drops the incoming event, ``drop_oldest`` drops the oldest queued one
+    and ``block`` waits up to ``block_timeout`` seconds for room before dropping the incoming event.
+
+    :param callback: any callable that takes one argument, a list of events if ``batch_size`` is given
+    :param int max_queue_size: maximum number of events queued
+    :param str overflow: what to do when the queue is full, ``drop_newest``, ``drop_oldest`` or ``block``
+    :param int batch_size: if given, the callback is called with lists of up to ``batch_size`` queued events
+    :param float block_timeout: maximum number of seconds the ``block`` policy waits for room in the queue
+    :ivar int dropped: number of events dropped because the queue was full
+    """
+
+    def __init__(self, callback, max_queue_size=10000, overflow=OVERFLOW_DROP_OLDEST, batch_size=None,
+                 block_timeout=1):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Overflow policy {overflow} is not supported.")
+
+        self.callback = callback
+        self.max_queue_size = max_queue_size
+        self.overflow = overflow
+        self.batch_size = batch_size
+        self.block_timeout = block_timeout
+        self.dropped = 0
+
+        self._condition = threading.Condition()
+        self._queue = deque()
+        self._delivering = False
+        self._closed = False
+        self._thread = None
+        self._pid = None
+
+    @property
+    def qsize(self):
+        """Get the number of events queued."""
+        return len(self._queue)
+
+    def __call__(self, event):
+        with self._condition:
+            if len(self._queue) >= self.max_queue_size and not self._make_room():
+                self.dropped += 1
+                return
+
+            self._queue.append(event)
+
+            # the delivery thread does not survive a fork.
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="APScheduler-AsyncListener", daemon=True)
+                self._thread.start()
+
+            self._condition.notify_all()
+
+    def flush(self, timeout=None):
+        """
+        Wait until the queued events have been delivered.
+
+        :param float timeout: maximum number of seconds to wait
+        :return: ``True`` if every queued event has been delivered
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._queue and not self._delivering, timeout)
+
+    def close(self, timeout=None):
+        """
+        Deliver the queued events and stop the delivery thread.
+
+        :param float timeout: maximum number of seconds to wait for the queued events to be delivered
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            thread = self._thread
+
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def _reset_after_fork(self):
+        # the queued events are delivered by the parent process.
+        self._condition = threading.Condition()
+        self._queue = deque()
+        self._delivering = False
+        self._thread = None
+
+    def _make_room(self):
+        if self.overflow == OVERFLOW_DROP_NEWEST:
+            return False
+
+        if self.overflow == OVERFLOW_DROP_OLDEST:
+            self._queue.popleft()
+            self.dropped += 1
+            return True
+
+        return self._condition.wait_for(lambda: len(self._queue) < self.max_queue_size, self.block_timeout)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._queue or self._closed)
+
+                if not self._queue:
+                    return
+
+                count = min(self.batch_size or 1, len(self._queue))
+                batch = [self._queue.popleft() for _ in range(count)]
+                self._delivering = True
+                self._condition.notify_all()
+
+            try:
+                if self.batch_size:
+                    self.callback(batch)
+                else:
+                    self.callback(batch[0])
+            except Exception:
+                LOGGER.exception(f"Error notifying listener {self.callback}")
+            finally:
+                with self._condition:
+                    self._delivering = False
+                    self._condition.notify_all()
@@ -0,0 +1,133 @@
+# Copyright 2015 Vinicius Chiele. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Provides per-run memory accounting with tracemalloc."""
+
+import threading
+import tracemalloc
+
+from collections import OrderedDict
+
+# the allocations made by tracemalloc itself are left out of the snapshots.
+_SNAPSHOT_FILTERS = (tracemalloc.Filter(False, tracemalloc.__file__),)
+
+
+class MemoryUsage(object):
+    """
+    Holds the memory usage of a job execution.
+
+    :param str job_id: the identifier of the job
+    :param str run_id: the identifier of the job execution
+    :param int peak: the peak of memory allocated during the execution, in bytes
+    :param int retained: the memory allocated during the execution and not freed at its end, in bytes
+    :param list top_allocations: the sites that retain the most memory, as ``(file:line, size, count)`` tuples
+    """
+
+    __slots__ = ("job_id", "run_id", "peak", "retained", "top_allocations")
+
+    def __init__(self, job_id, run_id, peak, retained, top_allocations):
+        self.job_id = job_id
+        self.run_id = run_id
+        self.peak = peak
+        self.retained = retained
+        self.top_allocations = top_allocations
+
+    def to_dict(self):
+        return OrderedDict([
+            ("run_id", self.run_id),
+            ("peak", self.peak),
+            ("retained", self.retained),
+            ("top_allocations", [OrderedDict([("site", site), ("size", size), ("count", count)])
+                                 for site, size, count in self.top_allocations]),
+        ])
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} (job_id={self.job_id}, peak={self.peak}, retained={self.retained})>"
+
+
+class MemoryTracer(object):
+    """
+    Measures the memory allocated by job executions with tracemalloc.
+
+    Tracing slows down every allocation of the process, so tracemalloc is only started while a traced execution
+    is in progress, unless it was already tracing. Allocations are not tracked per thread, the executions running
+    at the same time as a traced one are accounted to it as well. Before Python 3.9, the peak of an execution is only
+    measured if it exceeds the peak reached since tracemalloc started tracing.
+
+    :param int top: number of allocation sites reported
+    """
+
+    def __init__(self, top=10):
+        self.top = top
+
+        self._lock = threading.Lock()
+        self._active = 0
+        self._started = False
+
+    def begin(self):
+        """
+        Start measuring an execution.
+        :return: the state to pass to :meth:`end`
+        """
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started = True
+
+            # the peak can only be reset for all the executions at once, and only from Python 3.9.
+            if self._active == 0 and hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+
+            self._active += 1
+            current, peak = tracemalloc.get_traced_memory()
+
+        return current, peak, tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+    def end(self, state):
+        """
+        Stop measuring an execution.
+        :return: the peak memory, the retained memory and the top allocation sites of the execution
+        """
+        baseline, baseline_peak, before = state
+        after = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        current, peak = tracemalloc.get_traced_memory()
+
+        # without reset_peak(), a peak reached before the execution is not the execution's, the memory it still holds
+        # is the only known lower bound of its peak.
+        if peak <= baseline_peak and not hasattr(tracemalloc, "reset_peak"):
+            peak = current
+
+        with self._lock:
+            self._active -= 1
+
+            if self._active == 0 and self._started:
+                tracemalloc.stop()
+                self._started = False
+
+        # compare_to() sorts by absolute difference, the memory freed during the execution is left out.
+        stats = sorted((stat for stat in after.compare_to(before, "lineno") if stat.size_diff > 0),
+                       key=lambda stat: stat.size_diff, reverse=True)
+        top_allocations = [(f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", stat.size_diff,
+                            stat.count_diff) for stat in stats[:self.top]]
+
+        return max(peak - baseline, 0), max(current - baseline, 0), top_allocations
+
+    def _reset_after_fork(self):
+        # the executions measured by the parent process never end in this one.
+        self._lock = threading.Lock()
+        self._active = 0
+
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
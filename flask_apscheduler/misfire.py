@@ -0,0 +1,119 @@
+# Copyright 2015 Vinicius Chiele. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Provides a misfire policy that adapts to the load of the executors."""
+
+import threading
+
+from datetime import timedelta
+
+RUN = "run"
+COALESCE = "coalesce"
+SKIP = "skip"
+
+
+class AdaptiveMisfirePolicy(object):
+    """
+    Decides what to do with the late executions of a job from its average duration and the load of its executor.
+
+    An execution is late when it is submitted more than ``grace_time`` seconds after its scheduled run time, or
+    when several run times are due at once. Then:
+
+    - if the job has been skipped ``max_skips`` times in a row, it runs once, whatever the load,
+    - if the executor is saturated, it is skipped,
+    - if running every missed run time would take more than ``max_catch_up_time`` seconds, it runs once,
+    - otherwise every missed run time runs.
+
+    :param float grace_time: number of seconds an execution may be late before the policy applies
+    :param float max_catch_up_time: number of seconds the missed run times of a job may take to run
+    :param int max_skips: number of times in a row a job may be skipped
+    :param float saturation: load of the executor, the running executions per worker, from which it is saturated
+    :param float smoothing: weight of the last duration in the moving average of the durations of a job
+    """
+
+    def __init__(self, grace_time=1, max_catch_up_time=60, max_skips=3, saturation=1.0, smoothing=0.2):
+        self.grace_time = grace_time
+        self.max_catch_up_time = max_catch_up_time
+        self.max_skips = max_skips
+        self.saturation = saturation
+        self.smoothing = smoothing
+
+        self._lock = threading.Lock()
+        self._durations = {}  # job id -> moving average duration
+        self._skips = {}  # job id -> number of times skipped in a row
+
+    def get_average_duration(self, job_id):
+        """
+        Return the moving average duration of a job, in seconds, ``None`` if it has not run yet.
+        """
+        with self._lock:
+            return self._durations.get(job_id)
+
+    def record_duration(self, job_id, duration):
+        """
+        Add the duration of a job execution to the moving average of the job.
+        """
+        with self._lock:
+            average = self._durations.get(job_id)
+
+            if average is None:
+                self._durations[job_id] = duration
+            else:
+                self._durations[job_id] = average + self.smoothing * (duration - average)
+
+    def decide(self, job_id, run_times, now, load):
+        """
+        Decide what to do with the due run times of a job.
+
+        :param str job_id: the identifier of the job
+        :param list[datetime] run_times: the due run times of the job
+        :param datetime now: the current datetime
+        :param float load: the load of the executor, the running executions per worker
+        :return: ``None`` if the execution is not late, otherwise the decision, ``run``, ``coalesce`` or ``skip``,
+            and its reason
+        """
+        if len(run_times) == 1 and now - run_times[0] <= timedelta(seconds=self.grace_time):
+            return None
+
+        with self._lock:
+            skips = self._skips.get(job_id, 0)
+            average = self._durations.get(job_id) or 0
+
+            if skips >= self.max_skips:
+                decision = COALESCE
+                reason = f"skipped {skips} times in a row"
+            elif load >= self.saturation:
+                decision = SKIP
+                reason = f"executor load of {load:.2f}"
+            elif len(run_times) * average > self.max_catch_up_time:
+                decision = COALESCE
+                reason = f"{len(run_times)} run times would take {len(run_times) * average:.1f}s"
+            else:
+                decision = RUN
+                reason = f"executor load of {load:.2f}"
+
+            self._skips[job_id] = skips + 1 if decision == SKIP else 0
+
+        return decision, reason
+
+    def forget(self, job_id):
+        """
+        Forget the durations and skips of a job.
+        """
+        with self._lock:
+            self._durations.pop(job_id, None)
+            self._skips.pop(job_id, None)
+
+    def _reset_after_fork(self):
+        self._lock = threading.Lock()
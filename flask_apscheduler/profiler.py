@@ -0,0 +1,207 @@
+# Copyright 2015 Vinicius Chiele. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Provides a sampling profiler for job executions."""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+from apscheduler.executors.base import run_job
+
+try:
+    from apscheduler.executors.base import run_coroutine_job
+except ImportError:  # APScheduler < 3.11
+    from apscheduler.executors.base_py3 import run_coroutine_job
+
+# the frames below the job function belong to the executor, they are left out of the stacks.
+_RUN_JOB_CODES = (run_job.__code__, run_coroutine_job.__code__)
+
+TRUNCATED_STACK = "[truncated]"
+
+
+class JobProfile(object):
+    """
+    Aggregates the stacks sampled during the profiled executions of a job.
+
+    :param int max_stacks: maximum number of distinct stacks kept, the samples of the other ones are counted
+        as ``[truncated]``
+    """
+
+    def __init__(self, max_stacks=10000):
+        self.max_stacks = max_stacks
+        self.runs = 0
+        self.samples = 0
+
+        self._lock = threading.Lock()
+        self._stacks = {}  # collapsed stack -> number of samples
+
+    def __getstate__(self):
+        with self._lock:
+            return dict(max_stacks=self.max_stacks, runs=self.runs, samples=self.samples, stacks=dict(self._stacks))
+
+    def __setstate__(self, state):
+        self.max_stacks = state["max_stacks"]
+        self.runs = state["runs"]
+        self.samples = state["samples"]
+        self._lock = threading.Lock()
+        self._stacks = state["stacks"]
+
+    def add_run(self):
+        with self._lock:
+            self.runs += 1
+
+    def add_sample(self, stack):
+        with self._lock:
+            if stack not in self._stacks and len(self._stacks) >= self.max_stacks:
+                stack = TRUNCATED_STACK
+
+            self._stacks[stack] = self._stacks.get(stack, 0) + 1
+            self.samples += 1
+
+    def to_collapsed(self):
+        """
+        Return the stacks in the collapsed format of flamegraph.pl and speedscope, one ``frame;frame;frame count``
+        line per stack, the root frame first.
+
+        :rtype: str
+        """
+        with self._lock:
+            return "".join(f"{stack} {count}\n" for stack, count in sorted(self._stacks.items()))
+
+    def _reset_after_fork(self):
+        self._lock = threading.Lock()
+
+
+class StackSampler(object):
+    """
+    Samples the stacks of the job executions registered with it every ``interval`` seconds, from a single daemon
+    thread which only runs while executions are registered.
+
+    The coroutine jobs share the thread of their event loop, each of them is sampled while its task is running.
+
+    :param float interval: number of seconds between two samples
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+
+        self._condition = threading.Condition()
+        self._runs = {}  # run id -> (thread id, task frame, profile)
+        self._thread = None
+        self._pid = None
+
+    def add(self, run_id, thread_id, profile, task_frame=None):
+        """
+        Start sampling a job execution into a profile.
+
+        :param str run_id: the identifier of the job execution
+        :param int thread_id: the thread running the job
+        :param JobProfile profile: the profile the samples are added to
+        :param task_frame: the frame of the asyncio task running the job, see :func:`get_task_frame`, the
+            thread is only sampled while this frame is on its stack
+        """
+        with self._condition:
+            self._runs[run_id] = (thread_id, task_frame, profile)
+
+            # the sampling thread does not survive a fork.
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="APScheduler-StackSampler", daemon=True)
+                self._thread.start()
+
+            self._condition.notify()
+
+    def remove(self, run_id):
+        """
+        Stop sampling a job execution.
+        """
+        with self._condition:
+            self._runs.pop(run_id, None)
+
+    def _reset_after_fork(self):
+        self._condition = threading.Condition()
+        self._runs = {}
+        self._thread = None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._runs:
+                    self._condition.wait()
+
+                runs = list(self._runs.values())
+
+            frames = sys._current_frames()
+
+            for thread_id, task_frame, profile in runs:
+                frame = frames.get(thread_id)
+
+                if frame is None or (task_frame is not None and not _is_on_stack(task_frame, frame)):
+                    continue
+
+                stack = collapse_stack(frame)
+
+                if stack:
+                    profile.add_sample(stack)
+
+            del frames, runs
+            time.sleep(self.interval)
+
+
+def get_task_frame():
+    """
+    Return the frame of the coroutine of the asyncio task running in the current thread.
+
+    :return: the frame or ``None`` if no task is running
+    """
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        return None
+
+    return task.get_coro().cr_frame if task is not None else None
+
+
+def _is_on_stack(frame, top_frame):
+    while top_frame is not None:
+        if top_frame is frame:
+            return True
+
+        top_frame = top_frame.f_back
+
+    return False
+
+
+def collapse_stack(frame):
+    """
+    Return the stack of a frame as ``frame;frame;frame``, from the job function to the given frame.
+
+    :return: the stack or ``None`` if the frame is not running a job, e.g. the job has not started yet
+    """
+    names = []
+
+    while frame is not None:
+        code = frame.f_code
+
+        if code in _RUN_JOB_CODES:
+            names.reverse()
+            return ";".join(names)
+
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+
+    return None
@@ -0,0 +1,99 @@
+# Copyright 2015 Vinicius Chiele. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Provides per-client rate limiting for the scheduler API."""
+
+import threading
+import time
+
+from collections import OrderedDict
+
+
+class RateLimiter(object):
+    """
+    Limits the requests of every client with a token bucket and a maximum number of requests in flight.
+
+    :param float rate: number of requests a client can make per second, ``None`` to not limit the rate
+    :param int burst: number of requests a client can make at once, defaults to ``max(1, rate)``
+    :param int max_in_flight: number of requests a client can have in progress, ``None`` to not limit them
+    :param int max_clients: number of clients tracked, the least recently seen ones are forgotten first
+    """
+
+    def __init__(self, rate=None, burst=None, max_in_flight=None, max_clients=10000):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, rate or 0)
+        self.max_in_flight = max_in_flight
+        self.max_clients = max_clients
+
+        self._lock = threading.Lock()
+        self._clients = OrderedDict()  # client -> [tokens, updated at, requests in flight]
+
+    def acquire(self, client):
+        """
+        Take a token and an in-flight slot for a client request.
+        :return: ``None`` if the request is allowed, otherwise the number of seconds to wait before retrying.
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            state = self._clients.get(client)
+
+            if state is None:
+                # makes room before tracking the client, so that its own bucket is never the one forgotten.
+                self._forget_clients(self.max_clients - 1)
+                state = self._clients[client] = [self.burst, now, 0]
+            else:
+                self._clients.move_to_end(client)
+
+            if self.max_in_flight is not None and state[2] >= self.max_in_flight:
+                return 1
+
+            if self.rate:
+                state[0] = min(self.burst, state[0] + (now - state[1]) * self.rate)
+                state[1] = now
+
+                if state[0] < 1:
+                    return (1 - state[0]) / self.rate
+
+                state[0] -= 1
+
+            state[2] += 1
+            return None
+
+    def release(self, client):
+        """
+        Free the in-flight slot taken by a client request.
+        """
+        with self._lock:
+            state = self._clients.get(client)
+
+            if state is not None:
+                state[2] -= 1
+
+    def _forget_clients(self, max_clients):
+        """
+        Forget the least recently seen clients without a request in flight, beyond a number of clients.
+        """
+        skipped = 0
+
+        # visits the clients from the least recently seen one, and only as many as needed.
+        while len(self._clients) > max_clients and skipped < len(self._clients):
+            client, state = next(iter(self._clients.items()))
+
+            if state[2] == 0:
+                del self._clients[client]
+            else:
+                # a client with a request in flight is still active.
+                self._clients.move_to_end(client)
+                skipped += 1
@@ -0,0 +1,325 @@
+# Copyright 2015 Vinicius Chiele. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Lets processes use a scheduler running in another process, over a Unix socket."""
+
+import io
+import logging
+import os
+import pickle
+import socket
+import struct
+import threading
+
+from apscheduler.job import Job
+from .utils import remove_stale_socket
+
+LOGGER = logging.getLogger("flask_apscheduler")
+
+# every message is a pickle prefixed by its length.
+_HEADER = struct.Struct(">I")
+
+# maximum size of a message, in bytes.
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+
+# the methods and attributes of APScheduler the clients can call.
+REMOTE_METHODS = frozenset([
+    "state", "shutdown", "pause", "resume", "add_job", "remove_job", "remove_all_jobs", "get_job", "get_jobs",
+    "modify_job", "get_job_options", "get_job_profile", "get_job_memory_usage", "get_jobs_memory_usage",
+    "get_calendar", "pause_job", "resume_job", "run_job",
+])
+
+# the methods that wait for the jobs, the timeout of the client does not apply to them.
+BLOCKING_METHODS = frozenset(["shutdown", "run_job"])
+
+
+class RemoteSchedulerError(Exception):
+    """
+    Raised by a client when the scheduler process fails in a way that cannot be sent back as is.
+    """
+
+
+class _Pickler(pickle.Pickler):
+    def reducer_override(self, obj):
+        # the state of a job leaves out its job store, which tells whether it is pending.
+        if isinstance(obj, Job):
+            return _restore_job, (obj.__getstate__(), obj._jobstore_alias)
+
+        return NotImplemented
+
+
+def _restore_job(state, jobstore_alias):
+    job = Job.__new__(Job)
+    job.__setstate__(state)
+    job._scheduler = None
+    job._jobstore_alias = jobstore_alias
+    return job
+
+
+def encode_message(message):
+    buffer = io.BytesIO()
+    _Pickler(buffer, pickle.HIGHEST_PROTOCOL).dump(message)
+    data = buffer.getvalue()
+    return _HEADER.pack(len(data)) + data
+
+
+def send_message(sock, message):
+    sock.sendall(encode_message(message))
+
+
+def receive_message(sock):
+    """
+    Return the next message received on a socket, ``None`` if the connection has been closed.
+    """
+    header = _receive_exactly(sock, _HEADER.size)
+
+    if header is None:
+        return None
+
+    size, = _HEADER.unpack(header)
+
+    if size > MAX_MESSAGE_SIZE:
+        raise RemoteSchedulerError(f"Message of {size} bytes exceeds the maximum size.")
+
+    data = _receive_exactly(sock, size)
+
+    if data is None:
+        raise RemoteSchedulerError("Connection closed in the middle of a message.")
+
+    return pickle.loads(data)
+
+
+def _receive_exactly(sock, size):
+    chunks = []
+
+    while size:
+        chunk = sock.recv(min(size, 1024 * 1024))
+
+        if not chunk:
+            return None
+
+        chunks.append(chunk)
+        size -= len(chunk)
+
+    return b"".join(chunks)
+
+
+class SchedulerServer(object):
+    """
+    Serves the calls of :class:`SchedulerClient` instances to a scheduler, over a Unix socket.
+
+    Messages are pickles, so the socket must only be accessible to trusted processes.
+
+    :param APScheduler scheduler: the scheduler to serve
+    :param str path: the path of the socket
+    :param int mode: the permissions of the socket
+    """
+
+    def __init__(self, scheduler, path, mode=0o600):
+        self.scheduler = scheduler
+        self.path = path
+        self.mode = mode
+
+        self._socket = None
+        self._thread = None
+
+    def start(self):
+        """
+        Start serving the socket.
+
+        :raises RemoteSchedulerError: if another server is listening on the socket
+        """
+        self.check_path()
+
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        # the socket file is created without the permissions chmod removes, other users cannot connect in between.
+        old_umask = os.umask(~self.mode & 0o777)
+
+        try:
+            self._socket.bind(self.path)
+        finally:
+            os.umask(old_umask)
+
+        os.chmod(self.path, self.mode)
+        self._socket.listen()
+        self._thread = threading.Thread(target=self._accept, args=(self._socket,), name="APScheduler-Server",
+                                        daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        if self._socket is None:
+            return
+
+        # unblocks the accepting thread.
+        self._socket.shutdown(socket.SHUT_RDWR)
+        self._socket.close()
+        self._thread.join()
+        self._socket = None
+
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def check_path(self):
+        """
+        Make sure the socket can be served: a socket left behind by a process that has not shut down cleanly is
+        removed.
+
+        :raises RemoteSchedulerError: if another server is listening on the socket
+        """
+        if not remove_stale_socket(self.path):
+            raise RemoteSchedulerError(f"Another scheduler process is serving {self.path}.")
+
+    def _accept(self, server_socket):
+        while True:
+            try:
+                sock, _ = server_socket.accept()
+            except OSError:
+                return
+
+            threading.Thread(target=self._serve, args=(sock,), name="APScheduler-ServerConnection",
+                             daemon=True).start()
+
+    def _serve(self, sock):
+        with sock:
+            while True:
+                try:
+                    message = receive_message(sock)
+                except Exception:
+                    LOGGER.exception("Error receiving a scheduler call")
+                    return
+
+                if message is None:
+                    return
+
+                name = message[0]
+
+                try:
+                    data = encode_message(self._call(*message))
+                except Exception as e:
+                    data = encode_message((False, RemoteSchedulerError(f"{name} failed: {e!r}")))
+
+                try:
+                    sock.sendall(data)
+                except OSError:
+                    return
+
+    def _call(self, name, args, kwargs):
+        try:
+            if name not in REMOTE_METHODS:
+                raise RemoteSchedulerError(f"{name} cannot be called remotely.")
+
+            value = getattr(self.scheduler, name)
+
+            if callable(value):
+                value = value(*args, **kwargs)
+
+            return True, value
+        except Exception as e:
+            return False, e
+
+
+class SchedulerClient(object):
+    """
+    Calls the methods of a scheduler served by a :class:`SchedulerServer`, every thread over its own connection.
+
+    :param str path: the path of the socket
+    :param float timeout: the maximum number of seconds a call may take, except the calls of ``BLOCKING_METHODS``
+    """
+
+    def __init__(self, path, timeout=30):
+        self.path = path
+        self.timeout = timeout
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sockets = set()  # the connections of all the threads
+
+    def call(self, name, *args, **kwargs):
+        """
+        Call a method of the scheduler and return its result.
+
+        :raises ConnectionError: if the scheduler process cannot be reached
+        """
+        sock = getattr(self._local, "socket", None)
+
+        try:
+            if sock is None:
+                sock = self._connect()
+
+            try:
+                send_message(sock, (name, args, kwargs))
+            except OSError:
+                # the connection has been closed by a previous scheduler process, the call has not been received.
+                self._disconnect()
+                sock = self._connect()
+                send_message(sock, (name, args, kwargs))
+
+            sock.settimeout(None if name in BLOCKING_METHODS else self.timeout)
+
+            response = receive_message(sock)
+        except Exception:
+            self._disconnect()
+            raise
+
+        if response is None:
+            self._disconnect()
+            raise ConnectionError("Connection closed by the scheduler process.")
+
+        ok, value = response
+
+        if not ok:
+            raise value
+
+        return value
+
+    def close(self):
+        """
+        Close the connections of all the threads.
+        """
+        with self._lock:
+            sockets = list(self._sockets)
+            self._sockets.clear()
+
+        # the other threads find their connection closed and open a new one on their next call.
+        for sock in sockets:
+            sock.close()
+
+        self._local.socket = None
+
+    def _disconnect(self):
+        sock = getattr(self._local, "socket", None)
+
+        if sock is not None:
+            with self._lock:
+                self._sockets.discard(sock)
+
+            sock.close()
+            self._local.socket = None
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+
+        with self._lock:
+            self._sockets.add(sock)
+
+        self._local.socket = sock
+        return sock
@@ -0,0 +1,448 @@
+# Copyright 2015 Vinicius Chiele. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Provides backends to store the results of job executions."""
+
+import dateutil.parser
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from collections import OrderedDict
+
+STATUS_SUCCESS = "success"
+STATUS_ERROR = "error"
+
+# size of the chunks results are streamed in.
+CHUNK_SIZE = 64 * 1024
+
+# maximum number of seconds between two sweeps of the expired results stored as files.
+SWEEP_INTERVAL = 60
+
+
+class JobResult(object):
+    """
+    Describes the result of a job execution, the result itself is stored apart.
+
+    :param str job_id: the identifier of the job
+    :param str run_id: the identifier of the job execution
+    :param str status: ``success`` if the job returned, ``error`` if it raised an exception
+    :param datetime scheduled_run_time: the datetime when the job should have been run
+    :param datetime finished_at: the datetime when the job finished
+    :param int size: the size of the serialized result, in bytes
+    :param bool stored: whether the result is stored, results larger than ``max_result_size`` are not
+    """
+
+    __slots__ = ("job_id", "run_id", "status", "scheduled_run_time", "finished_at", "size", "stored")
+
+    def __init__(self, job_id, run_id, status, scheduled_run_time, finished_at, size, stored=True):
+        self.job_id = job_id
+        self.run_id = run_id
+        self.status = status
+        self.scheduled_run_time = scheduled_run_time
+        self.finished_at = finished_at
+        self.size = size
+        self.stored = stored
+
+    def to_dict(self):
+        return OrderedDict([
+            ("job_id", self.job_id),
+            ("run_id", self.run_id),
+            ("status", self.status),
+            ("scheduled_run_time", self.scheduled_run_time.isoformat()),
+            ("finished_at", self.finished_at.isoformat()),
+            ("size", self.size),
+            ("stored", self.stored),
+        ])
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["job_id"], d["run_id"], d["status"], dateutil.parser.parse(d["scheduled_run_time"]),
+                   dateutil.parser.parse(d["finished_at"]), d["size"], d["stored"])
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} (job_id={self.job_id}, run_id={self.run_id}, status={self.status})>"
+
+
+class BaseResultBackend(object):
+    """
+    A base class from which all result backends should inherit.
+
+    Results are the JSON serialized return values of the jobs, or a summary of the exception they raised.
+    They expire ``ttl`` seconds after they are stored, results larger than ``max_result_size`` bytes are
+    described but not stored.
+
+    :param float ttl: number of seconds a result is kept
+    :param int max_result_size: maximum size of a result, in bytes
+    """
+
+    def __init__(self, ttl=3600, max_result_size=1024 * 1024):
+        self.ttl = ttl
+        self.max_result_size = max_result_size
+
+    def start(self):
+        """
+        Called by the scheduler when it starts.
+        """
+
+    def shutdown(self):
+        """
+        Called by the scheduler when it shuts down.
+        """
+
+    def add_result(self, result, data):
+        """
+        Store the result of a job execution.
+
+        :param JobResult result: the description of the result
+        :param bytes data: the serialized result, ``None`` if it is larger than ``max_result_size``
+        """
+        raise NotImplementedError
+
+    def get_result(self, job_id, run_id):
+        """
+        Return the description of the result of a job execution.
+
+        :rtype: JobResult
+        :return: the description or ``None`` if it does not exist or has expired
+        """
+        raise NotImplementedError
+
+    def get_results(self, job_id):
+        """
+        Return the descriptions of the results of a job, the most recent first.
+
+        :rtype: list[JobResult]
+        """
+        raise NotImplementedError
+
+    def open_result(self, job_id, run_id):
+        """
+        Return an iterator over the chunks of a serialized result, so it is never loaded at once.
+
+        :return: the iterator or ``None`` if the result does not exist, has expired or was not stored
+        """
+        raise NotImplementedError
+
+
+class MemoryResultBackend(BaseResultBackend):
+    """
+    Stores results in RAM, the least recently stored ones are evicted first once ``max_results`` or
+    ``max_total_size`` is exceeded.
+
+    :param int max_results: maximum number of results kept
+    :param int max_total_size: maximum size of all the results kept, in bytes
+    """
+
+    def __init__(self, ttl=3600, max_result_size=1024 * 1024, max_results=1000, max_total_size=64 * 1024 * 1024):
+        super(MemoryResultBackend, self).__init__(ttl, max_result_size)
+        self.max_results = max_results
+        self.max_total_size = max_total_size
+
+        self._lock = threading.Lock()
+        self._results = OrderedDict()  # (job id, run id) -> (result, data, expiry time)
+        self._total_size = 0
+
+    def add_result(self, result, data):
+        with self._lock:
+            self._results[(result.job_id, result.run_id)] = (result, data, time.monotonic() + self.ttl)
+            self._total_size += len(data or b"")
+
+            while self._results and (len(self._results) > self.max_results or self._total_size > self.max_total_size):
+                _, data, _ = self._results.popitem(last=False)[1]
+                self._total_size -= len(data or b"")
+
+    def get_result(self, job_id, run_id):
+        entry = self._get_entry(job_id, run_id)
+        return entry[0] if entry else None
+
+    def get_results(self, job_id):
+        now = time.monotonic()
+
+        with self._lock:
+            return [result for result, _, expires_at in reversed(self._results.values())
+                    if result.job_id == job_id and expires_at > now]
+
+    def open_result(self, job_id, run_id):
+        entry = self._get_entry(job_id, run_id)
+
+        if not entry or entry[1] is None:
+            return None
+
+        data = memoryview(entry[1])
+        return (bytes(data[i:i + CHUNK_SIZE]) for i in range(0, len(data), CHUNK_SIZE))
+
+    def _reset_after_fork(self):
+        self._lock = threading.Lock()
+
+    def _get_entry(self, job_id, run_id):
+        with self._lock:
+            entry = self._results.get((job_id, run_id))
+
+            if entry is None:
+                return None
+
+            if entry[2] <= time.monotonic():
+                del self._results[(job_id, run_id)]
+                self._total_size -= len(entry[1] or b"")
+                return None
+
+            return entry
+
+
+class SQLiteResultBackend(BaseResultBackend):
+    """
+    Stores results in a local SQLite database.
+
+    :param str path: path of the database file
+    :param str tablename: name of the table to store results in
+    """
+
+    def __init__(self, path="results.sqlite", tablename="apscheduler_results", ttl=3600,
+                 max_result_size=1024 * 1024):
+        super(SQLiteResultBackend, self).__init__(ttl, max_result_size)
+        self.path = path
+        self.tablename = tablename
+
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(f"CREATE TABLE IF NOT EXISTS {self.tablename} "
+                                     "(job_id TEXT, run_id TEXT, result TEXT NOT NULL, data BLOB, "
+                                     "expires_at REAL NOT NULL, PRIMARY KEY (job_id, run_id))")
+            self._connection.execute(f"CREATE INDEX IF NOT EXISTS ix_{self.tablename}_expires_at "
+                                     f"ON {self.tablename} (expires_at)")
+
+    def shutdown(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def add_result(self, result, data):
+        now = time.time()
+
+        with self._lock:
+            self._connection.execute(f"DELETE FROM {self.tablename} WHERE expires_at <= ?", (now,))
+            self._connection.execute(f"INSERT OR REPLACE INTO {self.tablename} "
+                                     "(job_id, run_id, result, data, expires_at) VALUES (?, ?, ?, ?, ?)",
+                                     (result.job_id, result.run_id, json.dumps(result.to_dict()), data,
+                                      now + self.ttl))
+
+    def get_result(self, job_id, run_id):
+        with self._lock:
+            row = self._connection.execute(f"SELECT result FROM {self.tablename} "
+                                           "WHERE job_id = ? AND run_id = ? AND expires_at > ?",
+                                           (job_id, run_id, time.time())).fetchone()
+
+        return JobResult.from_dict(json.loads(row[0])) if row else None
+
+    def get_results(self, job_id):
+        with self._lock:
+            rows = self._connection.execute(f"SELECT result FROM {self.tablename} "
+                                            "WHERE job_id = ? AND expires_at > ? ORDER BY expires_at DESC",
+                                            (job_id, time.time())).fetchall()
+
+        return [JobResult.from_dict(json.loads(row[0])) for row in rows]
+
+    def open_result(self, job_id, run_id):
+        with self._lock:
+            row = self._connection.execute(f"SELECT length(data) FROM {self.tablename} "
+                                           "WHERE job_id = ? AND run_id = ? AND expires_at > ?",
+                                           (job_id, run_id, time.time())).fetchone()
+
+        if not row or row[0] is None:
+            return None
+
+        return self._read_chunks(job_id, run_id, row[0])
+
+    def _reset_after_fork(self):
+        # SQLite connections must not be used across a fork, the child process opens its own.
+        self._lock = threading.Lock()
+
+        if self._connection is not None:
+            self._connection = None
+            self.start()
+
+    def _read_chunks(self, job_id, run_id, size):
+        # substr() reads a slice of the blob, the result is never loaded at once.
+        for offset in range(0, size, CHUNK_SIZE):
+            with self._lock:
+                row = self._connection.execute(f"SELECT substr(data, ?, ?) FROM {self.tablename} "
+                                               "WHERE job_id = ? AND run_id = ?",
+                                               (offset + 1, CHUNK_SIZE, job_id, run_id)).fetchone()
+
+            if not row or row[0] is None:
+                return
+
+            yield row[0]
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} (path={self.path})>"
+
+
+class FileSystemResultBackend(BaseResultBackend):
+    """
+    Stores results as files in a directory, one directory per job.
+
+    The expired results of all the jobs are removed when a result is added, at most every ``SWEEP_INTERVAL``
+    seconds.
+
+    :param str directory: path of the directory to store results in
+    """
+
+    def __init__(self, directory, ttl=3600, max_result_size=1024 * 1024):
+        super(FileSystemResultBackend, self).__init__(ttl, max_result_size)
+        self.directory = directory
+
+        self._sweep_lock = threading.Lock()
+        self._next_sweep = 0
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+
+    def add_result(self, result, data):
+        self._remove_expired()
+
+        job_directory = self._get_job_directory(result.job_id)
+        os.makedirs(job_directory, exist_ok=True)
+
+        path = os.path.join(job_directory, self._get_file_name(result.run_id))
+
+        if data is not None:
+            self._write_file(path + ".json", data)
+
+        self._write_file(path + ".meta", json.dumps(result.to_dict()).encode("utf-8"))
+
+    def get_result(self, job_id, run_id):
+        path = os.path.join(self._get_job_directory(job_id), self._get_file_name(run_id))
+        return self._read_result(path + ".meta")
+
+    def get_results(self, job_id):
+        job_directory = self._get_job_directory(job_id)
+
+        try:
+            names = os.listdir(job_directory)
+        except FileNotFoundError:
+            return []
+
+        results = []
+
+        for name in names:
+            if name.endswith(".meta"):
+                result = self._read_result(os.path.join(job_directory, name))
+
+                if result is not None:
+                    results.append(result)
+
+        return sorted(results, key=lambda result: result.finished_at, reverse=True)
+
+    def open_result(self, job_id, run_id):
+        path = os.path.join(self._get_job_directory(job_id), self._get_file_name(run_id))
+
+        if self._read_result(path + ".meta") is None:
+            return None
+
+        try:
+            f = open(path + ".json", "rb")
+        except FileNotFoundError:
+            return None
+
+        return self._read_chunks(f)
+
+    def _get_job_directory(self, job_id):
+        return os.path.join(self.directory, hashlib.sha256(job_id.encode("utf-8")).hexdigest()[:32])
+
+    def _get_file_name(self, run_id):
+        return hashlib.sha256(run_id.encode("utf-8")).hexdigest()[:32]
+
+    def _read_result(self, meta_path):
+        try:
+            if os.path.getmtime(meta_path) + self.ttl <= time.time():
+                return None
+
+            with open(meta_path, "rb") as f:
+                return JobResult.from_dict(json.loads(f.read()))
+        except FileNotFoundError:
+            return None
+
+    def _read_chunks(self, f):
+        with f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+
+                if not chunk:
+                    return
+
+                yield chunk
+
+    def _remove_expired(self):
+        now = time.monotonic()
+
+        # a single thread sweeps, the others add their result without waiting for it.
+        if now < self._next_sweep or not self._sweep_lock.acquire(blocking=False):
+            return
+
+        try:
+            self._next_sweep = now + min(self.ttl, SWEEP_INTERVAL)
+            expired_at = time.time() - self.ttl
+
+            for entry in os.scandir(self.directory):
+                if entry.is_dir(follow_symlinks=False):
+                    self._remove_expired_files(entry.path, expired_at)
+        except FileNotFoundError:
+            pass
+        finally:
+            self._sweep_lock.release()
+
+    def _remove_expired_files(self, job_directory, expired_at):
+        try:
+            names = os.listdir(job_directory)
+        except FileNotFoundError:
+            return
+
+        for name in names:
+            path = os.path.join(job_directory, name)
+
+            try:
+                if os.path.getmtime(path) <= expired_at:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+        # a directory just created for a new result is recent, it is left alone.
+        try:
+            if not os.listdir(job_directory) and os.path.getmtime(job_directory) <= expired_at:
+                os.rmdir(job_directory)
+        except OSError:
+            pass
+
+    def _write_file(self, path, data):
+        # the file is written aside and renamed, so readers never see a partial file.
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        with open(temp_path, "wb") as f:
+            f.write(data)
+
+        os.replace(temp_path, path)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} (directory={self.directory})>"
@@ -14,21 +14,92 @@
 
 """APScheduler implementation."""
 
+import contextlib
 import functools
 import logging
+import math
+import os
+import random
+import signal
+import threading
 import socket
+import time
 import werkzeug
 
-from apscheduler.events import EVENT_ALL
+from apscheduler.events import (EVENT_ALL_JOBS_REMOVED, EVENT_JOB_ERROR, EVENT_JOB_EXECUTED, EVENT_JOB_MISSED,
+                                EVENT_JOB_REMOVED, EVENT_JOB_SUBMITTED, EVENT_SCHEDULER_SHUTDOWN, JobExecutionEvent)
+from apscheduler.executors.asyncio import AsyncIOExecutor as BaseAsyncIOExecutor
+from apscheduler.executors.pool import ThreadPoolExecutor as BaseThreadPoolExecutor
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.base import STATE_PAUSED, STATE_RUNNING, STATE_STOPPED
 from apscheduler.jobstores.base import JobLookupError
-from flask import make_response
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.triggers.base import BaseTrigger
+from apscheduler.util import convert_to_datetime
+from collections import OrderedDict
+from datetime import datetime, timezone
+from flask import make_response, request
 from flask.helpers import get_debug_flag
-from . import api
-from .utils import fix_job_def, pop_trigger
+from . import api, forking
+from .auth import AuthenticationCache
+from .cli import scheduler_cli
+from .events import (EVENT_ALL, EVENT_JOB_MEMORY_THRESHOLD, EVENT_JOB_MISFIRE_DECISION, EVENT_JOB_TIMEOUT,
+                     JobMemoryEvent, JobMisfireDecisionEvent, JobTimeoutEvent)
+from .executors import AsyncIOExecutor, RunTrackingMixin, ThreadPoolExecutor, get_max_workers, reset_executor
+from .forking import FORK_MODE_CHILD, FORK_MODE_COORDINATOR, FORK_MODES, ProcessLock
+from .forecast import RunTimeCache, count_run_times, get_upcoming_runs, list_run_times
+from .jobstores.cache import CachingJobStore
+from .jobstores.memory import IndexedMemoryJobStore
+from .json import dumps, jsonify
+from .listeners import OVERFLOW_DROP_OLDEST, AsyncListener
+from .memtrace import MemoryTracer, MemoryUsage
+from .misfire import COALESCE, SKIP, AdaptiveMisfirePolicy
+from .profiler import JobProfile, StackSampler, get_task_frame
+from .ratelimit import RateLimiter
+from .remote import SchedulerClient, SchedulerServer
+from .simulation import Simulation
+from .results import STATUS_ERROR, STATUS_SUCCESS, JobResult, MemoryResultBackend
+from .triggers import SPREAD_TRIGGER_TYPES, SpreadTrigger, get_spread_offset, intern_trigger
+from .utils import fix_job_def, pop_job_options, pop_trigger
+from .watchdog import Watchdog
 
 LOGGER = logging.getLogger("flask_apscheduler")
 
+DRAIN_POLL_INTERVAL = 0.1
+
+# maximum number of seconds the shutdown waits for the asynchronous listeners to deliver their queued events.
+LISTENER_FLUSH_TIMEOUT = 5
+
+# maximum number of seconds a fork waits for the job processing round in progress to end.
+FORK_LOCK_TIMEOUT = 5
+
+# the API endpoints are rate limited per group, the other endpoints fall in the "read" or "write" group.
+API_ENDPOINT_GROUPS = {"run_job": "run"}
+
+JOB_OPTIONS = ("timeout", "profile", "trace_memory", "memory_threshold", "priority", "misfire_policy")
+
+MISFIRE_POLICY_ADAPTIVE = "adaptive"
+
+# number of workers of the default executor APScheduler creates when none is configured.
+DEFAULT_MAX_WORKERS = 10
+
+# maximum number of jobs whose profile or memory usage is kept, the least recently updated ones are forgotten first.
+MAX_TRACKED_JOBS = 1000
+
+
+def _proxied(method):
+    """
+    Decorate a method so it is called in the scheduler process when the scheduler runs in another process.
+    """
+    @functools.wraps(method)
+    def decorated(self, *args, **kwargs):
+        if self._client is not None:
+            return self._client.call(method.__name__, *args, **kwargs)
+
+        return method(self, *args, **kwargs)
+
+    return decorated
+
 
 class APScheduler(object):
     """Provides a scheduler integrated to Flask."""
@@ -37,14 +108,47 @@ class APScheduler(object):
         self._scheduler = scheduler or BackgroundScheduler()
         self._host_name = socket.gethostname().lower()
         self._authentication_callback = None
+        self._job_options = {}
+        self._async_listeners = {}
+        self._listening_wakeups = False
+        self._client = None
+        self._job_option_defaults = {}
+        self._default_spread = None
+        self._rate_limiters = {}
+        self._run_time_cache = RunTimeCache()
+        self._profiles = OrderedDict()
+        self._tracked_jobs_lock = threading.Lock()
+        self._stack_sampler = StackSampler()
+        self._memory_usages = OrderedDict()
+        self._memory_tracer = MemoryTracer()
+        self._watchdog = Watchdog()
+        self._fork_owner_pid = None
+        self._fork_paused = False
+        self._fork_standby = False
+        self._fork_lock = None
+        self._fork_server = None
+        self._jobstores_locked = False
+        self._result_backend_started = False
+        self._skipped_run_times = {}  # id of the run times skipped by the misfire policy -> run times
 
         self.allowed_hosts = ["*"]
         self.auth = None
+        self.auth_cache = None
+        self.result_backend = None
+        self.wakeup_channel = None
+        self.socket_path = None
+        self.fork_mode = None
+        self.fork_lock_file = None
+        self.fork_socket_path = None
         self.api_enabled = False
         self.api_prefix = "/scheduler"
+        self.api_rate_limits = {}
+        self.misfire_policy = AdaptiveMisfirePolicy()
         self.endpoint_prefix = "scheduler."
         self.app = None
 
+        self._scheduler.add_listener(self._handle_job_removed, EVENT_JOB_REMOVED | EVENT_ALL_JOBS_REMOVED)
+
         if app:
             self.init_app(app)
 
@@ -53,14 +157,22 @@ class APScheduler(object):
         """Get the host name."""
         return self._host_name
 
+    @property
+    def remote(self):
+        """Get true whether the scheduler runs in another process, see ``SCHEDULER_SOCKET``."""
+        return self._client is not None
+
     @property
     def running(self):
         """Get true whether the scheduler is running."""
-        return self._scheduler.running
+        return self.state != STATE_STOPPED
 
     @property
     def state(self):
         """Get the state of the scheduler."""
+        if self._client is not None:
+            return self._client.call("state")
+
         return self._scheduler.state
 
     @property
@@ -80,17 +192,29 @@ class APScheduler(object):
         self.app.apscheduler = self
 
         self._load_config()
-        self._load_jobs()
+
+        # the jobs are loaded by the scheduler process.
+        if self._client is None:
+            self._load_jobs()
 
         if self.api_enabled:
             self._load_api()
 
+        self.app.cli.add_command(scheduler_cli)
+
     def start(self, paused=False):
         """
         Start the scheduler.
         :param bool paused: if True, don't start job processing until resume is called.
         """
 
+        # the API reads the results in the processes that don't run the jobs too.
+        self._start_result_backend()
+
+        if self._client is not None:
+            LOGGER.debug(f"The scheduler runs in the process serving {self.socket_path}.")
+            return
+
         # Flask in debug mode spawns a child process so that it can restart the process each time your code changes,
         # the new child process initializes and starts a new APScheduler causing the jobs to run twice.
         if get_debug_flag() and not werkzeug.serving.is_running_from_reloader():
@@ -100,18 +224,155 @@ class APScheduler(object):
             LOGGER.debug(f"Host name {self.host_name} is not allowed to start the APScheduler. Servers allowed: {','.join(self.allowed_hosts)}")
             return
 
+        self._install_executors()
         self._scheduler.start(paused=paused)
 
-    def shutdown(self, wait=True):
+        if not paused:
+            self._listen_wakeups()
+
+    def shutdown(self, wait=True, drain_timeout=None):
         """
         Shut down the scheduler. Does not interrupt any currently running jobs.
 
+        If ``drain_timeout`` is given, job processing is paused right away and the scheduler waits up to
+        ``drain_timeout`` seconds for the running jobs to finish before shutting down without waiting.
+
         :param bool wait: ``True`` to wait until all currently executing jobs have finished
+        :param float drain_timeout: maximum number of seconds to wait for the running jobs to finish
+        :return: the identifiers of the jobs that were still running when the scheduler was shut down
+        :rtype: list[str]
         :raises SchedulerNotRunningError: if the scheduler has not been started yet
+
+        When the scheduler runs in another process, which the other processes use too, only the connection of this
+        process is closed, see :meth:`shutdown_remote`.
+        """
+
+        if self._client is not None:
+            self._client.close()
+            self._shutdown_result_backend()
+            return []
+
+        if drain_timeout is None:
+            running_jobs = [] if wait else self._get_running_jobs()
+            self._scheduler.shutdown(wait)
+        else:
+            deadline = time.monotonic() + float(drain_timeout)
+
+            self._scheduler.pause()
+
+            # waits for a job processing round that is already in progress to submit its jobs.
+            with self._scheduler._jobstores_lock:
+                running_jobs = self._get_running_jobs()
+
+            while running_jobs and time.monotonic() < deadline:
+                time.sleep(min(DRAIN_POLL_INTERVAL, max(deadline - time.monotonic(), 0)))
+                running_jobs = self._get_running_jobs()
+
+            self._scheduler.shutdown(wait=False)
+
+        if self._listening_wakeups:
+            self.wakeup_channel.shutdown()
+            self._listening_wakeups = False
+
+        if self._fork_server is not None:
+            self._fork_server.shutdown()
+            self._fork_server = None
+
+        if wait or drain_timeout is not None:
+            for listener in list(self._async_listeners.values()):
+                listener.flush(LISTENER_FLUSH_TIMEOUT)
+
+        self._shutdown_result_backend()
+
+        if running_jobs:
+            LOGGER.warning(f"Scheduler shut down while jobs were still running: {','.join(running_jobs)}")
+
+        return running_jobs
+
+    def shutdown_remote(self, wait=True, drain_timeout=None):
+        """
+        Shut down the scheduler process this process is connected to, which stops the jobs of every process using it.
+
+        :param bool wait: ``True`` to wait until all currently executing jobs have finished
+        :param float drain_timeout: maximum number of seconds to wait for the running jobs to finish
+        :return: the identifiers of the jobs that were still running when the scheduler was shut down
+        :rtype: list[str]
+        :raises RuntimeError: if the scheduler does not run in another process
         """
+        if self._client is None:
+            raise RuntimeError("The scheduler does not run in another process.")
 
-        self._scheduler.shutdown(wait)
+        running_jobs = self._client.call("shutdown", wait, drain_timeout)
+        self._client.close()
+        return running_jobs
 
+    def shutdown_on_signal(self, signals=(signal.SIGTERM,), drain_timeout=None):
+        """
+        Shut down the scheduler when the process receives one of the given signals.
+
+        The signal handler that was previously installed is called once the scheduler has been shut down.
+        It must be called from the main thread.
+
+        :param signals: the signals to handle
+        :param float drain_timeout: maximum number of seconds to wait for the running jobs to finish
+        """
+        for signum in signals:
+            previous_handler = signal.getsignal(signum)
+            handler = functools.partial(self._handle_shutdown_signal, previous_handler, drain_timeout)
+            signal.signal(signum, handler)
+
+    def serve(self, path=None):
+        """
+        Run the scheduler in this process and serve the processes where ``SCHEDULER_SOCKET`` is set over a Unix
+        socket, until this process receives SIGINT or SIGTERM or a client shuts the scheduler down. It must be called
+        from the main thread.
+
+        :param str path: the path of the socket, defaults to ``SCHEDULER_SOCKET``
+        """
+        path = path or self.socket_path
+
+        if not path:
+            raise ValueError("The path of the socket is not set.")
+
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+            self._load_jobs()
+
+        stopped = threading.Event()
+        server = SchedulerServer(self, path)
+        previous_handlers = {}
+
+        def stop_serving(*args):
+            stopped.set()
+
+        # fails before the scheduler starts if another scheduler process serves the socket.
+        server.check_path()
+
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            previous_handlers[signum] = signal.signal(signum, stop_serving)
+
+        # a client may shut the scheduler down.
+        self._scheduler.add_listener(stop_serving, EVENT_SCHEDULER_SHUTDOWN)
+
+        try:
+            self.start()
+            server.start()
+            LOGGER.info(f"Scheduler serving {path}.")
+
+            while not stopped.wait(1):
+                pass
+        finally:
+            self._scheduler.remove_listener(stop_serving)
+            server.shutdown()
+
+            if self.running:
+                self.shutdown()
+
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+
+    @_proxied
     def pause(self):
         """
         Pause job processing in the scheduler.
@@ -121,13 +382,21 @@ class APScheduler(object):
         """
         self._scheduler.pause()
 
+    @_proxied
     def resume(self):
         """
         Resume job processing in the scheduler.
+
+        :raises RuntimeError: if another forked process runs the jobs, see ``SCHEDULER_FORK_MODE``
         """
+        if self._fork_standby:
+            raise RuntimeError("The jobs are run by another forked process, the scheduler cannot be resumed here.")
+
         self._scheduler.resume()
+        self._listen_wakeups()
 
-    def add_listener(self, callback, mask=EVENT_ALL):
+    def add_listener(self, callback, mask=EVENT_ALL, async_dispatch=False, max_queue_size=10000,
+                     overflow=OVERFLOW_DROP_OLDEST, batch_size=None):
         """
         Add a listener for scheduler events.
 
@@ -135,25 +404,68 @@ class APScheduler(object):
         sole argument. If the ``mask`` parameter is not provided, the callback will receive events
         of all types.
 
+        With ``async_dispatch``, the events are queued and the callback is executed by a dedicated thread,
+        so it does not delay the scheduler.
+
         For further info: https://apscheduler.readthedocs.io/en/latest/userguide.html#scheduler-events
 
         :param callback: any callable that takes one argument
         :param int mask: bitmask that indicates which events should be listened to
+        :param bool async_dispatch: ``True`` to execute the callback off the scheduler thread
+        :param int max_queue_size: maximum number of events queued for an asynchronous listener
+        :param str overflow: what to do with the events when the queue is full, ``drop_newest``, ``drop_oldest``
+            or ``block``
+        :param int batch_size: if given, the asynchronous listener is called with lists of up to ``batch_size``
+            events
+        :return: the :class:`~flask_apscheduler.listeners.AsyncListener` with ``async_dispatch``, ``None``
+            otherwise
         """
-        self._scheduler.add_listener(callback, mask)
+        if not async_dispatch:
+            self._scheduler.add_listener(callback, mask)
+            return None
+
+        listener = AsyncListener(callback, max_queue_size, overflow, batch_size)
+
+        if callback in self._async_listeners:
+            self.remove_listener(callback)
+
+        self._async_listeners[callback] = listener
+        self._scheduler.add_listener(listener, mask)
+
+        return listener
 
     def remove_listener(self, callback):
         """
         Remove a previously added event listener.
         """
-        self._scheduler.remove_listener(callback)
+        listener = self._async_listeners.pop(callback, None)
+
+        if listener is None:
+            self._scheduler.remove_listener(callback)
+        else:
+            self._scheduler.remove_listener(listener)
+            listener.close(LISTENER_FLUSH_TIMEOUT)
 
+    @_proxied
     def add_job(self, id, func, **kwargs):
         """
         Add the given job to the job list and wakes up the scheduler if it's already running.
 
         :param str id: explicit identifier for the job (for modifying it later)
         :param func: callable (or a textual reference to one) to run at the given time
+        :param float timeout: number of seconds a job execution may take before it is cancelled
+        :param float profile: share of the job executions to profile, from ``0`` to ``1``, see
+            :meth:`get_job_profile`
+        :param bool trace_memory: ``True`` to measure the memory allocated by every job execution, see
+            :meth:`get_job_memory_usage`
+        :param int memory_threshold: number of bytes a traced job execution may retain before an
+            ``EVENT_JOB_MEMORY_THRESHOLD`` event is emitted
+        :param int priority: priority of the job executions when they are queued by a
+            :class:`~flask_apscheduler.executors.PriorityThreadPoolExecutor`, the higher the sooner
+        :param str misfire_policy: ``adaptive`` to let :attr:`misfire_policy` decide whether the late executions
+            of the job run, are coalesced or are skipped
+        :param float spread: size of the window, in seconds, over which the runs of jobs sharing the same schedule
+            are spread. Every recurring job is delayed by an offset derived from its id, ``date`` jobs are not.
         """
 
         job_def = dict(kwargs)
@@ -163,8 +475,44 @@ class APScheduler(object):
 
         fix_job_def(job_def)
 
-        return self._scheduler.add_job(**job_def)
+        spread = job_def.pop("spread", self._default_spread)
+        options = pop_job_options(job_def, JOB_OPTIONS)
+        previous_options = self._job_options.get(id)
+
+        jobstore = job_def.get("jobstore", "default")
+
+        if spread:
+            job_def["trigger"] = self._create_trigger(id, job_def, spread, jobstore)
+        else:
+            job_def["trigger"] = self._pop_trigger(job_def, jobstore)
+
+        misfire_policy = options.get("misfire_policy", self._job_option_defaults.get("misfire_policy"))
 
+        # the adaptive policy takes over the misfire grace time and the coalescing of the job, if its executor applies
+        # the policy.
+        if misfire_policy == MISFIRE_POLICY_ADAPTIVE and self._tracks_runs(job_def.get("executor", "default")):
+            job_def.setdefault("misfire_grace_time", None)
+            job_def.setdefault("coalesce", False)
+
+        # a replaced job does not inherit the options of the previous definition.
+        if options:
+            self._job_options[id] = options
+        else:
+            self._job_options.pop(id, None)
+
+        try:
+            job = self._scheduler.add_job(**job_def)
+        except Exception:
+            if previous_options is None:
+                self._job_options.pop(id, None)
+            else:
+                self._job_options[id] = previous_options
+            raise
+
+        self._notify_wakeup()
+        return job
+
+    @_proxied
     def remove_job(self, id, jobstore=None):
         """
         Remove a job, preventing it from being run any more.
@@ -174,7 +522,9 @@ class APScheduler(object):
         """
 
         self._scheduler.remove_job(id, jobstore)
+        self._notify_wakeup()
 
+    @_proxied
     def remove_all_jobs(self, jobstore=None):
         """
         Remove all jobs from the specified job store, or all job stores if none is given.
@@ -183,7 +533,9 @@ class APScheduler(object):
         """
 
         self._scheduler.remove_all_jobs(jobstore)
+        self._notify_wakeup()
 
+    @_proxied
     def get_job(self, id, jobstore=None):
         """
         Return the Job that matches the given ``id``.
@@ -196,6 +548,7 @@ class APScheduler(object):
 
         return self._scheduler.get_job(id, jobstore)
 
+    @_proxied
     def get_jobs(self, jobstore=None):
         """
         Return a list of pending jobs (if the scheduler hasn't been started yet) and scheduled jobs, either from a
@@ -207,53 +560,222 @@ class APScheduler(object):
 
         return self._scheduler.get_jobs(jobstore)
 
+    def get_upcoming_runs(self, end, jobstore=None):
+        """
+        Return an iterator over the upcoming runs of the jobs until a given datetime, as ``(run time, job)`` tuples
+        sorted by run time. The fire times computed for a schedule are cached and shared by the jobs using it.
+
+        It is not available in the processes using a scheduler process, see :meth:`get_calendar`.
+
+        :param datetime end: the datetime until which runs are returned, excluded
+        :param str jobstore: alias of the job store
+        :raises RuntimeError: if the scheduler runs in another process
+        """
+        if self._client is not None:
+            raise RuntimeError("The upcoming runs of a scheduler running in another process are not available, "
+                               "use get_calendar instead.")
+
+        return get_upcoming_runs(self._scheduler.get_jobs(jobstore), end, self._run_time_cache)
+
+    @_proxied
+    def get_calendar(self, start, end, bucket=None, limit=1000, count_due=False, jobstore=None):
+        """
+        Return the upcoming runs of the jobs between two datetimes: the first ``limit`` of them as ``(run time, job
+        id)`` tuples or, with ``bucket``, their number per bucket of ``bucket`` seconds.
+
+        Unlike :meth:`get_upcoming_runs`, it can be called from the processes using a scheduler process, which only
+        sends back the result.
+
+        :param datetime start: the datetime from which runs are returned
+        :param datetime end: the datetime until which runs are returned, excluded
+        :param int bucket: the size of the buckets, in seconds, ``None`` to list the runs
+        :param int limit: the maximum number of runs listed
+        :param bool count_due: ``True`` to count the runs already due in the first bucket
+        :param str jobstore: alias of the job store
+        :return: the runs or the counts per bucket, and ``True`` if runs have been left out
+        :rtype: tuple[list, bool]
+        """
+        if bucket is not None:
+            return count_run_times(self._scheduler.get_jobs(jobstore), start, end, bucket, self._run_time_cache,
+                                   count_due)
+
+        runs, truncated = list_run_times(self._scheduler.get_jobs(jobstore), start, end, limit)
+        return [(run_time, job.id) for run_time, job in runs], truncated
+
+    def simulate(self, start, end, durations=0, executors=None, bucket=60, jobstore=None):
+        """
+        Replay the schedule of the jobs from a datetime until another one on a virtual clock, without running them,
+        to report the misfires, the queueing of the executors and the peak concurrency.
+
+        :param datetime start: the datetime the simulation starts from
+        :param datetime end: the datetime the simulation stops at, excluded
+        :param durations: the number of seconds an execution takes: a number, a callable taking the job and the run
+            time, or a dict of those per job id
+        :param dict executors: the number of workers per executor alias, overriding the configured executors
+        :param int bucket: the size, in seconds, of the time buckets hotspots are reported in
+        :param str jobstore: alias of the job store
+        :rtype: ~flask_apscheduler.simulation.SimulationReport
+        :raises RuntimeError: if the scheduler runs in another process
+        """
+        if self._client is not None:
+            raise RuntimeError("The schedule of a scheduler running in another process cannot be simulated.")
+
+        workers = {alias: get_max_workers(executor) for alias, executor in self._scheduler._executors.items()}
+        workers.setdefault("default", DEFAULT_MAX_WORKERS)
+        workers.update(executors or {})
+
+        # paused jobs do not run.
+        jobs = [job for job in self._scheduler.get_jobs(jobstore) if job.pending or job.next_run_time is not None]
+        start = convert_to_datetime(start, self._scheduler.timezone, "start")
+        end = convert_to_datetime(end, self._scheduler.timezone, "end")
+
+        return Simulation(jobs, workers, durations, bucket, self._scheduler._job_defaults).run(start, end)
+
+    @_proxied
     def modify_job(self, id, jobstore=None, **changes):
         """
         Modify the properties of a single job. Modifications are passed to this method as extra keyword arguments.
 
+        A new trigger reschedules the job, like ``reschedule_job``, unless ``next_run_time`` is given too. A new
+        ``spread`` alone reschedules the job too, but keeps it paused if it is. The trigger and the other changes are
+        written to the job store at once.
+
         :param str id: the identifier of the job
         :param str jobstore: alias of the job store that contains the job
+        :return: the modified job
+        :rtype: Job
         """
 
         fix_job_def(changes)
 
-        if "trigger" in changes:
-            trigger, trigger_args = pop_trigger(changes)
-            self._scheduler.reschedule_job(id, jobstore, trigger, **trigger_args)
+        options = pop_job_options(changes, JOB_OPTIONS)
+
+        if options:
+            self._lookup_job(id, jobstore)
+            self._job_options.setdefault(id, {}).update(options)
+
+        trigger = None
+        paused = False
+
+        if "spread" in changes or "trigger" in changes:
+            job = self._lookup_job(id, jobstore)
+            alias = self._get_jobstore_alias(job, jobstore)
+
+            if "spread" in changes:
+                # unlike a new trigger, a new spread does not resume a paused job.
+                paused = "trigger" not in changes and job.next_run_time is None
+                spread = changes.pop("spread")
+                trigger = self._create_trigger(id, changes, spread, alias, job.trigger)
+            elif isinstance(job.trigger, SpreadTrigger):
+                trigger = self._create_trigger(id, changes, job.trigger.spread, alias)
+            else:
+                trigger = self._pop_trigger(changes, alias)
+
+        if trigger is not None:
+            changes["trigger"] = trigger
+
+            if "next_run_time" not in changes:
+                now = datetime.now(self._scheduler.timezone)
+                changes["next_run_time"] = None if paused else trigger.get_next_fire_time(None, now)
+
+        job = self._scheduler.modify_job(id, jobstore, **changes)
+        self._notify_wakeup()
+        return job
+
+    @_proxied
+    def get_job_options(self, id):
+        """
+        Return the Flask-APScheduler specific options of a job, e.g. ``timeout``, including the ones
+        inherited from ``SCHEDULER_JOB_DEFAULTS``.
+
+        These options are kept in memory, jobs loaded from a persistent job store must be added again to restore them.
+
+        :param str id: the identifier of the job
+        :rtype: dict
+        """
+        options = dict(self._job_option_defaults)
+        options.update(self._job_options.get(id, {}))
+        return options
+
+    @_proxied
+    def get_job_profile(self, id):
+        """
+        Return the stacks sampled during the profiled executions of a job, see the ``profile`` option of
+        :meth:`add_job`. Profiles outlive their job, only the profiles of the last 1000 profiled jobs are kept.
+
+        :param str id: the identifier of the job
+        :return: the profile or ``None`` if no execution of the job has been profiled
+        :rtype: JobProfile
+        """
+        with self._tracked_jobs_lock:
+            return self._profiles.get(id)
+
+    @_proxied
+    def get_job_memory_usage(self, id):
+        """
+        Return the memory usage of the last traced execution of a job, see the ``trace_memory`` option of
+        :meth:`add_job`.
+
+        :param str id: the identifier of the job
+        :return: the memory usage or ``None`` if no execution of the job has been traced
+        :rtype: MemoryUsage
+        """
+        with self._tracked_jobs_lock:
+            return self._memory_usages.get(id)
+
+    @_proxied
+    def get_jobs_memory_usage(self):
+        """
+        Return the memory usage of the last traced execution of every job that has been traced, see
+        :meth:`get_job_memory_usage`.
 
-        return self._scheduler.modify_job(id, jobstore, **changes)
+        :return: the memory usages by job id
+        :rtype: dict[str, MemoryUsage]
+        """
+        with self._tracked_jobs_lock:
+            return dict(self._memory_usages)
 
+    @_proxied
     def pause_job(self, id, jobstore=None):
         """
         Pause the given job until it is explicitly resumed.
 
         :param str id: the identifier of the job
         :param str jobstore: alias of the job store that contains the job
+        :return: the paused job
+        :rtype: Job
         """
-        self._scheduler.pause_job(id, jobstore)
+        job = self._scheduler.pause_job(id, jobstore)
+        self._notify_wakeup()
+        return job
 
+    @_proxied
     def resume_job(self, id, jobstore=None):
         """
         Resume the schedule of the given job, or removes the job if its schedule is finished.
 
         :param str id: the identifier of the job
         :param str jobstore: alias of the job store that contains the job
+        :return: the resumed job, ``None`` if it has been removed
+        :rtype: Job
         """
-        self._scheduler.resume_job(id, jobstore)
+        job = self._scheduler.resume_job(id, jobstore)
+        self._notify_wakeup()
+        return job
 
+    @_proxied
     def run_job(self, id, jobstore=None):
         """
         Run the given job without scheduling it.
         :param id: the identifier of the job.
         :param str jobstore: alias of the job store that contains the job
-        :return:
+        :return: the job that has been run
+        :rtype: Job
         """
-        job = self._scheduler.get_job(id, jobstore)
-
-        if not job:
-            raise JobLookupError(id)
+        job = self._lookup_job(id, jobstore)
 
         job.func(*job.args, **job.kwargs)
+        return job
 
     def authenticate(self, func):
         """
@@ -271,7 +793,7 @@ class APScheduler(object):
 
         job_stores = self.app.config.get("SCHEDULER_JOBSTORES")
         if job_stores:
-            options["jobstores"] = job_stores
+            options["jobstores"] = self._bind_sql_jobstores(job_stores)
 
         executors = self.app.config.get("SCHEDULER_EXECUTORS")
         if executors:
@@ -280,6 +802,8 @@ class APScheduler(object):
         job_defaults = self.app.config.get("SCHEDULER_JOB_DEFAULTS")
         if job_defaults:
             options["job_defaults"] = job_defaults
+            self._job_option_defaults = pop_job_options(dict(job_defaults), JOB_OPTIONS)
+            self._default_spread = job_defaults.get("spread")
 
         timezone = self.app.config.get("SCHEDULER_TIMEZONE")
         if timezone:
@@ -288,12 +812,61 @@ class APScheduler(object):
         self._scheduler.configure(**options)
 
         self.auth = self.app.config.get("SCHEDULER_AUTH", self.auth)
+
+        auth_cache_ttl = self.app.config.get("SCHEDULER_AUTH_CACHE_TTL")
+        if auth_cache_ttl:
+            self.auth_cache = AuthenticationCache(
+                auth_cache_ttl,
+                negative_ttl=self.app.config.get("SCHEDULER_AUTH_CACHE_NEGATIVE_TTL", 0),
+                max_size=self.app.config.get("SCHEDULER_AUTH_CACHE_SIZE", 1024)
+            )
+
         self.api_enabled = self.app.config.get("SCHEDULER_VIEWS_ENABLED", self.api_enabled)  # for compatibility reason
         self.api_enabled = self.app.config.get("SCHEDULER_API_ENABLED", self.api_enabled)
         self.api_prefix = self.app.config.get("SCHEDULER_API_PREFIX", self.api_prefix)
+        self.api_rate_limits = self.app.config.get("SCHEDULER_API_RATE_LIMITS", self.api_rate_limits)
+
+        self.result_backend = self.app.config.get("SCHEDULER_RESULT_BACKEND", self.result_backend)
+        if self.result_backend is True:
+            self.result_backend = MemoryResultBackend()
+        self.wakeup_channel = self.app.config.get("SCHEDULER_WAKEUP_CHANNEL", self.wakeup_channel)
+        self.socket_path = self.app.config.get("SCHEDULER_SOCKET", self.socket_path)
+        self._client = SchedulerClient(self.socket_path) if self.socket_path else None
+
+        self.fork_mode = self.app.config.get("SCHEDULER_FORK_MODE", self.fork_mode)
+        if self.fork_mode is not None:
+            if self.fork_mode not in FORK_MODES:
+                raise ValueError(f"Fork mode {self.fork_mode} is not supported.")
+            forking.register(self)
+        self.fork_lock_file = self.app.config.get("SCHEDULER_FORK_LOCK_FILE", self.fork_lock_file)
+        self.fork_socket_path = self.app.config.get("SCHEDULER_FORK_SOCKET", self.fork_socket_path)
+
         self.endpoint_prefix = self.app.config.get("SCHEDULER_ENDPOINT_PREFIX", self.endpoint_prefix)
         self.allowed_hosts = self.app.config.get("SCHEDULER_ALLOWED_HOSTS", self.allowed_hosts)
 
+    def _bind_sql_jobstores(self, job_stores):
+        """
+        Bind the SQL job stores defined without a URL to the engine of the application, if any.
+        """
+        engine = self.app.config.get("SCHEDULER_SQLALCHEMY_ENGINE")
+
+        if not engine:
+            return job_stores
+
+        # SQLAlchemy is only required when the engine of the application is reused.
+        from .jobstores.sqlalchemy import SQLAlchemyJobStore, get_engine
+
+        engine = get_engine(self.app, engine, self.app.config.get("SCHEDULER_SQLALCHEMY_BIND"))
+        job_stores = dict(job_stores)
+
+        for alias, job_store in job_stores.items():
+            if isinstance(job_store, dict) and job_store.get("type") == "sqlalchemy" and not (
+                    job_store.get("url") or job_store.get("engine")):
+                kwargs = {key: value for key, value in job_store.items() if key != "type"}
+                job_stores[alias] = SQLAlchemyJobStore(engine=engine, **kwargs)
+
+        return job_stores
+
     def _load_jobs(self):
         """
         Load the job definitions from the Flask configuration.
@@ -311,7 +884,11 @@ class APScheduler(object):
         """
         Add the routes for the scheduler API.
         """
+        self._rate_limiters = {group: RateLimiter(**options) for group, options in self.api_rate_limits.items()}
+
         self._add_url_route("get_scheduler_info", "", api.get_scheduler_info, "GET")
+        self._add_url_route("get_run_time_density", "/density", api.get_run_time_density, "GET")
+        self._add_url_route("get_calendar", "/calendar", api.get_calendar, "GET")
         self._add_url_route("pause_scheduler", "/pause", api.pause_scheduler, "POST")
         self._add_url_route("resume_scheduler", "/resume", api.resume_scheduler, "POST")
         self._add_url_route("start_scheduler", "/start", api.start_scheduler, "POST")
@@ -324,6 +901,9 @@ class APScheduler(object):
         self._add_url_route("pause_job", "/jobs/<job_id>/pause", api.pause_job, "POST")
         self._add_url_route("resume_job", "/jobs/<job_id>/resume", api.resume_job, "POST")
         self._add_url_route("run_job", "/jobs/<job_id>/run", api.run_job, "POST")
+        self._add_url_route("get_job_runs", "/jobs/<job_id>/runs", api.get_job_runs, "GET")
+        self._add_url_route("get_job_profile", "/jobs/<job_id>/profile", api.get_job_profile, "GET")
+        self._add_url_route("get_job_run_result", "/jobs/<job_id>/runs/<run_id>/result", api.get_job_run_result, "GET")
 
     def _add_url_route(self, endpoint, rule, view_func, method):
         """
@@ -339,10 +919,12 @@ class APScheduler(object):
         if self.endpoint_prefix:
             endpoint = self.endpoint_prefix + endpoint
 
+        group = API_ENDPOINT_GROUPS.get(view_func.__name__, "read" if method == "GET" else "write")
+
         self.app.add_url_rule(
             rule,
             endpoint,
-            self._apply_auth(view_func),
+            self._apply_rate_limit(self._apply_auth(view_func), group),
             methods=[method]
         )
 
@@ -353,21 +935,565 @@ class APScheduler(object):
         """
         @functools.wraps(view_func)
         def decorated(*args, **kwargs):
-            if not self.auth:
-                return view_func(*args, **kwargs)
+            if self.auth and not self._is_authenticated():
+                return self._handle_authentication_error()
 
-            auth_data = self.auth.get_authorization()
+            return view_func(*args, **kwargs)
 
-            if auth_data is None:
-                return self._handle_authentication_error()
+        return decorated
 
-            if not self._authentication_callback or not self._authentication_callback(auth_data):
-                return self._handle_authentication_error()
+    def _apply_rate_limit(self, view_func, group):
+        """
+        Apply decorator to limit the requests of the user who is making the request.
+        :param view_func: The flask view func.
+        :param str group: The endpoint group whose limits apply.
+        """
+        @functools.wraps(view_func)
+        def decorated(*args, **kwargs):
+            limiter = self._rate_limiters.get(group)
 
-            return view_func(*args, **kwargs)
+            if not limiter:
+                return view_func(*args, **kwargs)
+
+            # the requests failing authentication are limited too, by address, so credentials cannot be guessed
+            # faster than the rate. authentication classes written before rate limits were added cannot tell the
+            # users apart.
+            get_username = getattr(self.auth, "get_username", None)
+            username = get_username() if get_username and self._is_authenticated() else None
+            client = f"user:{username}" if username else f"addr:{request.remote_addr}"
+            retry_after = limiter.acquire(client)
+
+            if retry_after is not None:
+                response = jsonify(dict(error_message="Too many requests."), status=429)
+                response.headers["Retry-After"] = str(math.ceil(retry_after))
+                return response
+
+            try:
+                return view_func(*args, **kwargs)
+            finally:
+                limiter.release(client)
 
         return decorated
 
+    def _listen_wakeups(self):
+        """
+        Wake up the scheduler when another process notifies the wakeup channel.
+        """
+        if self.wakeup_channel and not self._listening_wakeups and self._scheduler.state == STATE_RUNNING:
+            self.wakeup_channel.start(self._handle_wakeup)
+            self._listening_wakeups = True
+
+    def _handle_wakeup(self):
+        """
+        Wake up the scheduler to process the jobs changed by another process, once the cached job stores have
+        reloaded them.
+        """
+        for store in self._get_caching_jobstores():
+            try:
+                store.refresh()
+            except Exception:
+                LOGGER.exception("Error refreshing the job store cache")
+
+        self._scheduler.wakeup()
+
+    def _notify_wakeup(self):
+        """
+        Notify the process running the scheduler that a job has been changed, unless it is this one.
+        """
+        if self.wakeup_channel and self._scheduler.state != STATE_RUNNING:
+            try:
+                # the process running the scheduler reads the jobs from the job stores the caches write behind to.
+                for store in self._get_caching_jobstores():
+                    store.flush()
+
+                self.wakeup_channel.notify()
+            except Exception:
+                LOGGER.exception("Error notifying the wakeup channel")
+
+    def _get_caching_jobstores(self):
+        return [store for store in list(self._scheduler._jobstores.values()) if isinstance(store, CachingJobStore)]
+
+    def _before_fork(self):
+        """
+        Prepare the scheduler running in this process for a fork.
+
+        On the first fork, the ``child`` fork mode pauses the scheduler for good so a forked process can take it over
+        and the ``coordinator`` fork mode starts serving the forked processes.
+        """
+        if self._client is not None or self._scheduler.state == STATE_STOPPED:
+            return
+
+        if self._fork_owner_pid is None and self.fork_mode in (FORK_MODE_CHILD, FORK_MODE_COORDINATOR):
+            self._fork_owner_pid = os.getpid()
+
+            if self.fork_mode == FORK_MODE_CHILD:
+                self.fork_lock_file = self.fork_lock_file or forking.get_default_path("lock")
+                self._fork_paused = self._scheduler.state == STATE_PAUSED
+                LOGGER.info("Pausing the scheduler, a forked process takes it over.")
+
+                # shutting the scheduler down would clear the memory job stores the forked processes inherit.
+                self._scheduler.pause()
+
+                if self._listening_wakeups:
+                    self.wakeup_channel.shutdown()
+                    self._listening_wakeups = False
+            else:
+                self.fork_socket_path = self.fork_socket_path or forking.get_default_path("sock")
+                self._fork_server = SchedulerServer(self, self.fork_socket_path)
+                self._fork_server.start()
+
+        # the forked process must not copy the job stores in the middle of a job processing round.
+        self._jobstores_locked = self._scheduler._jobstores_lock.acquire(timeout=FORK_LOCK_TIMEOUT)
+
+    def _after_fork_in_parent(self):
+        if self._jobstores_locked:
+            self._jobstores_locked = False
+            self._scheduler._jobstores_lock.release()
+
+    def _after_fork_in_child(self):
+        """
+        Reset the scheduler inherited from the parent process, then take the scheduler over or connect to the
+        parent process, depending on the fork mode.
+        """
+        self._jobstores_locked = False
+        self._reset_after_fork()
+
+        # only the processes forked by the process which started the scheduler take part.
+        if self._fork_owner_pid is None or os.getppid() != self._fork_owner_pid:
+            return
+
+        if self.fork_mode == FORK_MODE_CHILD:
+            self._fork_lock = self._fork_lock or ProcessLock(self.fork_lock_file)
+
+            if self._fork_lock.acquire():
+                LOGGER.info(f"Scheduler taken over by process {os.getpid()}.")
+                self.start(paused=self._fork_paused)
+            else:
+                # the jobs changed in this process are written to the job stores but run by the other process.
+                self._fork_standby = True
+                self.start(paused=True)
+        elif self.fork_mode == FORK_MODE_COORDINATOR:
+            self._client = SchedulerClient(self.fork_socket_path)
+
+    def _reset_after_fork(self):
+        """
+        Reset the state inherited from the parent process: its threads do not exist in this process and the locks
+        they held would never be released.
+        """
+        scheduler = self._scheduler
+        scheduler._jobstores_lock = scheduler._create_lock()
+        scheduler._executors_lock = scheduler._create_lock()
+        scheduler._listeners_lock = scheduler._create_lock()
+        scheduler.state = STATE_STOPPED
+
+        if isinstance(scheduler, BackgroundScheduler):
+            scheduler._event = threading.Event()
+
+        for executor in scheduler._executors.values():
+            reset_executor(executor)
+
+        stateful = list(scheduler._jobstores.values()) + list(self._async_listeners.values()) + list(
+            self._profiles.values()) + [self._stack_sampler, self._memory_tracer, self._watchdog, self.misfire_policy,
+                                        self.result_backend, self._fork_lock]
+
+        for obj in stateful:
+            if hasattr(obj, "_reset_after_fork"):
+                obj._reset_after_fork()
+
+        self._tracked_jobs_lock = threading.Lock()
+        self._listening_wakeups = False
+        self._fork_server = None
+
+        # the connection of the parent process must not be shared.
+        if self._client is not None:
+            self._client = SchedulerClient(self._client.path, self._client.timeout)
+
+    def _lookup_job(self, id, jobstore=None):
+        """
+        Return the job that matches the given ``id``.
+
+        :raises JobLookupError: if the job does not exist
+        """
+        job = self._scheduler.get_job(id, jobstore)
+
+        if not job:
+            raise JobLookupError(id)
+
+        return job
+
+    def _get_jobstore_alias(self, job, jobstore=None):
+        """
+        Return the alias of the job store that contains a job. The jobs pending until the scheduler starts have none,
+        they are assumed to be in the default job store.
+        """
+        return jobstore or getattr(job, "_jobstore_alias", None) or "default"
+
+    def _share_trigger(self, trigger, jobstore):
+        """
+        Return the trigger shared with the jobs which have the same schedule, if the job store keeps its jobs in
+        memory. The persistent job stores load a trigger per job anyway.
+        """
+        store = self._scheduler._jobstores.get(jobstore)
+
+        # the default job store created when the scheduler starts keeps its jobs in memory.
+        if (store is None and jobstore == "default") or isinstance(store, (MemoryJobStore, IndexedMemoryJobStore)):
+            return intern_trigger(trigger)
+
+        return trigger
+
+    def _pop_trigger(self, job_def, jobstore, default_trigger=None):
+        """
+        Pop the trigger and its arguments from a job definition and return the trigger, shared with the jobs of the
+        same job store which have the same schedule if it keeps its jobs in memory.
+
+        :param dict job_def: the job definition
+        :param str jobstore: alias of the job store the job is written to
+        :param BaseTrigger default_trigger: the trigger to use if the job definition does not have one
+        """
+        if "trigger" not in job_def and default_trigger is not None:
+            trigger = default_trigger
+        elif isinstance(job_def.get("trigger"), BaseTrigger):
+            trigger = job_def.pop("trigger")
+        else:
+            # like APScheduler, a job without trigger runs once, right away or at its run_date.
+            job_def["trigger"] = job_def.get("trigger") or "date"
+            trigger = self._scheduler._create_trigger(*pop_trigger(job_def))
+
+        return self._share_trigger(trigger, jobstore)
+
+    def _create_trigger(self, id, job_def, spread, jobstore, default_trigger=None):
+        """
+        Pop the trigger from a job definition and delay it by the job's offset within the spread window.
+
+        Only the recurring triggers (cron, interval and calendarinterval) are delayed.
+
+        :param str id: the identifier of the job
+        :param dict job_def: the job definition
+        :param float spread: the size of the spread window, in seconds. ``None`` or ``0`` removes the delay.
+        :param str jobstore: alias of the job store the job is written to
+        :param BaseTrigger default_trigger: the trigger to use if the job definition does not have one
+        """
+        trigger = self._pop_trigger(job_def, jobstore, default_trigger)
+
+        if isinstance(trigger, SpreadTrigger):
+            trigger = self._share_trigger(trigger.trigger, jobstore)
+
+        if spread and isinstance(trigger, SPREAD_TRIGGER_TYPES):
+            trigger = SpreadTrigger(trigger, spread, get_spread_offset(id, spread))
+
+        return trigger
+
+    def _handle_job_removed(self, event):
+        """
+        Forget the options of the jobs that have been removed.
+        """
+        if event.code == EVENT_JOB_REMOVED:
+            self._job_options.pop(event.job_id, None)
+            self.misfire_policy.forget(event.job_id)
+        else:
+            job_ids = set(job.id for job in self._scheduler.get_jobs())
+
+            for job_id in list(self._job_options):
+                if job_id not in job_ids:
+                    del self._job_options[job_id]
+                    self.misfire_policy.forget(job_id)
+
+    def _start_result_backend(self):
+        if self.result_backend and not self._result_backend_started:
+            self.result_backend.start()
+            self._result_backend_started = True
+
+    def _shutdown_result_backend(self):
+        if self._result_backend_started:
+            self.result_backend.shutdown()
+            self._result_backend_started = False
+
+    def _install_executors(self):
+        """
+        Replace the default executor by one that tracks job executions and bind the executors to this instance.
+        """
+        executors = self._scheduler._executors
+
+        if "default" not in executors:
+            executor = self._scheduler._create_default_executor()
+
+            if type(executor) is BaseThreadPoolExecutor:
+                executor = ThreadPoolExecutor()
+            elif type(executor) is BaseAsyncIOExecutor:
+                executor = AsyncIOExecutor()
+
+            self._scheduler.add_executor(executor, "default")
+
+        # the base scheduler reports the run times it passes to the executors as submitted, even the skipped ones.
+        self._scheduler._dispatch_event = self._dispatch_event
+
+        for executor in executors.values():
+            if isinstance(executor, RunTrackingMixin):
+                executor.run_context = self._run_context
+                executor.run_finished = self._run_finished
+                executor.run_priority = self._run_priority
+                executor.misfire_handler = self._handle_misfire
+
+        default_executor = executors["default"]
+
+        if not isinstance(default_executor, RunTrackingMixin):
+            options = set(self._job_option_defaults)
+
+            for job_options in self._job_options.values():
+                options.update(job_options)
+
+            ignored = [option for option in JOB_OPTIONS if option in options]
+
+            if self.result_backend:
+                ignored.append("result backend")
+
+            if ignored:
+                LOGGER.warning(f"The default executor {default_executor.__class__.__name__} does not track the job "
+                               f"executions, the following settings are ignored for its jobs: {', '.join(ignored)}. "
+                               "Use an executor of flask_apscheduler.executors instead.")
+
+    def _tracks_runs(self, executor_alias):
+        """
+        Return true whether the executor with the given alias tracks the job executions.
+        """
+        executor = self._scheduler._executors.get(executor_alias)
+
+        if executor is None:
+            # the default executor installed when the scheduler starts tracks them.
+            return executor_alias == "default"
+
+        return isinstance(executor, RunTrackingMixin)
+
+    def _run_context(self, run):
+        """
+        Return the context manager that wraps a job execution.
+
+        It is called when the job is submitted, before it may be removed from its job store.
+        """
+        return self._job_run(run, self.get_job_options(run.job.id))
+
+    def _run_priority(self, job):
+        """
+        Return the priority of a job execution.
+        """
+        return self.get_job_options(job.id).get("priority", 0)
+
+    def _handle_misfire(self, executor, job, run_times):
+        """
+        Return the run times of a job to execute, as decided by the adaptive misfire policy.
+        """
+        if self.get_job_options(job.id).get("misfire_policy") != MISFIRE_POLICY_ADAPTIVE:
+            return run_times
+
+        now = datetime.now(self._scheduler.timezone)
+        decision = self.misfire_policy.decide(job.id, run_times, now, executor.get_load())
+
+        if decision is None:
+            return run_times
+
+        decision, reason = decision
+        event = JobMisfireDecisionEvent(EVENT_JOB_MISFIRE_DECISION, job.id, job._jobstore_alias, run_times, decision,
+                                        reason)
+        self._scheduler._dispatch_event(event)
+
+        if decision == SKIP:
+            self._skipped_run_times[id(run_times)] = run_times
+
+            for run_time in run_times:
+                self._scheduler._dispatch_event(JobExecutionEvent(EVENT_JOB_MISSED, job.id, job._jobstore_alias,
+                                                                  run_time))
+            return []
+
+        if decision == COALESCE:
+            return run_times[-1:]
+
+        return run_times
+
+    def _dispatch_event(self, event):
+        """
+        Dispatch an event of the base scheduler to its listeners, except the submission of the run times skipped by
+        the misfire policy, which have been reported as missed.
+        """
+        if event.code == EVENT_JOB_SUBMITTED:
+            run_times = self._skipped_run_times.pop(id(event.scheduled_run_times), None)
+
+            if run_times is event.scheduled_run_times:
+                return
+
+        type(self._scheduler)._dispatch_event(self._scheduler, event)
+
+    def _run_finished(self, run, events):
+        """
+        Store the results of a job execution in the result backend.
+        """
+        if not self.result_backend:
+            return
+
+        events = [event for event in events if event.code in (EVENT_JOB_EXECUTED, EVENT_JOB_ERROR)]
+        finished_at = datetime.now(timezone.utc)
+
+        for i, event in enumerate(events):
+            # a job executed for several run times at once has one result per run time.
+            run_id = run.id if len(events) == 1 else f"{run.id}-{i}"
+
+            if event.code == EVENT_JOB_EXECUTED:
+                status = STATUS_SUCCESS
+                data = dumps(event.retval)
+            else:
+                status = STATUS_ERROR
+                data = dumps(dict(exception=repr(event.exception), traceback=event.traceback))
+
+            stored = len(data) <= self.result_backend.max_result_size
+            result = JobResult(run.job.id, run_id, status, event.scheduled_run_time, finished_at, len(data), stored)
+            self.result_backend.add_result(result, data if stored else None)
+
+    @contextlib.contextmanager
+    def _job_run(self, run, options):
+        timeout = options.get("timeout")
+        profile_rate = options.get("profile")
+        handle = None
+        profiled = False
+
+        if timeout:
+            handle = self._watchdog.watch(timeout, functools.partial(self._expire_run, run, timeout))
+
+        # the context is entered by the thread executing the job.
+        if profile_rate and random.random() < profile_rate:
+            profiled = True
+            self._stack_sampler.add(run.id, threading.get_ident(), self._get_or_create_profile(run.job.id),
+                                    get_task_frame())
+
+        memory_state = self._memory_tracer.begin() if options.get("trace_memory") else None
+        started_at = time.monotonic()
+
+        try:
+            yield
+        finally:
+            if options.get("misfire_policy") == MISFIRE_POLICY_ADAPTIVE:
+                # a job executed for several run times at once runs once per run time.
+                duration = (time.monotonic() - started_at) / max(len(run.run_times), 1)
+                self.misfire_policy.record_duration(run.job.id, duration)
+
+            if handle is not None:
+                self._watchdog.cancel(handle)
+
+            if profiled:
+                self._stack_sampler.remove(run.id)
+
+            if memory_state is not None:
+                self._record_memory_usage(run, options, self._memory_tracer.end(memory_state))
+
+    def _get_or_create_profile(self, job_id):
+        with self._tracked_jobs_lock:
+            profile = self._profiles.get(job_id)
+
+            if profile is None:
+                profile = self._profiles[job_id] = JobProfile()
+
+                if len(self._profiles) > MAX_TRACKED_JOBS:
+                    self._profiles.popitem(last=False)
+            else:
+                self._profiles.move_to_end(job_id)
+
+        profile.add_run()
+        return profile
+
+    def _expire_run(self, run, timeout):
+        """
+        Cancel a job execution that has exceeded its timeout and free its instance slot.
+        """
+        LOGGER.warning(f"Job {run.job.id} has exceeded its timeout of {timeout} seconds.")
+
+        run.cancel()
+        run.release()
+
+        event = JobTimeoutEvent(EVENT_JOB_TIMEOUT, run.job.id, run.job._jobstore_alias, run.run_times, timeout)
+        self._scheduler._dispatch_event(event)
+
+    def _record_memory_usage(self, run, options, measures):
+        """
+        Keep the memory usage of a job execution and emit an event if it has retained more than its threshold.
+        """
+        memory_usage = MemoryUsage(run.job.id, run.id, *measures)
+
+        with self._tracked_jobs_lock:
+            self._memory_usages[run.job.id] = memory_usage
+            self._memory_usages.move_to_end(run.job.id)
+
+            if len(self._memory_usages) > MAX_TRACKED_JOBS:
+                self._memory_usages.popitem(last=False)
+
+        threshold = options.get("memory_threshold")
+
+        if threshold is not None and memory_usage.retained > threshold:
+            LOGGER.warning(f"Job {run.job.id} has retained {memory_usage.retained} bytes, "
+                           f"more than its threshold of {threshold} bytes.")
+
+            event = JobMemoryEvent(EVENT_JOB_MEMORY_THRESHOLD, run.job.id, run.job._jobstore_alias, run.run_times,
+                                   memory_usage, threshold)
+            self._scheduler._dispatch_event(event)
+
+    def _get_running_jobs(self):
+        """
+        Return the identifiers of the jobs that are currently being executed.
+        """
+        running_jobs = []
+
+        for executor in list(self._scheduler._executors.values()):
+            for job_id, instances in list(executor._instances.items()):
+                if instances > 0:
+                    running_jobs.append(job_id)
+
+        return running_jobs
+
+    def _handle_shutdown_signal(self, previous_handler, drain_timeout, signum, frame):
+        """
+        Shut down the scheduler and hand the signal over to the previous handler.
+        """
+        # only closes the connection when the scheduler runs in another process.
+        if self._client is not None or self._scheduler.running:
+            self.shutdown(drain_timeout=drain_timeout)
+
+        if callable(previous_handler):
+            previous_handler(signum, frame)
+        elif previous_handler == signal.SIG_DFL:
+            signal.signal(signum, signal.SIG_DFL)
+            os.kill(os.getpid(), signum)
+
+    def _is_authenticated(self):
+        """
+        Authenticate the user who is making the request, once per request.
+        """
+        authenticated = request.environ.get("flask_apscheduler.authenticated")
+
+        if authenticated is not None:
+            return authenticated
+
+        header = request.environ.get("HTTP_AUTHORIZATION")
+        # only the authentication classes declaring it are cacheable, like the ones written before caching was added.
+        cacheable = self.auth_cache and header and getattr(self.auth, "cacheable", False)
+        authenticated = self.auth_cache.get(header) if cacheable else None
+
+        if authenticated is None:
+            authenticated = self._authenticate()
+
+            if cacheable:
+                self.auth_cache.set(header, authenticated)
+
+        request.environ["flask_apscheduler.authenticated"] = authenticated
+        return authenticated
+
+    def _authenticate(self):
+        """
+        Authenticate the user who is making the request.
+        """
+        auth_data = self.auth.get_authorization()
+
+        if auth_data is None:
+            return False
+
+        return bool(self._authentication_callback and self._authentication_callback(auth_data))
+
     def _handle_authentication_error(self):
         """
         Return an authentication error.
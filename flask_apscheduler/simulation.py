@@ -0,0 +1,266 @@
+# Copyright 2015 Vinicius Chiele. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Replays the schedule of jobs on a virtual clock."""
+
+import heapq
+import itertools
+
+from collections import Counter, OrderedDict, deque
+from datetime import timedelta
+
+# executions finishing at a given time free their worker before the ones fired at the same time are dispatched.
+_FINISH = 0
+_FIRE = 1
+
+
+class ExecutorStats(object):
+    """
+    Holds the statistics of an executor over a simulation.
+
+    :param int max_workers: the number of workers of the executor, ``None`` if it is not bounded
+
+    ``peak_queue`` is the largest number of executions waiting for a worker at a time, including the ones due at
+    that time.
+    """
+
+    __slots__ = ("max_workers", "runs", "peak_concurrency", "peak_queue", "total_wait", "max_wait")
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self.runs = 0
+        self.peak_concurrency = 0
+        self.peak_queue = 0
+        self.total_wait = timedelta(0)
+        self.max_wait = timedelta(0)
+
+    def to_dict(self):
+        return OrderedDict([
+            ("max_workers", self.max_workers),
+            ("runs", self.runs),
+            ("peak_concurrency", self.peak_concurrency),
+            ("peak_queue", self.peak_queue),
+            ("mean_wait", self.total_wait.total_seconds() / self.runs if self.runs else 0),
+            ("max_wait", self.max_wait.total_seconds()),
+        ])
+
+
+class JobStats(object):
+    """
+    Holds the statistics of a job over a simulation.
+    """
+
+    __slots__ = ("runs", "misfires", "skipped", "max_wait")
+
+    def __init__(self):
+        self.runs = 0
+        self.misfires = 0
+        self.skipped = 0
+        self.max_wait = timedelta(0)
+
+    def to_dict(self):
+        return OrderedDict([
+            ("runs", self.runs),
+            ("misfires", self.misfires),
+            ("skipped", self.skipped),
+            ("max_wait", self.max_wait.total_seconds()),
+        ])
+
+
+class SimulationReport(object):
+    """
+    Holds the outcome of a simulation.
+
+    :ivar int runs: the number of executions that ran
+    :ivar int misfires: the number of executions that started later than the misfire grace time of their job
+    :ivar int skipped: the number of executions skipped because their job had reached its maximum instances
+    :ivar int peak_concurrency: the maximum number of executions running at the same time, all executors together
+    :ivar dict executors: the :class:`ExecutorStats` per executor alias
+    :ivar dict jobs: the :class:`JobStats` per job id
+    """
+
+    def __init__(self, start, end, bucket):
+        self.start = start
+        self.end = end
+        self.bucket = bucket
+        self.runs = 0
+        self.misfires = 0
+        self.skipped = 0
+        self.peak_concurrency = 0
+        self.executors = OrderedDict()
+        self.jobs = {}
+
+        self._fires = Counter()  # bucket index -> number of fired executions
+
+    def get_hotspots(self, count=10):
+        """
+        Return the time buckets where the most executions fired, as ``(bucket start, number of executions)``
+        tuples, the busiest first.
+        """
+        return [(self.start + timedelta(seconds=index * self.bucket), fires)
+                for index, fires in self._fires.most_common(count)]
+
+    def to_dict(self):
+        return OrderedDict([
+            ("start", self.start),
+            ("end", self.end),
+            ("runs", self.runs),
+            ("misfires", self.misfires),
+            ("skipped", self.skipped),
+            ("peak_concurrency", self.peak_concurrency),
+            ("executors", OrderedDict((alias, stats.to_dict()) for alias, stats in self.executors.items())),
+            ("hotspots", [OrderedDict([("start", start), ("fires", fires)]) for start, fires in self.get_hotspots()]),
+            ("jobs", OrderedDict((job_id, stats.to_dict()) for job_id, stats in sorted(self.jobs.items()))),
+        ])
+
+    def _add_fire(self, run_time):
+        self._fires[int((run_time - self.start).total_seconds() // self.bucket)] += 1
+
+
+class Simulation(object):
+    """
+    Replays the schedule of jobs over a time range on a virtual clock, as fast as the CPU allows.
+
+    Jobs are not executed, every execution occupies a worker of its executor for the time given by ``durations``.
+    Like with the real executors, executions are queued while all the workers are busy, skipped while their job has
+    ``max_instances`` executions submitted and misfire when they start more than ``misfire_grace_time`` seconds
+    after their run time. The scheduler itself is assumed to never be late.
+
+    :param list[Job] jobs: the jobs to replay
+    :param dict executors: the number of workers per executor alias, ``None`` for an unbounded executor
+    :param durations: the number of seconds an execution takes: a number, a callable taking the job and the run
+        time, or a dict of those per job id, the executions of the other jobs taking no time
+    :param int bucket: the size, in seconds, of the time buckets the fired executions are counted in
+    :param dict job_defaults: the ``misfire_grace_time`` and ``max_instances`` of the pending jobs which do not
+        define them
+    """
+
+    def __init__(self, jobs, executors, durations=0, bucket=60, job_defaults=None):
+        self.jobs = jobs
+        self.executors = executors
+        self.durations = durations
+        self.bucket = bucket
+        self.job_defaults = job_defaults or {}
+
+    def run(self, start, end):
+        """
+        Replay the schedule from a datetime until another one, excluded.
+
+        :rtype: SimulationReport
+        """
+        report = SimulationReport(start, end, self.bucket)
+        counter = itertools.count()
+        events = []
+        queues = {}
+        busy = {}
+        instances = {}
+
+        for alias, max_workers in self.executors.items():
+            report.executors[alias] = ExecutorStats(max_workers)
+
+        for job in self.jobs:
+            report.jobs[job.id] = JobStats()
+            run_time = job.trigger.get_next_fire_time(None, start)
+
+            if run_time is not None and run_time < end:
+                heapq.heappush(events, (run_time, _FIRE, next(counter), job))
+
+        def dispatch(alias, now):
+            queue = queues.get(alias)
+            stats = report.executors[alias]
+
+            while queue and (stats.max_workers is None or busy[alias] < stats.max_workers):
+                job, run_time = queue.popleft()
+                job_stats = report.jobs[job.id]
+                wait = now - run_time
+
+                misfire_grace_time = self._get_option(job, "misfire_grace_time")
+
+                if misfire_grace_time is not None and wait > timedelta(seconds=misfire_grace_time):
+                    report.misfires += 1
+                    job_stats.misfires += 1
+                    instances[job.id] -= 1
+                    continue
+
+                busy[alias] += 1
+                report.runs += 1
+                stats.runs += 1
+                stats.peak_concurrency = max(stats.peak_concurrency, busy[alias])
+                stats.total_wait += wait
+                stats.max_wait = max(stats.max_wait, wait)
+                job_stats.runs += 1
+                job_stats.max_wait = max(job_stats.max_wait, wait)
+                report.peak_concurrency = max(report.peak_concurrency, sum(busy.values()))
+
+                finished_at = now + timedelta(seconds=self._get_duration(job, run_time))
+                heapq.heappush(events, (finished_at, _FINISH, next(counter), job))
+
+        while events:
+            now = events[0][0]
+            touched = []
+
+            # the events of a tick are all applied before dispatching, so a burst of due runs is fully queued.
+            while events and events[0][0] == now:
+                _, kind, _, job = heapq.heappop(events)
+                alias = job.executor
+
+                if alias not in report.executors:
+                    report.executors[alias] = ExecutorStats(None)
+
+                if alias not in touched:
+                    touched.append(alias)
+
+                queue = queues.setdefault(alias, deque())
+                busy.setdefault(alias, 0)
+
+                if kind == _FINISH:
+                    busy[alias] -= 1
+                    instances[job.id] -= 1
+                    continue
+
+                report._add_fire(now)
+                next_run_time = job.trigger.get_next_fire_time(now, now)
+
+                if next_run_time is not None and next_run_time < end:
+                    heapq.heappush(events, (next_run_time, _FIRE, next(counter), job))
+
+                if instances.get(job.id, 0) >= self._get_option(job, "max_instances"):
+                    report.skipped += 1
+                    report.jobs[job.id].skipped += 1
+                    continue
+
+                instances[job.id] = instances.get(job.id, 0) + 1
+                queue.append((job, now))
+
+            for alias in touched:
+                stats = report.executors[alias]
+                stats.peak_queue = max(stats.peak_queue, len(queues[alias]))
+                dispatch(alias, now)
+
+        return report
+
+    def _get_option(self, job, name):
+        # the scheduler only applies its job defaults to the pending jobs when it starts.
+        return getattr(job, name) if hasattr(job, name) else self.job_defaults.get(name)
+
+    def _get_duration(self, job, run_time):
+        duration = self.durations
+
+        if isinstance(duration, dict):
+            duration = duration.get(job.id, 0)
+
+        if callable(duration):
+            duration = duration(job, run_time)
+
+        return duration
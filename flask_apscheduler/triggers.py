@@ -0,0 +1,180 @@
+# Copyright 2015 Vinicius Chiele. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Triggers specific to Flask-APScheduler."""
+
+import hashlib
+import pickle
+import threading
+import weakref
+
+from apscheduler.triggers.base import BaseTrigger
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from datetime import timedelta
+
+try:
+    from apscheduler.triggers.calendarinterval import CalendarIntervalTrigger
+except ImportError:  # APScheduler < 3.11
+    CalendarIntervalTrigger = None
+
+# the triggers whose next fire time is expensive enough to be shared between the jobs with the same schedule.
+INTERNED_TRIGGER_TYPES = (CronTrigger, IntervalTrigger)
+
+# the recurring triggers a spread applies to, a one-off run is not delayed.
+SPREAD_TRIGGER_TYPES = (CronTrigger, IntervalTrigger) + ((CalendarIntervalTrigger,) if CalendarIntervalTrigger else ())
+
+_interned_triggers = weakref.WeakValueDictionary()  # serialized trigger -> shared trigger
+_interned_lock = threading.Lock()
+_shared_classes = {}  # trigger class -> shared trigger class
+
+
+def get_spread_offset(job_id, spread):
+    """
+    Return the offset of a job within a spread window.
+
+    The offset is derived from a hash of the job id, so it stays the same across restarts.
+
+    :param str job_id: the identifier of the job
+    :param float spread: the size of the window, in seconds
+    :rtype: datetime.timedelta
+    """
+    digest = hashlib.sha1(job_id.encode("utf-8")).digest()
+    milliseconds = int.from_bytes(digest[:8], "big") % max(int(spread * 1000), 1)
+    return timedelta(milliseconds=milliseconds)
+
+
+class SpreadTrigger(BaseTrigger):
+    """
+    Delays every fire time of another trigger by a fixed offset.
+
+    It spreads jobs sharing the same schedule across a window instead of firing them all at once.
+
+    :param BaseTrigger trigger: the trigger to delay
+    :param float spread: the size of the window, in seconds
+    :param datetime.timedelta offset: the delay applied to every fire time
+    """
+
+    __slots__ = ("trigger", "spread", "offset")
+
+    def __init__(self, trigger, spread, offset):
+        self.trigger = trigger
+        self.spread = spread
+        self.offset = offset
+
+    def get_next_fire_time(self, previous_fire_time, now):
+        if previous_fire_time is not None:
+            previous_fire_time = previous_fire_time - self.offset
+
+        next_fire_time = self.trigger.get_next_fire_time(previous_fire_time, now - self.offset)
+
+        if next_fire_time is None:
+            return None
+
+        return next_fire_time + self.offset
+
+    def __getstate__(self):
+        return {"version": 1, "trigger": self.trigger, "spread": self.spread, "offset": self.offset}
+
+    def __setstate__(self, state):
+        if state.get("version", 1) > 1:
+            raise ValueError(f"Got serialized data for version {state['version']} of {self.__class__.__name__}, "
+                             f"but only version 1 can be handled")
+
+        self.trigger = state["trigger"]
+        self.spread = state["spread"]
+        self.offset = state["offset"]
+
+    def __str__(self):
+        return f"{self.trigger} spread over {self.spread}s (+{self.offset.total_seconds()}s)"
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} ({self.trigger!r}, spread={self.spread!r}, offset={self.offset!r})>"
+
+
+class _SharedTriggerMixin(object):
+    """
+    Memoizes the next fire times of a trigger shared by several jobs for the current ``now``, so the jobs firing
+    at the same instant compute them once.
+    """
+
+    __slots__ = ()
+
+    def get_next_fire_time(self, previous_fire_time, now):
+        memo_now, fire_times = self._memo
+
+        # the scheduler passes the same now to all the jobs it processes in a round.
+        if memo_now != now:
+            fire_times = {}
+            self._memo = (now, fire_times)
+
+        try:
+            return fire_times[previous_fire_time]
+        except KeyError:
+            pass
+
+        next_fire_time = super(_SharedTriggerMixin, self).get_next_fire_time(previous_fire_time, now)
+        fire_times[previous_fire_time] = next_fire_time
+        return next_fire_time
+
+    def __reduce_ex__(self, protocol):
+        # serialized as the original trigger, so job stores and other processes do not depend on this class.
+        return _restore_trigger, (self._trigger_class, self.__getstate__())
+
+
+def _restore_trigger(trigger_class, state):
+    trigger = trigger_class.__new__(trigger_class)
+    trigger.__setstate__(state)
+    return trigger
+
+
+def _get_shared_class(trigger_class):
+    shared_class = _shared_classes.get(trigger_class)
+
+    if shared_class is None:
+        shared_class = type(trigger_class.__name__, (_SharedTriggerMixin, trigger_class),
+                            {"__slots__": ("_memo", "__weakref__"), "__module__": __name__,
+                             "_trigger_class": trigger_class})
+        _shared_classes[trigger_class] = shared_class
+
+    return shared_class
+
+
+def intern_trigger(trigger):
+    """
+    Return a trigger identical to the given one and shared by all the jobs with the same schedule.
+
+    The shared trigger is an instance of the same trigger class and memoizes its next fire times for the current
+    tick. Only cron and interval triggers without jitter are interned, other triggers are returned as is.
+
+    :param BaseTrigger trigger: the trigger to intern
+    :rtype: BaseTrigger
+    """
+    if type(trigger) not in INTERNED_TRIGGER_TYPES or trigger.jitter:
+        return trigger
+
+    state = trigger.__getstate__()
+    key = pickle.dumps((type(trigger), state), pickle.HIGHEST_PROTOCOL)
+
+    with _interned_lock:
+        shared_trigger = _interned_triggers.get(key)
+
+        if shared_trigger is None:
+            shared_class = _get_shared_class(type(trigger))
+            shared_trigger = shared_class.__new__(shared_class)
+            shared_trigger.__setstate__(state)
+            shared_trigger._memo = (None, {})
+            _interned_triggers[key] = shared_trigger
+
+    return shared_trigger
@@ -15,11 +15,15 @@
 """Utility module."""
 
 import dateutil.parser
+import os
+import socket
 
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.date import DateTrigger
 from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.util import convert_to_datetime
 from collections import OrderedDict
+from .triggers import CalendarIntervalTrigger, SpreadTrigger
 
 
 def job_to_dict(job):
@@ -51,9 +55,14 @@ def pop_trigger(data):
     if trigger_name == "date":
         trigger_arg_names = ("run_date", "timezone")
     elif trigger_name == "interval":
-        trigger_arg_names = ("weeks", "days", "hours", "minutes", "seconds", "start_date", "end_date", "timezone")
+        trigger_arg_names = ("weeks", "days", "hours", "minutes", "seconds", "start_date", "end_date", "timezone",
+                             "jitter")
     elif trigger_name == "cron":
-        trigger_arg_names = ("year", "month", "day", "week", "day_of_week", "hour", "minute", "second", "start_date", "end_date", "timezone")
+        trigger_arg_names = ("year", "month", "day", "week", "day_of_week", "hour", "minute", "second", "start_date",
+                             "end_date", "timezone", "jitter")
+    elif trigger_name == "calendarinterval" and CalendarIntervalTrigger is not None:
+        trigger_arg_names = ("years", "months", "weeks", "days", "hour", "minute", "second", "start_date", "end_date",
+                             "timezone", "jitter")
     else:
         raise Exception(f"Trigger {trigger_name} is not supported.")
 
@@ -64,9 +73,26 @@ def pop_trigger(data):
     return trigger_name, trigger_args
 
 
+def pop_job_options(data, option_names):
+    """Pops the options handled by Flask-APScheduler from a given dict."""
+
+    options = {}
+
+    for option_name in option_names:
+        if option_name in data:
+            options[option_name] = data.pop(option_name)
+
+    return options
+
+
 def trigger_to_dict(trigger):
     """Converts a trigger to an OrderedDict."""
 
+    if isinstance(trigger, SpreadTrigger):
+        data = trigger_to_dict(trigger.trigger)
+        data["spread"] = trigger.spread
+        return data
+
     data = OrderedDict()
 
     if isinstance(trigger, DateTrigger):
@@ -109,6 +135,18 @@ def trigger_to_dict(trigger):
     return data
 
 
+def parse_datetime(value, timezone):
+    """
+    Parses a datetime in string, naive datetimes are given the timezone.
+    Returns None if the value is empty.
+    """
+
+    if not value:
+        return None
+
+    return convert_to_datetime(dateutil.parser.parse(value), timezone, "value")
+
+
 def fix_job_def(job_def):
     """
     Replaces the datetime in string by datetime object.
@@ -149,3 +187,29 @@ def wsgi_to_bytes(data):
     if isinstance(data, bytes):
         return data
     return data.encode("latin1")  # XXX: utf8 fallback?
+
+
+def remove_stale_socket(path, socket_type=socket.SOCK_STREAM):
+    """
+    Remove a Unix socket left behind by a process that has not shut down cleanly.
+
+    :param str path: the path of the socket
+    :param int socket_type: the type of the socket, ``socket.SOCK_STREAM`` or ``socket.SOCK_DGRAM``
+    :return: ``False`` if a process is still listening on the socket
+    """
+    if not os.path.exists(path):
+        return True
+
+    sock = socket.socket(socket.AF_UNIX, socket_type)
+
+    try:
+        sock.connect(path)
+    except ConnectionRefusedError:
+        os.unlink(path)
+        return True
+    except FileNotFoundError:
+        return True
+    finally:
+        sock.close()
+
+    return False
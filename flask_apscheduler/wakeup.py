@@ -0,0 +1,197 @@
+# Copyright 2015 Vinicius Chiele. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Provides channels that wake up the scheduler when another process modifies its job stores."""
+
+import contextlib
+import logging
+import os
+import socket
+import sqlite3
+import threading
+
+from .utils import remove_stale_socket
+
+LOGGER = logging.getLogger("flask_apscheduler")
+
+
+class BaseWakeupChannel(object):
+    """
+    Notifies the process running the scheduler that the job stores have been modified by another process.
+
+    :meth:`start` and :meth:`shutdown` are called in the process running the scheduler, :meth:`notify` in the
+    processes modifying the job stores.
+    """
+
+    def start(self, callback):
+        """
+        Start listening to the notifications.
+
+        :param callback: the callable, taking no argument, called on every notification
+        """
+        raise NotImplementedError
+
+    def shutdown(self):
+        """
+        Stop listening to the notifications.
+        """
+        raise NotImplementedError
+
+    def notify(self):
+        """
+        Notify the process running the scheduler, if any.
+        """
+        raise NotImplementedError
+
+
+class UnixSocketWakeupChannel(BaseWakeupChannel):
+    """
+    Sends the notifications as datagrams over a Unix socket, for processes running on the same host.
+
+    :param str path: the path of the socket, created by the process running the scheduler
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+        self._socket = None
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def start(self, callback):
+        """
+        Start listening to the notifications.
+
+        :param callback: the callable, taking no argument, called on every notification
+        :raises RuntimeError: if another process is listening on the socket
+        """
+        # a socket left behind by a process that has not shut down cleanly prevents binding.
+        if not remove_stale_socket(self.path, socket.SOCK_DGRAM):
+            raise RuntimeError(f"Another scheduler process is listening on {self.path}.")
+
+        self._stopped.clear()
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._socket.bind(self.path)
+        self._thread = threading.Thread(target=self._run, args=(self._socket, callback),
+                                        name="APScheduler-WakeupChannel", daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        if self._socket is None:
+            return
+
+        # wakes up the thread blocked on the socket.
+        self._stopped.set()
+        self.notify()
+        self._thread.join()
+        self._socket.close()
+        self._socket = None
+
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def notify(self):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.setblocking(False)
+
+            try:
+                sock.sendto(b"\0", self.path)
+            except (BlockingIOError, ConnectionRefusedError, FileNotFoundError):
+                # no scheduler is running, or it has already been notified.
+                pass
+
+    def _run(self, sock, callback):
+        while not self._stopped.is_set():
+            try:
+                sock.recv(16)
+            except OSError:
+                return
+
+            if not self._stopped.is_set():
+                _call(callback)
+
+
+class SQLiteWakeupChannel(BaseWakeupChannel):
+    """
+    Increments a version row in a SQLite database on every notification, which the process running the scheduler
+    polls every ``interval`` seconds.
+
+    :param str path: the path of the database, e.g. the one of a
+        :class:`~flask_apscheduler.jobstores.sqlite.SQLiteJobStore`
+    :param float interval: the number of seconds between two polls
+    :param str tablename: the name of the table holding the version row
+    """
+
+    def __init__(self, path, interval=0.5, tablename="apscheduler_wakeup"):
+        self.path = path
+        self.interval = interval
+        self.tablename = tablename
+
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def start(self, callback):
+        with contextlib.closing(self._connect()) as connection:
+            version = self._get_version(connection)
+
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, args=(callback, version),
+                                        name="APScheduler-WakeupChannel", daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        if self._thread is None:
+            return
+
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+
+    def notify(self):
+        with contextlib.closing(self._connect()) as connection:
+            with connection:
+                connection.execute(f"UPDATE {self.tablename} SET version = version + 1 WHERE id = 1")
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+
+        with connection:
+            connection.execute(f"CREATE TABLE IF NOT EXISTS {self.tablename} "
+                               f"(id INTEGER PRIMARY KEY, version INTEGER)")
+            connection.execute(f"INSERT OR IGNORE INTO {self.tablename} (id, version) VALUES (1, 0)")
+
+        return connection
+
+    def _get_version(self, connection):
+        return connection.execute(f"SELECT version FROM {self.tablename} WHERE id = 1").fetchone()[0]
+
+    def _run(self, callback, version):
+        with contextlib.closing(self._connect()) as connection:
+            while not self._stopped.wait(self.interval):
+                try:
+                    current_version = self._get_version(connection)
+                except sqlite3.Error:
+                    LOGGER.exception("Error polling the wakeup channel")
+                    continue
+
+                if current_version != version:
+                    version = current_version
+                    _call(callback)
+
+
+def _call(callback):
+    try:
+        callback()
+    except Exception:
+        LOGGER.exception("Error waking up the scheduler")
@@ -0,0 +1,126 @@
+# Copyright 2015 Vinicius Chiele. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Deadline tracking for job executions."""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+LOGGER = logging.getLogger("flask_apscheduler")
+
+
+class Watchdog(object):
+    """
+    Tracks deadlines in a single background thread and calls a callback for each one that expires.
+
+    Deadlines are kept in a heap, so watching and expiring a deadline is O(log n) and cancelling is O(1).
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._deadlines = []
+        self._pending = set()  # the handles of the deadlines neither expired nor cancelled
+        self._cancelled = set()
+        self._counter = itertools.count()
+        self._thread = None
+
+    def watch(self, timeout, callback):
+        """
+        Call ``callback`` once ``timeout`` seconds have elapsed, unless the deadline is cancelled before.
+
+        :param float timeout: the number of seconds until the deadline
+        :param callback: a callable without arguments
+        :return: a handle to cancel the deadline
+        """
+        deadline = time.monotonic() + timeout
+
+        with self._condition:
+            handle = next(self._counter)
+            heapq.heappush(self._deadlines, (deadline, handle, callback))
+            self._pending.add(handle)
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="APScheduler-Watchdog", daemon=True)
+                self._thread.start()
+
+            self._condition.notify()
+
+        return handle
+
+    def cancel(self, handle):
+        """
+        Cancel a deadline.
+
+        :param handle: the handle returned by :meth:`watch`
+        """
+        with self._condition:
+            # a deadline that already expired is not in the heap anymore, there is nothing to drop.
+            if handle not in self._pending:
+                return
+
+            self._pending.discard(handle)
+            self._cancelled.add(handle)
+
+            # cancelled deadlines are dropped lazily, compact the heap if they pile up.
+            if len(self._cancelled) > 64 and len(self._cancelled) * 2 > len(self._deadlines):
+                self._deadlines = [entry for entry in self._deadlines if entry[1] not in self._cancelled]
+                heapq.heapify(self._deadlines)
+                self._cancelled.clear()
+
+    def _reset_after_fork(self):
+        # the executions watched by the parent process do not run in this one.
+        self._condition = threading.Condition()
+        self._deadlines = []
+        self._pending = set()
+        self._cancelled = set()
+        self._thread = None
+
+    def _run(self):
+        while True:
+            callback = self._next_expired()
+
+            try:
+                callback()
+            except Exception:
+                LOGGER.exception("Error calling watchdog callback")
+
+    def _next_expired(self):
+        """
+        Block until the earliest deadline expires and return its callback.
+        """
+        with self._condition:
+            while True:
+                if not self._deadlines:
+                    self._condition.wait()
+                    continue
+
+                deadline, handle, callback = self._deadlines[0]
+
+                if handle in self._cancelled:
+                    heapq.heappop(self._deadlines)
+                    self._cancelled.discard(handle)
+                    continue
+
+                delay = deadline - time.monotonic()
+
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+
+                heapq.heappop(self._deadlines)
+                self._pending.discard(handle)
+                return callback
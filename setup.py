@@ -1,4 +1,4 @@
-from setuptools import setup
+from setuptools import find_packages, setup
 
 with open("README.rst", "r", encoding="utf-8") as fh:
     long_description = fh.read()
@@ -6,7 +6,7 @@ with open("README.rst", "r", encoding="utf-8") as fh:
 setup(
     name="Flask-APScheduler",
     version="1.13.1",
-    packages=["flask_apscheduler"],
+    packages=find_packages(exclude=["tests*", "benchmarks*", "examples*", "docs*"]),
     url="https://github.com/viniciuschiele/flask-apscheduler",
     license="Apache 2.0",
     author="Vinicius Chiele",
@@ -1,10 +1,13 @@
 import base64
 import json
+import threading
+import time
 
 from werkzeug.routing import BuildError
 from flask import Flask, url_for
 from flask_apscheduler import APScheduler, STATE_PAUSED, STATE_RUNNING, STATE_STOPPED
-from flask_apscheduler.auth import HTTPBasicAuth
+from flask_apscheduler.auth import HTTPAuth, HTTPBasicAuth, HTTPSignatureAuth, HTTPTokenAuth, sign_request
+from flask_apscheduler.ratelimit import RateLimiter
 from unittest import TestCase
 from datetime import date, datetime
 
@@ -26,6 +29,122 @@ class TestAPI(TestCase):
         self.assertEqual(info['allowed_hosts'], ['*'])
         self.assertTrue(info['running'])
 
+    def test_run_time_density(self):
+        self.scheduler.add_job('job1', job1, trigger='interval', minutes=10)
+
+        response = self.client.get(self.scheduler.api_prefix + '/density')
+        self.assertEqual(response.status_code, 200)
+        density = json.loads(response.get_data(as_text=True))
+        self.assertEqual(len(density['counts']), 60)
+        self.assertEqual(sum(density['counts']), 6)
+        self.assertEqual(density['peak'], 1)
+
+        response = self.client.get(self.scheduler.api_prefix + '/density?window=600&bucket=300')
+        density = json.loads(response.get_data(as_text=True))
+        self.assertEqual(density['counts'], [0, 1])
+
+    def test_run_time_density_of_frequent_jobs(self):
+        self.scheduler.add_job('job1', job1, trigger='interval', seconds=5)
+
+        response = self.client.get(self.scheduler.api_prefix + '/density?window=7200&bucket=3600')
+        density = json.loads(response.get_data(as_text=True))
+        self.assertEqual(sum(density['counts']), 2 * 720)
+        self.assertFalse(density['truncated'])
+
+    def test_run_time_density_invalid_bucket(self):
+        response = self.client.get(self.scheduler.api_prefix + '/density?bucket=0')
+        self.assertEqual(response.status_code, 400)
+
+    def test_calendar(self):
+        self.scheduler.add_job('job1', job1, trigger='interval', minutes=10)
+        self.scheduler.add_job('job2', job1, trigger='cron', minute='*/30')
+
+        response = self.client.get(self.scheduler.api_prefix + '/calendar?limit=3')
+        self.assertEqual(response.status_code, 200)
+        calendar = json.loads(response.get_data(as_text=True))
+        self.assertEqual(len(calendar['runs']), 3)
+        self.assertTrue(calendar['truncated'])
+
+        run_times = [run['run_time'] for run in calendar['runs']]
+        self.assertEqual(run_times, sorted(run_times))
+
+        response = self.client.get(self.scheduler.api_prefix + '/calendar?bucket=3600')
+        calendar = json.loads(response.get_data(as_text=True))
+        self.assertEqual(len(calendar['counts']), 24)
+        self.assertIn(calendar['total'], (144 + 48, 144 + 49))
+        self.assertFalse(calendar['truncated'])
+
+    def test_calendar_counts_frequent_jobs(self):
+        self.scheduler.add_job('job1', job1, trigger='interval', seconds=5)
+
+        response = self.client.get(self.scheduler.api_prefix + '/calendar?bucket=3600')
+        calendar = json.loads(response.get_data(as_text=True))
+        self.assertEqual(calendar['counts'][1:-1], [720] * 22)
+        self.assertEqual(calendar['total'], 24 * 720)
+        self.assertFalse(calendar['truncated'])
+
+    def test_calendar_counts_from_a_future_start(self):
+        self.scheduler.add_job('job1', job1, trigger='cron', minute='*')
+
+        response = self.client.get(self.scheduler.api_prefix +
+                                   '/calendar?from=2030-01-01T00:00:00Z&to=2030-01-01T06:00:00Z&bucket=3600')
+        calendar = json.loads(response.get_data(as_text=True))
+        self.assertEqual(calendar['counts'], [60] * 6)
+        self.assertFalse(calendar['truncated'])
+
+    def test_calendar_period(self):
+        self.scheduler.add_job('job1', job1, trigger='date', run_date=datetime(2100, 1, 1, 12))
+
+        response = self.client.get(self.scheduler.api_prefix + '/calendar?from=2100-01-01&to=2100-01-02')
+        calendar = json.loads(response.get_data(as_text=True))
+        self.assertEqual([run['job_id'] for run in calendar['runs']], ['job1'])
+        self.assertFalse(calendar['truncated'])
+
+        response = self.client.get(self.scheduler.api_prefix + '/calendar?from=2100-01-02&to=2100-01-03')
+        calendar = json.loads(response.get_data(as_text=True))
+        self.assertEqual(calendar['runs'], [])
+
+    def test_calendar_invalid_period(self):
+        response = self.client.get(self.scheduler.api_prefix + '/calendar?from=tomorrow')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(self.scheduler.api_prefix + '/calendar?from=2100-01-02&to=2100-01-01')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(self.scheduler.api_prefix + '/calendar?bucket=0')
+        self.assertEqual(response.status_code, 400)
+
+    def test_job_profile(self):
+        response = self.client.get(self.scheduler.api_prefix + '/jobs/job1/profile')
+        self.assertEqual(response.status_code, 404)
+
+        done = threading.Event()
+        self.scheduler.add_job('job1', sleeping_job, trigger='date', kwargs=dict(done=done), profile=1)
+        self.assertTrue(done.wait(5))
+
+        response = self.client.get(self.scheduler.api_prefix + '/jobs/job1/profile')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/plain')
+        self.assertEqual(response.headers['X-Profile-Runs'], '1')
+        self.assertIn('sleeping_job (test_api.py:', response.get_data(as_text=True))
+
+    def test_job_memory_usage(self):
+        self.scheduler.add_job('job1', returning_job, trigger='interval', hours=1, next_run_time=datetime.now(),
+                               kwargs=dict(value=1), trace_memory=True)
+
+        for _ in range(500):
+            if self.scheduler.get_job_memory_usage('job1'):
+                break
+
+            time.sleep(0.01)
+
+        response = self.client.get(self.scheduler.api_prefix + '/jobs/job1')
+        memory_usage = json.loads(response.get_data(as_text=True))['memory_usage']
+        self.assertEqual(set(memory_usage), {'run_id', 'peak', 'retained', 'top_allocations'})
+
+        response = self.client.get(self.scheduler.api_prefix + '/jobs')
+        self.assertIn('memory_usage', json.loads(response.get_data(as_text=True))[0])
+
     def test_pause_scheduler(self):
         response = self.client.post(self.scheduler.api_prefix + '/pause')
         self.assertEqual(response.status_code, 204)
@@ -89,6 +208,17 @@ class TestAPI(TestCase):
         response = self.client.post(self.scheduler.api_prefix + '/shutdown', json={'wait':False})
         self.assertEqual(response.status_code, 400)
 
+    def test_drain_shutdown_scheduler(self):
+        response = self.client.post(self.scheduler.api_prefix + '/shutdown', json={'drain_timeout': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.get_data(as_text=True)), {'running_jobs': []})
+        self.assertEqual(self.scheduler.state, STATE_STOPPED)
+
+    def test_drain_shutdown_scheduler_invalid_timeout(self):
+        response = self.client.post(self.scheduler.api_prefix + '/shutdown', json={'drain_timeout': 'soon'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.scheduler.state, STATE_RUNNING)
+
     def test_add_job(self):
         today = date.today()
         test_date = datetime(today.year + 1, today.month, today.day)
@@ -356,5 +486,347 @@ class TestHTTPBasicAuth(TestCase):
         self.assertEqual(response.headers['WWW-Authenticate'], 'Basic realm="Authentication Required"')
 
 
+class TestHTTPBasicAuthCache(TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SCHEDULER_AUTH_CACHE_TTL'] = 60
+        self.scheduler = APScheduler()
+        self.scheduler.auth = HTTPBasicAuth()
+        self.scheduler.api_enabled = True
+        self.scheduler.init_app(self.app)
+        self.scheduler.start()
+        self.scheduler.authenticate(self._authenticate)
+        self.client = self.app.test_client()
+        self.calls = 0
+
+    def _authenticate(self, auth):
+        self.calls += 1
+        return auth['username'] == 'test' and auth['password'] == 'test'
+
+    def get(self, credentials):
+        headers = {'Authorization': 'Basic ' + base64.b64encode(credentials).decode('ascii')}
+        return self.client.get(self.scheduler.api_prefix + '', headers=headers)
+
+    def test_successes_are_cached(self):
+        self.assertEqual(self.get(b'test:test').status_code, 200)
+        self.assertEqual(self.get(b'test:test').status_code, 200)
+        self.assertEqual(self.calls, 1)
+
+        self.scheduler.auth_cache.clear()
+        self.assertEqual(self.get(b'test:test').status_code, 200)
+        self.assertEqual(self.calls, 2)
+
+    def test_failures_are_not_cached_by_default(self):
+        self.assertEqual(self.get(b'guest:guest').status_code, 401)
+        self.assertEqual(self.get(b'guest:guest').status_code, 401)
+        self.assertEqual(self.calls, 2)
+
+    def test_failures_are_cached_with_negative_ttl(self):
+        self.scheduler.auth_cache.negative_ttl = 60
+
+        self.assertEqual(self.get(b'guest:guest').status_code, 401)
+        self.assertEqual(self.get(b'guest:guest').status_code, 401)
+        self.assertEqual(self.calls, 1)
+
+    def test_expired_results_are_evicted(self):
+        self.scheduler.auth_cache.ttl = 0.01
+
+        self.get(b'test:test')
+        time.sleep(0.02)
+        self.get(b'test:test')
+        self.assertEqual(self.calls, 2)
+
+    def test_size_is_bounded(self):
+        self.scheduler.auth_cache.max_size = 1
+        self.scheduler.auth_cache.negative_ttl = 60
+
+        self.get(b'test:test')
+        self.get(b'test:other')
+        self.get(b'test:test')
+        self.assertEqual(self.calls, 3)
+
+    def test_auth_without_cacheable_is_not_cached(self):
+        self.scheduler.auth = LegacyAuth()
+
+        self.assertEqual(self.get(b'test:test').status_code, 200)
+        self.assertEqual(self.get(b'test:test').status_code, 200)
+        self.assertEqual(self.calls, 2)
+
+    def test_custom_auth_is_not_cached_by_default(self):
+        class CustomAuth(HTTPAuth):
+            def get_authorization(self):
+                return HTTPBasicAuth().get_authorization()
+
+        self.scheduler.auth = CustomAuth()
+
+        self.assertEqual(self.get(b'test:test').status_code, 200)
+        self.assertEqual(self.get(b'test:test').status_code, 200)
+        self.assertEqual(self.calls, 2)
+
+
+class TestHTTPTokenAuth(TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.scheduler = APScheduler()
+        self.scheduler.auth = HTTPTokenAuth(tokens={'secret-token': 'robot'})
+        self.scheduler.api_enabled = True
+        self.scheduler.init_app(self.app)
+        self.scheduler.start()
+        self.scheduler.authenticate(lambda auth: auth['username'] == 'robot')
+        self.client = self.app.test_client()
+
+    def test_valid_token(self):
+        headers = {'Authorization': 'Bearer secret-token'}
+        response = self.client.get(self.scheduler.api_prefix + '', headers=headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_invalid_token(self):
+        headers = {'Authorization': 'Bearer other-token'}
+        response = self.client.get(self.scheduler.api_prefix + '', headers=headers)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.headers['WWW-Authenticate'], 'Bearer realm="Authentication Required"')
+
+    def test_wrong_scheme(self):
+        headers = {'Authorization': 'Basic ' + base64.b64encode(b'secret-token:').decode('ascii')}
+        response = self.client.get(self.scheduler.api_prefix + '', headers=headers)
+        self.assertEqual(response.status_code, 401)
+
+
+class TestHTTPSignatureAuth(TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SCHEDULER_AUTH_CACHE_TTL'] = 60
+        self.scheduler = APScheduler()
+        self.scheduler.auth = HTTPSignatureAuth({'robot': 'secret'}, max_skew=60)
+        self.scheduler.api_enabled = True
+        self.scheduler.init_app(self.app)
+        self.scheduler.start()
+        self.scheduler.authenticate(lambda auth: auth['key_id'] == 'robot')
+        self.client = self.app.test_client()
+
+    def test_valid_signature(self):
+        path = self.scheduler.api_prefix + '/jobs'
+        body = json.dumps(dict(id='job1', func='tests.test_api:job1', trigger='date')).encode('utf-8')
+        headers = {'Authorization': sign_request('robot', 'secret', 'POST', path, body=body)}
+
+        response = self.client.post(path, data=body, headers=headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_query_string_is_signed(self):
+        path = self.scheduler.api_prefix + '/density'
+        headers = {'Authorization': sign_request('robot', 'secret', 'GET', path, query_string='window=60')}
+
+        self.assertEqual(self.client.get(path + '?window=60', headers=headers).status_code, 200)
+
+        headers = {'Authorization': sign_request('robot', 'secret', 'GET', path, query_string='window=60')}
+        self.assertEqual(self.client.get(path + '?window=120', headers=headers).status_code, 401)
+
+    def test_invalid_signature(self):
+        headers = {'Authorization': sign_request('robot', 'other', 'GET', self.scheduler.api_prefix)}
+        response = self.client.get(self.scheduler.api_prefix, headers=headers)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.headers['WWW-Authenticate'], 'HMAC-SHA256')
+
+        headers = {'Authorization': sign_request('unknown', 'secret', 'GET', self.scheduler.api_prefix)}
+        self.assertEqual(self.client.get(self.scheduler.api_prefix, headers=headers).status_code, 401)
+
+    def test_expired_signature(self):
+        timestamp = int(time.time()) - 120
+        headers = {'Authorization': sign_request('robot', 'secret', 'GET', self.scheduler.api_prefix,
+                                                 timestamp=timestamp)}
+        self.assertEqual(self.client.get(self.scheduler.api_prefix, headers=headers).status_code, 401)
+
+    def test_replayed_nonce(self):
+        # the authentication cache is enabled, it must not let a signed request be replayed.
+        headers = {'Authorization': sign_request('robot', 'secret', 'GET', self.scheduler.api_prefix)}
+
+        self.assertEqual(self.client.get(self.scheduler.api_prefix, headers=headers).status_code, 200)
+        self.assertEqual(self.client.get(self.scheduler.api_prefix, headers=headers).status_code, 401)
+
+
+class TestRateLimits(TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SCHEDULER_API_RATE_LIMITS'] = {
+            'read': {'rate': 1, 'burst': 2},
+            'run': {'max_in_flight': 1},
+        }
+        self.scheduler = APScheduler()
+        self.scheduler.auth = HTTPBasicAuth()
+        self.scheduler.api_enabled = True
+        self.scheduler.init_app(self.app)
+        self.scheduler.start()
+        self.scheduler.authenticate(lambda auth: auth['password'] == 'test')
+        self.client = self.app.test_client()
+
+    def get(self, username):
+        headers = {'Authorization': 'Basic ' + base64.b64encode(username + b':test').decode('ascii')}
+        return self.client.get(self.scheduler.api_prefix + '/jobs', headers=headers)
+
+    def test_rate_is_limited_per_user(self):
+        self.assertEqual(self.get(b'alice').status_code, 200)
+        self.assertEqual(self.get(b'alice').status_code, 200)
+
+        response = self.get(b'alice')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '1')
+
+        self.assertEqual(self.get(b'bob').status_code, 200)
+
+    def test_rate_is_limited_per_address_without_username(self):
+        self.scheduler.auth = LegacyAuth()
+
+        self.assertEqual(self.get(b'alice').status_code, 200)
+        self.assertEqual(self.get(b'bob').status_code, 200)
+        self.assertEqual(self.get(b'carol').status_code, 429)
+
+    def test_failed_authentications_are_limited_per_address(self):
+        headers = {'Authorization': 'Basic ' + base64.b64encode(b'alice:wrong').decode('ascii')}
+
+        self.assertEqual(self.client.get(self.scheduler.api_prefix + '/jobs', headers=headers).status_code, 401)
+        self.assertEqual(self.client.get(self.scheduler.api_prefix + '/jobs', headers=headers).status_code, 401)
+        self.assertEqual(self.client.get(self.scheduler.api_prefix + '/jobs', headers=headers).status_code, 429)
+
+        # the authenticated users are limited by their own bucket.
+        self.assertEqual(self.get(b'alice').status_code, 200)
+
+    def test_least_recently_seen_clients_are_forgotten(self):
+        limiter = RateLimiter(rate=1, burst=1, max_clients=2)
+
+        for client in ('alice', 'bob', 'carol'):
+            limiter.acquire(client)
+            limiter.release(client)
+
+        self.assertEqual(list(limiter._clients), ['bob', 'carol'])
+
+    def test_other_groups_are_not_limited(self):
+        headers = {'Authorization': 'Basic ' + base64.b64encode(b'alice:test').decode('ascii')}
+
+        for _ in range(5):
+            response = self.client.post(self.scheduler.api_prefix + '/pause', headers=headers)
+            self.assertEqual(response.status_code, 204)
+
+    def test_in_flight_requests_are_limited(self):
+        headers = {'Authorization': 'Basic ' + base64.b64encode(b'alice:test').decode('ascii')}
+        self.scheduler.add_job('job1', func=blocking_job, trigger='date', run_date='2100-01-01 00:00:00')
+
+        started = threading.Event()
+        release = threading.Event()
+        blocking_job.events = (started, release)
+
+        thread = threading.Thread(target=self.client.post, args=(self.scheduler.api_prefix + '/jobs/job1/run',),
+                                  kwargs=dict(headers=headers))
+        thread.start()
+        started.wait(5)
+
+        response = self.client.post(self.scheduler.api_prefix + '/jobs/job1/run', headers=headers)
+        self.assertEqual(response.status_code, 429)
+
+        release.set()
+        thread.join()
+
+        response = self.client.post(self.scheduler.api_prefix + '/jobs/job1/run', headers=headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_new_client_is_not_forgotten_when_clients_are_in_flight(self):
+        limiter = RateLimiter(rate=1, burst=1, max_clients=1)
+
+        self.assertIsNone(limiter.acquire('alice'))
+        self.assertIsNone(limiter.acquire('bob'))
+        limiter.release('bob')
+
+        # alice still has a request in flight, bob's bucket must be kept and limit him.
+        self.assertIsNotNone(limiter.acquire('bob'))
+
+        limiter.release('alice')
+        self.assertIsNone(limiter.acquire('carol'))
+        self.assertEqual(list(limiter._clients), ['carol'])
+
+
+class TestJobResults(TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SCHEDULER_RESULT_BACKEND'] = True
+        self.scheduler = APScheduler()
+        self.scheduler.api_enabled = True
+        self.scheduler.init_app(self.app)
+        self.scheduler.start()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        self.scheduler.shutdown()
+
+    def wait_for_runs(self, job_id):
+        for _ in range(100):
+            runs = json.loads(self.client.get(self.scheduler.api_prefix + f'/jobs/{job_id}/runs').get_data())
+
+            if runs:
+                return runs
+
+            time.sleep(0.05)
+
+        self.fail(f'{job_id} did not run')
+
+    def test_result(self):
+        self.scheduler.add_job('job1', returning_job, trigger='date', kwargs=dict(value={'answer': 42}))
+        runs = self.wait_for_runs('job1')
+        self.assertEqual(runs[0]['status'], 'success')
+
+        response = self.client.get(self.scheduler.api_prefix + f'/jobs/job1/runs/{runs[0]["run_id"]}/result')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['X-Job-Status'], 'success')
+        self.assertEqual(json.loads(response.get_data()), {'answer': 42})
+
+    def test_exception_summary(self):
+        self.scheduler.add_job('job1', failing_job, trigger='date')
+        runs = self.wait_for_runs('job1')
+
+        response = self.client.get(self.scheduler.api_prefix + f'/jobs/job1/runs/{runs[0]["run_id"]}/result')
+        self.assertEqual(response.headers['X-Job-Status'], 'error')
+        self.assertIn('ValueError', json.loads(response.get_data())['exception'])
+
+    def test_result_too_large(self):
+        self.scheduler.result_backend.max_result_size = 10
+        self.scheduler.add_job('job1', returning_job, trigger='date', kwargs=dict(value='x' * 100))
+        runs = self.wait_for_runs('job1')
+        self.assertFalse(runs[0]['stored'])
+
+        response = self.client.get(self.scheduler.api_prefix + f'/jobs/job1/runs/{runs[0]["run_id"]}/result')
+        self.assertEqual(response.status_code, 404)
+
+    def test_unknown_run(self):
+        response = self.client.get(self.scheduler.api_prefix + '/jobs/job1/runs/unknown/result')
+        self.assertEqual(response.status_code, 404)
+
+
+def sleeping_job(done):
+    time.sleep(0.1)
+    done.set()
+
+
+def returning_job(value):
+    return value
+
+
+def failing_job():
+    raise ValueError('failed')
+
+
+def blocking_job():
+    started, release = blocking_job.events
+    started.set()
+    release.wait(5)
+
+
 def job1(x=0):
     print(x)
+
+
+class LegacyAuth(object):
+    """An authentication class written before the cacheable attribute and get_username were added."""
+
+    def get_authorization(self):
+        return HTTPBasicAuth().get_authorization()
+
+    def get_authenticate_header(self):
+        return 'Basic realm="Authentication Required"'
@@ -0,0 +1,82 @@
+import datetime
+import threading
+import time
+
+from flask import Flask
+from flask_apscheduler import APScheduler
+from flask_apscheduler.executors import PriorityThreadPoolExecutor
+from unittest import TestCase
+
+
+class TestPriorityThreadPoolExecutor(TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SCHEDULER_JOB_DEFAULTS'] = {'misfire_grace_time': 60}
+        self.release = threading.Event()
+        self.executed = []
+
+    def tearDown(self):
+        self.release.set()
+        self.scheduler.shutdown()
+
+    def start(self, executor):
+        self.executor = executor
+        self.app.config['SCHEDULER_EXECUTORS'] = {'default': executor}
+        self.scheduler = APScheduler(app=self.app)
+        self.scheduler.start(paused=True)
+
+        now = datetime.datetime.now()
+        self.scheduler.add_job('blocker', self.release.wait, trigger='interval', hours=1,
+                               next_run_time=now - datetime.timedelta(seconds=1), priority=100)
+
+        for i, (id, priority) in enumerate((('low', 0), ('high', 10), ('mid', 5))):
+            self.scheduler.add_job(id, self.executed.append, args=(id,), trigger='interval', hours=1,
+                                   next_run_time=now - datetime.timedelta(seconds=0.5 - i * 0.1), priority=priority)
+
+        self.scheduler.resume()
+
+    def wait_until(self, condition):
+        for _ in range(500):
+            if condition():
+                return
+
+            time.sleep(0.01)
+
+        self.fail('condition not met')
+
+    def queued(self):
+        return sum(stats['queued'] for stats in self.executor.get_stats().values())
+
+    def test_runs_by_priority(self):
+        self.start(PriorityThreadPoolExecutor(max_workers=1))
+        self.wait_until(lambda: self.queued() == 3)
+
+        self.release.set()
+        self.wait_until(lambda: len(self.executed) == 3)
+        self.assertEqual(self.executed, ['high', 'mid', 'low'])
+
+        stats = self.executor.get_stats()
+        self.assertEqual(stats[0]['dispatched'], 1)
+        self.assertEqual(stats[10]['starved'], 0)
+
+    def test_starved_runs_first(self):
+        self.start(PriorityThreadPoolExecutor(max_workers=1, max_wait=0))
+        self.wait_until(lambda: self.queued() == 3)
+
+        self.release.set()
+        self.wait_until(lambda: len(self.executed) == 3)
+        self.assertEqual(self.executed, ['low', 'high', 'mid'])
+        self.assertEqual(self.executor.get_stats()[0]['starved'], 1)
+
+    def test_lowest_priority_is_dropped(self):
+        self.start(PriorityThreadPoolExecutor(max_workers=1, max_queue_size=1))
+        self.wait_until(lambda: self.executor.get_stats().get(5, {}).get('dropped'))
+
+        self.release.set()
+        self.wait_until(lambda: len(self.executed) == 1)
+        self.assertEqual(self.executed, ['high'])
+
+        stats = self.executor.get_stats()
+        self.assertEqual(stats[0]['dropped'], 1)
+        self.assertEqual(stats[5]['dropped'], 1)
+        self.assertEqual(self.scheduler.scheduler._executors['default']._instances.get('low'), None)
@@ -0,0 +1,115 @@
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from datetime import datetime, timedelta, timezone
+from flask_apscheduler.forecast import MAX_RUNS_PER_JOB, RunTimeCache, count_run_times, expand_run_times
+from flask_apscheduler.triggers import SpreadTrigger
+from unittest import TestCase
+
+START = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+
+class TestRunTimeCache(TestCase):
+    def setUp(self):
+        self.cache = RunTimeCache()
+
+    def test_same_schedule_is_expanded_once(self):
+        trigger = CronTrigger(minute='*/15', timezone=timezone.utc)
+        run_times = self.cache.get_run_times(trigger, START, START + timedelta(days=1))
+        self.assertEqual(len(run_times), 96)
+
+        same_trigger = CronTrigger(minute='*/15', timezone=timezone.utc)
+        later = START + timedelta(hours=1)
+        self.assertEqual(self.cache.get_run_times(same_trigger, later, START + timedelta(hours=2)),
+                         [later + timedelta(minutes=15 * i) for i in range(4)])
+        self.assertEqual(len(self.cache._entries), 1)
+        self.assertIs(self.cache._entries[self.cache._get_key(same_trigger)][0], run_times)
+
+    def test_longer_period_is_expanded_again(self):
+        trigger = IntervalTrigger(minutes=10, start_date=START, timezone=timezone.utc)
+        self.cache.get_run_times(trigger, START, START + timedelta(hours=1))
+
+        end = START + timedelta(hours=3)
+        self.assertEqual(self.cache.get_run_times(trigger, START, end), expand_run_times(trigger, START, end))
+
+    def test_run_times_are_limited(self):
+        trigger = IntervalTrigger(seconds=1, start_date=START, timezone=timezone.utc)
+        self.assertEqual(len(self.cache.get_run_times(trigger, START, START + timedelta(days=1), limit=100)), 100)
+        self.assertEqual(len(self.cache.get_run_times(trigger, START, START + timedelta(seconds=50))), 50)
+
+    def test_number_of_run_times_is_bounded(self):
+        cache = RunTimeCache(max_run_times=150)
+        hourly = IntervalTrigger(hours=1, start_date=START, timezone=timezone.utc)
+        every_minute = IntervalTrigger(minutes=1, start_date=START, timezone=timezone.utc)
+
+        cache.get_run_times(hourly, START, START + timedelta(days=4))
+        self.assertEqual(cache._run_time_count, 96)
+
+        # too many fire times to be cached alone, the other triggers are kept.
+        self.assertEqual(len(cache.get_run_times(every_minute, START, START + timedelta(days=1))), 1440)
+        self.assertEqual(list(cache._entries), [cache._get_key(hourly)])
+
+        cache.get_run_times(every_minute, START, START + timedelta(hours=1))
+        self.assertEqual(list(cache._entries), [cache._get_key(every_minute)])
+        self.assertEqual(cache._run_time_count, 60)
+
+    def test_jitter_is_not_cached(self):
+        trigger = IntervalTrigger(minutes=10, start_date=START, timezone=timezone.utc, jitter=5)
+        self.cache.get_run_times(trigger, START, START + timedelta(hours=1))
+        self.assertEqual(len(self.cache._entries), 0)
+
+
+class FakeJob(object):
+    def __init__(self, trigger, next_run_time):
+        self.trigger = trigger
+        self.next_run_time = next_run_time
+
+
+class TestCountRunTimes(TestCase):
+    def count_expanded(self, job, start, end, bucket, count_due=False):
+        counts = [0] * -(-int((end - start).total_seconds()) // bucket)
+
+        for run_time in expand_run_times(job.trigger, job.next_run_time, end, limit=10 ** 6):
+            if run_time >= start or count_due:
+                counts[int(max((run_time - start).total_seconds(), 0) // bucket)] += 1
+
+        return counts
+
+    def test_interval_runs_are_counted_exactly(self):
+        end_date = START + timedelta(hours=5, minutes=3)
+        triggers = [
+            IntervalTrigger(seconds=5, start_date=START, timezone=timezone.utc),
+            IntervalTrigger(minutes=7, start_date=START, end_date=end_date, timezone=timezone.utc),
+            SpreadTrigger(IntervalTrigger(seconds=3, start_date=START, timezone=timezone.utc), 60,
+                          timedelta(seconds=20)),
+        ]
+        start = START + timedelta(minutes=30)
+        end = START + timedelta(hours=6)
+
+        for trigger in triggers:
+            job = FakeJob(trigger, trigger.get_next_fire_time(None, START))
+
+            for bucket, count_due in ((3600, False), (60, True), (1, False)):
+                counts, truncated = count_run_times([job], start, end, bucket, count_due=count_due)
+                self.assertEqual(counts, self.count_expanded(job, start, end, bucket, count_due))
+                self.assertFalse(truncated)
+
+    def test_runs_are_counted_from_a_future_start(self):
+        trigger = CronTrigger(minute='*', timezone=timezone.utc)
+        job = FakeJob(trigger, START)
+        start = START + timedelta(days=30)
+
+        counts, truncated = count_run_times([job], start, start + timedelta(hours=6), 3600)
+        self.assertEqual(counts, [60] * 6)
+        self.assertFalse(truncated)
+
+    def test_truncated_runs_are_reported(self):
+        trigger = CronTrigger(second='*', timezone=timezone.utc)
+        job = FakeJob(trigger, START)
+
+        counts, truncated = count_run_times([job], START, START + timedelta(days=1), 3600)
+        self.assertEqual(sum(counts), MAX_RUNS_PER_JOB)
+        self.assertTrue(truncated)
+
+        counts, truncated = count_run_times([job], START, START + timedelta(hours=1), 3600)
+        self.assertEqual(counts, [3600])
+        self.assertFalse(truncated)
@@ -0,0 +1,202 @@
+import json
+import os
+import tempfile
+import threading
+
+from apscheduler.schedulers.base import STATE_PAUSED, STATE_RUNNING, STATE_STOPPED
+from flask import Flask
+from flask_apscheduler import APScheduler, forking
+from flask_apscheduler.forking import ProcessLock
+from unittest import TestCase, skipUnless
+
+try:
+    from flask_apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+except ImportError:
+    SQLAlchemyJobStore = None
+
+
+def job1():
+    pass
+
+
+class ForkedProcess(object):
+    """Runs a function in a forked process and reads back its JSON result."""
+
+    def __init__(self, func):
+        read_fd, write_fd = os.pipe()
+        self.release_read_fd, self.release_write_fd = os.pipe()
+        self.pid = os.fork()
+
+        if self.pid == 0:
+            os.close(read_fd)
+            status = 1
+
+            try:
+                os.write(write_fd, json.dumps(func()).encode() + b"\n")
+                # waits until the parent process lets it exit.
+                os.read(self.release_read_fd, 1)
+                status = 0
+            finally:
+                os._exit(status)
+
+        os.close(write_fd)
+        self.output = os.fdopen(read_fd)
+
+    def result(self):
+        return json.loads(self.output.readline())
+
+    def exit(self):
+        os.write(self.release_write_fd, b"\0")
+        _, status = os.waitpid(self.pid, 0)
+        self.output.close()
+        os.close(self.release_read_fd)
+        os.close(self.release_write_fd)
+        return status
+
+
+@skipUnless(hasattr(os, "fork"), "os.fork is not available")
+class TestForking(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['SCHEDULER_FORK_LOCK_FILE'] = os.path.join(self.directory.name, 'scheduler.lock')
+        self.app.config['SCHEDULER_FORK_SOCKET'] = os.path.join(self.directory.name, 'scheduler.sock')
+        self.processes = []
+        self.scheduler = None
+
+    def tearDown(self):
+        for process in self.processes:
+            process.exit()
+
+        if self.scheduler and self.scheduler.running:
+            self.scheduler.shutdown()
+
+        self.directory.cleanup()
+
+    def create_scheduler(self, fork_mode=None):
+        if fork_mode:
+            self.app.config['SCHEDULER_FORK_MODE'] = fork_mode
+
+        self.scheduler = APScheduler(app=self.app)
+        self.scheduler.add_job('job1', job1, trigger='interval', hours=1)
+        self.scheduler.start()
+
+    def fork(self, func):
+        process = ForkedProcess(func)
+        self.processes.append(process)
+        return process.result()
+
+    def test_no_fork_hooks_without_fork_mode(self):
+        self.create_scheduler()
+        self.assertNotIn(self.scheduler, forking._schedulers)
+
+        self.assertEqual(self.fork(lambda: self.scheduler.state), STATE_RUNNING)
+
+    def test_child_gets_stopped_scheduler(self):
+        self.create_scheduler('parent')
+
+        def child():
+            # a lock held by a thread of the parent process must not be held in the child.
+            acquired = self.scheduler._tracked_jobs_lock.acquire(timeout=1)
+            return dict(state=self.scheduler.state, acquired=acquired)
+
+        with self.scheduler._tracked_jobs_lock:
+            result = self.fork(child)
+
+        self.assertEqual(result, dict(state=STATE_STOPPED, acquired=True))
+        self.assertEqual(self.scheduler.state, STATE_RUNNING)
+
+    def test_unknown_fork_mode(self):
+        self.app.config['SCHEDULER_FORK_MODE'] = 'unknown'
+
+        with self.assertRaises(ValueError):
+            APScheduler(app=self.app)
+
+    def test_child_takes_scheduler_over(self):
+        self.create_scheduler('child')
+
+        def child():
+            ran = threading.Event()
+            self.scheduler.add_job('job2', ran.set)
+            return dict(state=self.scheduler.state, jobs=sorted(job.id for job in self.scheduler.get_jobs()),
+                        ran=ran.wait(5))
+
+        result = self.fork(child)
+
+        self.assertEqual(result, dict(state=STATE_RUNNING, jobs=['job1', 'job2'], ran=True))
+        self.assertEqual(self.scheduler.state, STATE_PAUSED)
+
+        # the scheduler is taken over by a single process, it is paused in the others, which still write the jobs.
+        def other_child():
+            self.scheduler.add_job('job3', job1, trigger='interval', hours=1)
+
+            try:
+                self.scheduler.resume()
+            except RuntimeError:
+                resumed = False
+            else:
+                resumed = True
+
+            return dict(state=self.scheduler.state, added=self.scheduler.get_job('job3') is not None, resumed=resumed)
+
+        result = self.fork(other_child)
+
+        self.assertEqual(result, dict(state=STATE_PAUSED, added=True, resumed=False))
+
+    @skipUnless(SQLAlchemyJobStore, 'SQLAlchemy is not installed')
+    def test_standby_children_write_persistent_jobs(self):
+        url = 'sqlite:///' + os.path.join(self.directory.name, 'jobs.sqlite')
+        self.app.config['SCHEDULER_JOBSTORES'] = {'default': SQLAlchemyJobStore(url=url)}
+        self.create_scheduler('child')
+        self.fork(lambda: self.scheduler.state)
+
+        def other_child():
+            self.scheduler.add_job('job2', job1, trigger='interval', hours=1)
+            return self.scheduler.state
+
+        self.assertEqual(self.fork(other_child), STATE_PAUSED)
+        self.assertIsNotNone(self.scheduler.get_job('job2'))
+
+    def test_next_child_takes_scheduler_over_once_released(self):
+        self.create_scheduler('child')
+
+        self.fork(lambda: self.scheduler.state)
+        self.processes.pop().exit()
+
+        self.assertEqual(self.fork(lambda: self.scheduler.state), STATE_RUNNING)
+
+    def test_children_use_coordinator(self):
+        self.create_scheduler('coordinator')
+
+        def child():
+            self.scheduler.add_job('job2', job1, trigger='interval', hours=1)
+            return dict(state=self.scheduler.state, jobs=[job.id for job in self.scheduler.get_jobs()])
+
+        result = self.fork(child)
+
+        self.assertEqual(result, dict(state=STATE_RUNNING, jobs=['job1', 'job2']))
+        self.assertEqual(self.scheduler.state, STATE_RUNNING)
+        self.assertIsNotNone(self.scheduler.get_job('job2'))
+
+
+@skipUnless(hasattr(os, "fork"), "os.fork is not available")
+class TestProcessLock(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'scheduler.lock')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_acquire_and_release(self):
+        lock = ProcessLock(self.path)
+        other_lock = ProcessLock(self.path)
+
+        self.assertTrue(lock.acquire())
+        self.assertTrue(lock.locked)
+        self.assertFalse(other_lock.acquire())
+
+        lock.release()
+
+        self.assertTrue(other_lock.acquire())
+        other_lock.release()
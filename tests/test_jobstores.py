@@ -0,0 +1,327 @@
+import os
+import pickle
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+from apscheduler.events import EVENT_JOB_ADDED, EVENT_JOB_MODIFIED, EVENT_JOB_REMOVED, JobEvent
+from apscheduler.jobstores.base import ConflictingIdError, JobLookupError
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
+from datetime import datetime, timedelta, timezone
+from flask_apscheduler.jobstores.cache import CachingJobStore
+from flask_apscheduler.jobstores.memory import EMPTY_KWARGS, CompactJob, IndexedMemoryJobStore
+from flask_apscheduler.jobstores.sqlite import SQLiteJobStore
+from unittest import TestCase
+
+NOW = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+
+class TestIndexedMemoryJobStore(TestCase):
+    def setUp(self):
+        self.scheduler = BackgroundScheduler(timezone=timezone.utc)
+        self.store = IndexedMemoryJobStore()
+
+    def create_job(self, id, seconds):
+        next_run_time = None if seconds is None else NOW + timedelta(seconds=seconds)
+        job = self.scheduler.add_job(job1, 'interval', hours=1, id=id, next_run_time=next_run_time)
+        self.scheduler.remove_job(id)
+        return job
+
+    def test_add_lookup_job(self):
+        job = self.create_job('job1', 10)
+        self.store.add_job(job)
+
+        self.assertIs(self.store.lookup_job('job1'), job)
+        self.assertIsNone(self.store.lookup_job('job2'))
+        self.assertRaises(ConflictingIdError, self.store.add_job, self.create_job('job1', 20))
+
+    def test_get_due_jobs_sorted(self):
+        for id, seconds in (('job3', 30), ('job1', 10), ('job2', 10), ('job4', 40), ('paused', None)):
+            self.store.add_job(self.create_job(id, seconds))
+
+        due_jobs = self.store.get_due_jobs(NOW + timedelta(seconds=30))
+        self.assertEqual([job.id for job in due_jobs], ['job1', 'job2', 'job3'])
+        self.assertEqual([job.id for job in self.store.get_due_jobs(NOW)], [])
+        self.assertEqual(self.store.get_next_run_time(), NOW + timedelta(seconds=10))
+        self.assertEqual([job.id for job in self.store.get_all_jobs()], ['job1', 'job2', 'job3', 'job4', 'paused'])
+
+    def test_update_job(self):
+        self.store.add_job(self.create_job('job1', 10))
+        self.store.add_job(self.create_job('job2', 20))
+
+        self.store.update_job(self.create_job('job1', 30))
+        self.assertEqual([job.id for job in self.store.get_all_jobs()], ['job2', 'job1'])
+
+        self.store.update_job(self.create_job('job1', 10))
+        self.store.update_job(self.create_job('job2', None))
+        self.assertEqual([job.id for job in self.store.get_all_jobs()], ['job1', 'job2'])
+        self.assertEqual(self.store.get_next_run_time(), NOW + timedelta(seconds=10))
+
+        self.store.update_job(self.create_job('job2', 5))
+        self.assertEqual(self.store.get_next_run_time(), NOW + timedelta(seconds=5))
+        self.assertRaises(JobLookupError, self.store.update_job, self.create_job('job3', 5))
+
+    def test_remove_job(self):
+        self.store.add_job(self.create_job('job1', 10))
+        self.store.add_job(self.create_job('job2', 20))
+        self.store.add_job(self.create_job('paused', None))
+
+        self.store.remove_job('job1')
+        self.store.remove_job('paused')
+
+        self.assertIsNone(self.store.lookup_job('job1'))
+        self.assertEqual(self.store.get_next_run_time(), NOW + timedelta(seconds=20))
+        self.assertRaises(JobLookupError, self.store.remove_job, 'job1')
+
+        self.store.remove_all_jobs()
+        self.assertEqual(self.store.get_all_jobs(), [])
+        self.assertIsNone(self.store.get_next_run_time())
+
+    def test_many_updates_keep_order(self):
+        for i in range(3000):
+            self.store.add_job(self.create_job(f'job{i}', i))
+
+        for i in range(0, 3000, 2):
+            self.store.update_job(self.create_job(f'job{i}', 6000 - i))
+
+        for i in range(1, 3000, 4):
+            self.store.remove_job(f'job{i}')
+
+        run_times = [job.next_run_time for job in self.store.get_all_jobs()]
+        self.assertEqual(run_times, sorted(run_times))
+        self.assertEqual(len(run_times), 3000 - 750)
+        self.assertEqual(self.store.get_next_run_time(), NOW + timedelta(seconds=3))
+
+    def test_compact_jobs(self):
+        self.store = IndexedMemoryJobStore(compact=True)
+        job = self.create_job('job1', 10)
+        trigger = CronTrigger(hour=3, jitter=10, timezone=timezone.utc)
+        job._modify(trigger=trigger, func=''.join(['tests.test_jobstores', ':job1']), misfire_grace_time=1,
+                    coalesce=True, max_instances=1)
+        self.store.add_job(job)
+
+        self.assertIs(self.store.lookup_job('job1'), job)
+        self.assertIsInstance(job, CompactJob)
+        self.assertIs(job.func_ref, sys.intern('tests.test_jobstores:job1'))
+        self.assertIs(job.kwargs, EMPTY_KWARGS)
+        self.assertRaises(TypeError, job.kwargs.update, a=1)
+
+        # the cron trigger is kept compressed, it is materialized on access.
+        self.assertIsNot(job.trigger, trigger)
+        self.assertEqual(job.trigger.__getstate__(), trigger.__getstate__())
+
+        state = pickle.loads(pickle.dumps(job.__getstate__()))
+        self.assertIs(type(state['kwargs']), dict)
+        self.assertEqual(state['trigger'].__getstate__(), trigger.__getstate__())
+
+    def test_compact_jobs_share_triggers(self):
+        scheduler = BackgroundScheduler(jobstores={'default': IndexedMemoryJobStore(compact=True)},
+                                        timezone=timezone.utc)
+        scheduler.start(paused=True)
+
+        try:
+            job_a = scheduler.add_job(job1, 'cron', hour=3, id='a')
+            job_b = scheduler.add_job(job2, 'cron', hour=3, id='b', kwargs={'a': 1})
+            job_b = scheduler.modify_job('b', kwargs={})
+
+            self.assertIs(scheduler.get_job('a').trigger, scheduler.get_job('b').trigger)
+            self.assertIs(job_b.kwargs, EMPTY_KWARGS)
+            self.assertEqual(job_a.next_run_time, job_b.next_run_time)
+        finally:
+            scheduler.shutdown(wait=False)
+
+
+class TestSQLiteJobStore(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'jobs.sqlite')
+        self.scheduler = BackgroundScheduler(timezone=timezone.utc)
+        self.store = self.create_store()
+
+    def tearDown(self):
+        self.store.shutdown()
+        shutil.rmtree(self.directory)
+
+    def create_store(self):
+        store = SQLiteJobStore(path=self.path)
+        store.start(self.scheduler, 'default')
+        return store
+
+    def create_job(self, id, seconds):
+        next_run_time = None if seconds is None else NOW + timedelta(seconds=seconds)
+        job = self.scheduler.add_job(job1, 'interval', hours=1, id=id, next_run_time=next_run_time,
+                                     misfire_grace_time=1, coalesce=True, max_instances=1)
+        self.scheduler.remove_job(id)
+        return job
+
+    def count_committed_rows(self, seconds):
+        timestamp = (NOW + timedelta(seconds=seconds)).timestamp()
+
+        with sqlite3.connect(self.path) as connection:
+            return connection.execute('SELECT COUNT(*) FROM apscheduler_jobs WHERE next_run_time = ?',
+                                      (timestamp,)).fetchone()[0]
+
+    def test_wal_mode(self):
+        with sqlite3.connect(self.path) as connection:
+            self.assertEqual(connection.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+
+    def test_add_lookup_remove_job(self):
+        self.store.add_job(self.create_job('job1', 10))
+
+        self.assertEqual(self.store.lookup_job('job1').id, 'job1')
+        self.assertIsNone(self.store.lookup_job('job2'))
+        self.assertRaises(ConflictingIdError, self.store.add_job, self.create_job('job1', 20))
+
+        self.store.remove_job('job1')
+        self.assertIsNone(self.store.lookup_job('job1'))
+        self.assertRaises(JobLookupError, self.store.remove_job, 'job1')
+
+    def test_get_due_jobs(self):
+        for id, seconds in (('job3', 30), ('job1', 10), ('job2', 20), ('paused', None)):
+            self.store.add_job(self.create_job(id, seconds))
+
+        due_jobs = self.store.get_due_jobs(NOW + timedelta(seconds=20))
+        self.assertEqual([job.id for job in due_jobs], ['job1', 'job2'])
+        self.assertEqual(self.store.get_next_run_time(), NOW + timedelta(seconds=10))
+        self.assertEqual([job.id for job in self.store.get_all_jobs()], ['job1', 'job2', 'job3', 'paused'])
+
+    def test_updates_are_committed_once_per_round(self):
+        self.store.add_job(self.create_job('job1', 10))
+        self.store.add_job(self.create_job('job2', 10))
+
+        for job in self.store.get_due_jobs(NOW + timedelta(seconds=10)):
+            self.store.update_job(self.create_job(job.id, 60))
+
+        self.assertEqual(self.count_committed_rows(60), 0)
+        self.assertEqual(self.store.lookup_job('job1').next_run_time, NOW + timedelta(seconds=60))
+
+        self.assertEqual(self.store.get_next_run_time(), NOW + timedelta(seconds=60))
+        self.assertEqual(self.count_committed_rows(60), 2)
+
+    def test_jobs_survive_restart(self):
+        self.store.add_job(self.create_job('job1', 10))
+        self.store.add_job(self.create_job('paused', None))
+        self.store.shutdown()
+
+        self.store = self.create_store()
+        self.assertEqual(self.store.get_next_run_time(), NOW + timedelta(seconds=10))
+        self.assertEqual([job.id for job in self.store.get_all_jobs()], ['job1', 'paused'])
+
+
+class TestCachingJobStore(TestCase):
+    def setUp(self):
+        self.scheduler = BackgroundScheduler(timezone=timezone.utc)
+        self.inner_store = MemoryJobStore()
+        self.store = CachingJobStore(self.inner_store, flush_interval=3600, refresh_interval=None)
+
+        # the jobs created by the test scheduler must not reach the job store through its events.
+        self.store_scheduler = BackgroundScheduler(timezone=timezone.utc)
+        self.store.start(self.store_scheduler, 'default')
+
+    def tearDown(self):
+        self.store.shutdown()
+
+    def create_job(self, id, seconds):
+        job = self.scheduler.add_job(job1, 'interval', hours=1, id=id, next_run_time=NOW + timedelta(seconds=seconds))
+        self.scheduler.remove_job(id)
+        return job
+
+    def test_writes_are_flushed_behind(self):
+        self.store.add_job(self.create_job('job1', 10))
+
+        self.assertEqual(self.store.lookup_job('job1').id, 'job1')
+        self.assertIsNone(self.inner_store.lookup_job('job1'))
+
+        self.store.flush()
+        self.assertEqual(self.inner_store.lookup_job('job1').id, 'job1')
+
+        self.store.update_job(self.create_job('job1', 20))
+        self.store.flush()
+        self.assertEqual(self.inner_store.get_next_run_time(), NOW + timedelta(seconds=20))
+
+        self.store.remove_job('job1')
+        self.store.flush()
+        self.assertIsNone(self.inner_store.lookup_job('job1'))
+
+    def test_writes_are_coalesced(self):
+        self.store.add_job(self.create_job('job1', 10))
+        self.store.update_job(self.create_job('job1', 20))
+        self.store.remove_job('job1')
+        self.store.add_job(self.create_job('job2', 10))
+        self.store.update_job(self.create_job('job2', 30))
+
+        self.assertEqual(self.store.get_stats()['pending_writes'], 1)
+        self.store.flush()
+
+        self.assertIsNone(self.inner_store.lookup_job('job1'))
+        self.assertEqual(self.inner_store.get_next_run_time(), NOW + timedelta(seconds=30))
+        self.assertEqual(self.store.get_stats()['flushed_writes'], 1)
+
+    def test_refresh_picks_up_external_changes(self):
+        self.inner_store.add_job(self.create_job('external', 10))
+        self.store.add_job(self.create_job('job1', 20))
+
+        self.assertEqual(self.store.lookup_job('external').id, 'external')
+        self.assertEqual(self.store.get_stats()['misses'], 1)
+
+        self.inner_store.remove_job('external')
+        self.store.refresh()
+
+        self.assertIsNone(self.store.lookup_job('external'))
+        self.assertEqual([job.id for job in self.store.get_all_jobs()], ['job1'])
+
+    def test_job_events_patch_snapshot(self):
+        self.inner_store.add_job(self.create_job('external', 10))
+        self.store_scheduler._dispatch_event(JobEvent(EVENT_JOB_ADDED, 'external', 'default'))
+        self.assertEqual([job.id for job in self.store.get_all_jobs()], ['external'])
+
+        self.inner_store.update_job(self.create_job('external', 20))
+        self.store_scheduler._dispatch_event(JobEvent(EVENT_JOB_MODIFIED, 'external', 'default'))
+        self.assertEqual(self.store.get_next_run_time(), NOW + timedelta(seconds=20))
+
+        self.inner_store.remove_job('external')
+        self.store_scheduler._dispatch_event(JobEvent(EVENT_JOB_REMOVED, 'external', 'default'))
+        self.assertEqual(self.store.get_all_jobs(), [])
+
+    def test_job_events_keep_pending_writes(self):
+        self.store.add_job(self.create_job('job1', 10))
+        self.store_scheduler._dispatch_event(JobEvent(EVENT_JOB_REMOVED, 'job1', 'default'))
+        self.store_scheduler._dispatch_event(JobEvent(EVENT_JOB_ADDED, 'job2', 'other'))
+
+        self.assertEqual([job.id for job in self.store.get_all_jobs()], ['job1'])
+        self.assertEqual(self.store.get_stats()['misses'], 0)
+
+    def test_shutdown_removes_listener(self):
+        self.store.shutdown()
+
+        self.assertEqual(self.store_scheduler._listeners, [])
+
+    def test_hit_rate(self):
+        self.store.add_job(self.create_job('job1', 10))
+        self.store.lookup_job('job1')
+        self.store.get_all_jobs()
+        self.store.lookup_job('job2')
+
+        stats = self.store.get_stats()
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 1)
+        self.assertAlmostEqual(stats['hit_rate'], 2 / 3)
+
+    def test_shutdown_flushes(self):
+        self.store.add_job(self.create_job('job1', 10))
+        self.store.shutdown()
+
+        self.assertEqual(self.inner_store.get_all_jobs(), [])  # MemoryJobStore forgets its jobs at shutdown
+        self.assertEqual(self.store.get_stats()['pending_writes'], 0)
+        self.assertEqual(self.store.get_stats()['flushed_writes'], 1)
+
+
+def job1():
+    pass
+
+
+def job2(**kwargs):
+    pass
@@ -0,0 +1,103 @@
+import threading
+
+from flask_apscheduler.listeners import AsyncListener
+from unittest import TestCase
+
+
+class TestAsyncListener(TestCase):
+    def setUp(self):
+        self.events = []
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def blocking_callback(self, event):
+        self.started.set()
+        self.release.wait(5)
+        self.events.append(event)
+
+    def test_delivers_events(self):
+        listener = AsyncListener(self.events.append)
+
+        for i in range(10):
+            listener(i)
+
+        self.assertTrue(listener.flush(5))
+        self.assertEqual(self.events, list(range(10)))
+        listener.close(5)
+
+    def test_drop_oldest(self):
+        listener = AsyncListener(self.blocking_callback, max_queue_size=2, overflow='drop_oldest')
+        listener(0)
+        self.assertTrue(self.started.wait(5))
+
+        for i in range(1, 5):
+            listener(i)
+
+        self.release.set()
+        self.assertTrue(listener.flush(5))
+        self.assertEqual(self.events, [0, 3, 4])
+        self.assertEqual(listener.dropped, 2)
+
+    def test_drop_newest(self):
+        listener = AsyncListener(self.blocking_callback, max_queue_size=2, overflow='drop_newest')
+        listener(0)
+        self.assertTrue(self.started.wait(5))
+
+        for i in range(1, 5):
+            listener(i)
+
+        self.release.set()
+        self.assertTrue(listener.flush(5))
+        self.assertEqual(self.events, [0, 1, 2])
+        self.assertEqual(listener.dropped, 2)
+
+    def test_block(self):
+        listener = AsyncListener(self.blocking_callback, max_queue_size=1, overflow='block')
+        listener.block_timeout = 0.05
+        listener(0)
+        self.assertTrue(self.started.wait(5))
+        listener(1)
+        listener(2)
+
+        self.assertEqual(listener.dropped, 1)
+
+        threading.Timer(0.05, self.release.set).start()
+        listener.block_timeout = 5
+        listener(3)
+
+        self.assertTrue(listener.flush(5))
+        self.assertEqual(self.events, [0, 1, 3])
+
+    def test_batches(self):
+        listener = AsyncListener(self.blocking_callback, batch_size=3)
+        listener(0)
+        self.assertTrue(self.started.wait(5))
+
+        for i in range(1, 6):
+            listener(i)
+
+        self.release.set()
+        self.assertTrue(listener.flush(5))
+        self.assertEqual(self.events, [[0], [1, 2, 3], [4, 5]])
+
+    def test_callback_errors_are_logged(self):
+        def failing_callback(event):
+            raise ValueError(event)
+
+        listener = AsyncListener(failing_callback)
+
+        with self.assertLogs('flask_apscheduler', 'ERROR'):
+            listener(0)
+            self.assertTrue(listener.flush(5))
+
+    def test_close(self):
+        listener = AsyncListener(self.events.append)
+        listener(0)
+        listener.close(5)
+
+        self.assertEqual(self.events, [0])
+        self.assertFalse(listener._thread.is_alive())
+
+    def test_invalid_overflow(self):
+        with self.assertRaises(ValueError):
+            AsyncListener(self.events.append, overflow='unknown')
@@ -0,0 +1,47 @@
+import datetime
+
+from flask_apscheduler.misfire import AdaptiveMisfirePolicy
+from unittest import TestCase
+
+
+class TestAdaptiveMisfirePolicy(TestCase):
+    def setUp(self):
+        self.policy = AdaptiveMisfirePolicy(grace_time=1, max_catch_up_time=60, max_skips=2)
+        self.now = datetime.datetime(2020, 1, 1, 12)
+
+    def run_times(self, count, late=10):
+        first = self.now - datetime.timedelta(seconds=late)
+        return [first + datetime.timedelta(seconds=i) for i in range(count)]
+
+    def test_on_time(self):
+        self.assertIsNone(self.policy.decide('job1', [self.now], self.now, 0))
+
+    def test_run_when_capacity_available(self):
+        self.policy.record_duration('job1', 1)
+
+        self.assertEqual(self.policy.decide('job1', self.run_times(5), self.now, 0.5)[0], 'run')
+
+    def test_coalesce_when_catch_up_too_long(self):
+        self.policy.record_duration('job1', 20)
+
+        self.assertEqual(self.policy.decide('job1', self.run_times(5), self.now, 0)[0], 'coalesce')
+
+    def test_skip_when_saturated(self):
+        self.assertEqual(self.policy.decide('job1', self.run_times(1), self.now, 1)[0], 'skip')
+
+    def test_floor_after_max_skips(self):
+        decisions = [self.policy.decide('job1', self.run_times(3), self.now, 2)[0] for _ in range(4)]
+
+        self.assertEqual(decisions, ['skip', 'skip', 'coalesce', 'skip'])
+
+    def test_moving_average(self):
+        self.policy.record_duration('job1', 10)
+        self.policy.record_duration('job1', 20)
+
+        self.assertAlmostEqual(self.policy.get_average_duration('job1'), 12)
+
+    def test_forget(self):
+        self.policy.record_duration('job1', 10)
+        self.policy.forget('job1')
+
+        self.assertIsNone(self.policy.get_average_duration('job1'))
@@ -0,0 +1,32 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from unittest import TestCase
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+READ_PACKAGES = ("import json, setuptools\n"
+                 "from distutils.core import run_setup\n"
+                 "print(json.dumps(run_setup('setup.py', stop_after='init').packages))")
+
+
+class TestPackaging(TestCase):
+    def test_all_packages_are_distributed(self):
+        output = subprocess.run([sys.executable, '-c', READ_PACKAGES], cwd=ROOT, check=True, capture_output=True,
+                                text=True).stdout
+        packages = json.loads(output.splitlines()[-1])
+
+        for path, dirs, files in os.walk(os.path.join(ROOT, 'flask_apscheduler')):
+            if '__init__.py' in files:
+                self.assertIn(os.path.relpath(path, ROOT).replace(os.sep, '.'), packages)
+
+    def test_built_package_imports(self):
+        with tempfile.TemporaryDirectory() as directory:
+            subprocess.run([sys.executable, 'setup.py', '-q', 'build', '--build-base', directory], cwd=ROOT,
+                           check=True, capture_output=True)
+
+            subprocess.run([sys.executable, '-c', 'import flask_apscheduler'], cwd=os.path.join(directory, 'lib'),
+                           check=True, capture_output=True)
@@ -0,0 +1,259 @@
+import datetime
+import os
+import signal
+import socket
+import stat
+import tempfile
+import threading
+import time
+
+from apscheduler.jobstores.base import JobLookupError
+from flask import Flask
+from flask_apscheduler import APScheduler, utils
+from flask_apscheduler.remote import RemoteSchedulerError, SchedulerServer
+from unittest import TestCase, mock
+
+RUNS = []
+
+
+def job1(value=None):
+    RUNS.append(value)
+
+
+def sleeping_job(seconds):
+    time.sleep(seconds)
+    RUNS.append(seconds)
+
+
+class TestRemoteScheduler(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'scheduler.sock')
+
+        self.server_scheduler = APScheduler(app=Flask(__name__))
+        self.server_scheduler.start()
+        self.server = SchedulerServer(self.server_scheduler, self.path)
+        self.server.start()
+
+        self.app = Flask(__name__)
+        self.app.config['SCHEDULER_SOCKET'] = self.path
+        self.app.config['SCHEDULER_API_ENABLED'] = True
+        self.scheduler = APScheduler(app=self.app)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        self.scheduler._client.close()
+        self.server.shutdown()
+
+        if self.server_scheduler.running:
+            self.server_scheduler.shutdown()
+        self.directory.cleanup()
+        RUNS.clear()
+
+    def test_add_and_get_jobs(self):
+        job = self.scheduler.add_job('job1', job1, trigger='interval', hours=1)
+
+        self.assertEqual(job.id, 'job1')
+        self.assertIsNotNone(self.server_scheduler.get_job('job1'))
+        self.assertEqual(utils.job_to_dict(self.scheduler.get_job('job1')),
+                         utils.job_to_dict(self.server_scheduler.get_job('job1')))
+        self.assertEqual([job.id for job in self.scheduler.get_jobs()], ['job1'])
+
+    def test_errors_are_raised(self):
+        with self.assertRaises(JobLookupError):
+            self.scheduler.remove_job('job1')
+
+    def test_run_job_in_scheduler_process(self):
+        self.scheduler.add_job('job1', job1, trigger='interval', hours=1, kwargs=dict(value=1))
+        self.scheduler.run_job('job1')
+
+        self.assertEqual(RUNS, [1])
+
+    def test_state(self):
+        self.assertTrue(self.scheduler.running)
+        self.scheduler.pause()
+        self.assertEqual(self.scheduler.state, self.server_scheduler.state)
+
+    def test_start_does_nothing(self):
+        self.scheduler.start()
+
+        self.assertFalse(self.scheduler.scheduler.running)
+
+    def test_api(self):
+        response = self.client.post('/scheduler/jobs', json=dict(id='job1', func='tests.test_remote:job1',
+                                                                 trigger='interval', hours=1))
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get('/scheduler/jobs')
+        self.assertEqual([job['id'] for job in response.json], ['job1'])
+
+        response = self.client.get('/scheduler/jobs/job2')
+        self.assertEqual(response.status_code, 404)
+
+    def test_calendar(self):
+        self.scheduler.add_job('job1', job1, trigger='interval', hours=1)
+
+        response = self.client.get('/scheduler/calendar')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json['runs']), 24)
+
+    def test_calendar_of_frequent_jobs(self):
+        for i in range(2000):
+            self.server_scheduler.add_job(f'job{i}', job1, trigger='interval', seconds=1)
+
+        response = self.client.get('/scheduler/calendar?limit=10')
+        self.assertEqual(len(response.json['runs']), 10)
+        self.assertTrue(response.json['truncated'])
+
+        response = self.client.get('/scheduler/calendar?bucket=3600')
+        self.assertEqual(response.json['total'], 2000 * 24 * 3600)
+
+        with self.assertRaises(RuntimeError):
+            self.scheduler.get_upcoming_runs(datetime.datetime.now())
+
+        with self.assertRaises(RuntimeError):
+            self.scheduler.simulate(datetime.datetime.now(), datetime.datetime.now() + datetime.timedelta(hours=1))
+
+    def test_jobs_are_listed_in_one_call(self):
+        for i in range(10):
+            self.server_scheduler.add_job(f'job{i}', job1, trigger='interval', hours=1)
+
+        calls = []
+        call = self.scheduler._client.call
+        self.scheduler._client.call = lambda name, *args, **kwargs: calls.append(name) or call(name, *args, **kwargs)
+
+        response = self.client.get('/scheduler/jobs')
+        self.assertEqual(len(response.json), 10)
+        self.assertEqual(calls, ['get_jobs', 'get_jobs_memory_usage'])
+
+    def test_shutdown_only_closes_connection(self):
+        self.scheduler.get_jobs()
+
+        self.assertEqual(self.scheduler.shutdown(), [])
+        self.assertTrue(self.server_scheduler.running)
+        self.assertEqual(self.scheduler.get_jobs(), [])
+
+    def test_shutdown_remote(self):
+        self.assertEqual(self.scheduler.shutdown_remote(), [])
+        self.assertFalse(self.server_scheduler.running)
+
+        with self.assertRaises(RuntimeError):
+            self.server_scheduler.shutdown_remote()
+
+    def test_api_shuts_scheduler_process_down(self):
+        response = self.client.post('/scheduler/shutdown')
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(self.server_scheduler.running)
+
+    def test_api_does_not_start_scheduler(self):
+        response = self.client.post('/scheduler/start')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(self.scheduler.scheduler.running)
+
+    def test_blocking_calls_are_not_timed_out(self):
+        self.scheduler._client.timeout = 0.05
+        self.scheduler.add_job('job1', sleeping_job, trigger='interval', hours=1, kwargs=dict(seconds=0.2))
+
+        self.scheduler.run_job('job1')
+        self.assertEqual(RUNS, [0.2])
+
+    def test_socket_is_not_taken_from_live_server(self):
+        with self.assertRaises(RemoteSchedulerError):
+            SchedulerServer(self.server_scheduler, self.path).start()
+
+        self.assertEqual(self.scheduler.get_jobs(), [])
+
+    def test_stale_socket_is_replaced(self):
+        self.server.shutdown()
+        stale_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale_socket.bind(self.path)
+        stale_socket.close()
+
+        self.server.start()
+        self.assertEqual(self.scheduler.get_jobs(), [])
+
+    def test_job_profile(self):
+        done = threading.Event()
+        self.server_scheduler.add_job('job1', done.set, trigger='interval', hours=1,
+                                      next_run_time=datetime.datetime.now(), profile=1)
+        self.assertTrue(done.wait(5))
+
+        profile = self.scheduler.get_job_profile('job1')
+
+        self.assertEqual(profile.runs, 1)
+        self.assertEqual(profile.to_collapsed(), self.server_scheduler.get_job_profile('job1').to_collapsed())
+
+    def test_socket_is_created_with_its_mode(self):
+        self.server.shutdown()
+
+        # the permissions must not depend on chmod, the socket is reachable as soon as it is bound.
+        with mock.patch('flask_apscheduler.remote.os.chmod'):
+            self.server.start()
+
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+
+    def test_close_closes_connections_of_all_threads(self):
+        thread = threading.Thread(target=self.scheduler.get_jobs)
+        thread.start()
+        thread.join()
+        self.scheduler.get_jobs()
+
+        sockets = list(self.scheduler._client._sockets)
+        self.scheduler._client.close()
+
+        self.assertEqual(len(sockets), 2)
+        self.assertTrue(all(sock.fileno() == -1 for sock in sockets))
+        self.assertEqual(self.scheduler.get_jobs(), [])
+
+    def test_private_methods_are_not_served(self):
+        with self.assertRaises(RemoteSchedulerError):
+            self.scheduler._client.call('_load_jobs')
+
+    def test_reconnects_to_restarted_server(self):
+        self.scheduler.get_jobs()
+        self.server.shutdown()
+        self.server.start()
+
+        self.assertEqual(self.scheduler.get_jobs(), [])
+
+
+class TestSchedulerCommand(TestCase):
+    def test_run(self):
+        directory = tempfile.TemporaryDirectory()
+        path = os.path.join(directory.name, 'scheduler.sock')
+
+        app = Flask(__name__)
+        app.config['SCHEDULER_SOCKET'] = path
+        app.config['SCHEDULER_JOBS'] = [dict(id='job1', func='tests.test_remote:job1', trigger='interval', hours=1)]
+        scheduler = APScheduler(app=app)
+
+        client_app = Flask(__name__)
+        client_app.config['SCHEDULER_SOCKET'] = path
+        client = APScheduler(app=client_app)
+        job_ids = []
+
+        def check():
+            while True:
+                try:
+                    jobs = client.get_jobs()
+                    break
+                except OSError:
+                    threading.Event().wait(0.01)
+
+            job_ids.extend(job.id for job in jobs)
+            # stops the scheduler process.
+            client.shutdown_remote()
+
+        previous_handler = signal.getsignal(signal.SIGTERM)
+        threading.Thread(target=check).start()
+        result = app.test_cli_runner().invoke(args=['scheduler', 'run'])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(job_ids, ['job1'])
+        self.assertFalse(scheduler.running)
+        self.assertFalse(os.path.exists(path))
+        self.assertIs(signal.getsignal(signal.SIGTERM), previous_handler)
+        directory.cleanup()
@@ -0,0 +1,136 @@
+import itertools
+import os
+import shutil
+import tempfile
+import time
+
+from datetime import datetime, timedelta, timezone
+from flask_apscheduler.results import (FileSystemResultBackend, JobResult, MemoryResultBackend,
+                                       SQLiteResultBackend)
+from unittest import TestCase
+
+NOW = datetime(2030, 1, 1, tzinfo=timezone.utc)
+COUNTER = itertools.count()
+
+
+def create_result(job_id, run_id, data):
+    finished_at = NOW + timedelta(seconds=next(COUNTER))
+    return JobResult(job_id, run_id, 'success', NOW, finished_at, len(data))
+
+
+class ResultBackendTests(object):
+    def create_backend(self, ttl=3600):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.backend = self.create_backend()
+        self.backend.start()
+
+    def tearDown(self):
+        self.backend.shutdown()
+
+    def read(self, job_id, run_id, backend=None):
+        chunks = (backend or self.backend).open_result(job_id, run_id)
+        return None if chunks is None else b''.join(chunks)
+
+    def test_add_get_result(self):
+        self.backend.add_result(create_result('job1', 'run1', b'42'), b'42')
+        self.backend.add_result(create_result('job1', 'run2', b'"done"'), b'"done"')
+        self.backend.add_result(create_result('job2', 'run3', b'null'), b'null')
+
+        result = self.backend.get_result('job1', 'run1')
+        self.assertEqual((result.job_id, result.run_id, result.status, result.size), ('job1', 'run1', 'success', 2))
+        self.assertEqual(result.scheduled_run_time, NOW)
+        self.assertEqual(self.read('job1', 'run2'), b'"done"')
+        self.assertEqual([result.run_id for result in self.backend.get_results('job1')], ['run2', 'run1'])
+
+        self.assertIsNone(self.backend.get_result('job1', 'run3'))
+        self.assertIsNone(self.backend.open_result('job1', 'run3'))
+
+    def test_large_result_is_streamed(self):
+        data = b'"' + b'x' * 200000 + b'"'
+        self.backend.add_result(create_result('job1', 'run1', data), data)
+
+        chunks = list(self.backend.open_result('job1', 'run1'))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(b''.join(chunks), data)
+
+    def test_result_not_stored(self):
+        result = create_result('job1', 'run1', b'42')
+        result.stored = False
+        self.backend.add_result(result, None)
+
+        self.assertFalse(self.backend.get_result('job1', 'run1').stored)
+        self.assertIsNone(self.backend.open_result('job1', 'run1'))
+
+    def test_results_expire(self):
+        backend = self.create_backend(ttl=0.05)
+        backend.start()
+
+        try:
+            backend.add_result(create_result('job1', 'run1', b'42'), b'42')
+            self.assertEqual(self.read('job1', 'run1', backend), b'42')
+
+            time.sleep(0.1)
+            self.assertIsNone(backend.get_result('job1', 'run1'))
+            self.assertIsNone(backend.open_result('job1', 'run1'))
+            self.assertEqual(backend.get_results('job1'), [])
+        finally:
+            backend.shutdown()
+
+
+class TestMemoryResultBackend(ResultBackendTests, TestCase):
+    def create_backend(self, ttl=3600):
+        return MemoryResultBackend(ttl=ttl, max_results=3)
+
+    def test_least_recent_results_are_evicted(self):
+        for i in range(5):
+            self.backend.add_result(create_result('job1', f'run{i}', b'42'), b'42')
+
+        self.assertEqual([result.run_id for result in self.backend.get_results('job1')], ['run4', 'run3', 'run2'])
+
+
+class TestSQLiteResultBackend(ResultBackendTests, TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        super(TestSQLiteResultBackend, self).setUp()
+
+    def tearDown(self):
+        super(TestSQLiteResultBackend, self).tearDown()
+        shutil.rmtree(self.directory)
+
+    def create_backend(self, ttl=3600):
+        return SQLiteResultBackend(path=f'{self.directory}/results-{ttl}.sqlite', ttl=ttl)
+
+
+class TestFileSystemResultBackend(ResultBackendTests, TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        super(TestFileSystemResultBackend, self).setUp()
+
+    def tearDown(self):
+        super(TestFileSystemResultBackend, self).tearDown()
+        shutil.rmtree(self.directory)
+
+    def create_backend(self, ttl=3600):
+        return FileSystemResultBackend(f'{self.directory}/results-{ttl}', ttl=ttl)
+
+    def test_expired_results_of_other_jobs_are_removed(self):
+        backend = self.create_backend(ttl=0.05)
+        backend.start()
+
+        try:
+            backend.add_result(create_result('job1', 'run1', b'42'), b'42')
+            job_directory = backend._get_job_directory('job1')
+
+            time.sleep(0.1)
+            backend.add_result(create_result('job2', 'run2', b'42'), b'42')
+            self.assertEqual(os.listdir(job_directory), [])
+
+            # the emptied directory is removed once it has expired too.
+            time.sleep(0.1)
+            backend.add_result(create_result('job3', 'run3', b'42'), b'42')
+            self.assertFalse(os.path.exists(job_directory))
+            self.assertEqual(self.read('job3', 'run3', backend), b'42')
+        finally:
+            backend.shutdown()
@@ -1,10 +1,31 @@
 import apscheduler
+import asyncio
 import datetime
+import logging
+import os
+import pickle
+import shutil
+import signal
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
 
+from apscheduler.events import EVENT_JOB_MISSED, EVENT_JOB_SUBMITTED
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from flask import Flask
-from flask_apscheduler import APScheduler, utils
+from flask_apscheduler import APScheduler, memtrace, utils
+from flask_apscheduler.events import EVENT_JOB_MEMORY_THRESHOLD, EVENT_JOB_MISFIRE_DECISION, EVENT_JOB_TIMEOUT
+from flask_apscheduler.executors import get_cancel_event
+from flask_apscheduler.jobstores.sqlite import SQLiteJobStore
+from flask_apscheduler.memtrace import MemoryTracer
+from flask_apscheduler.misfire import SKIP
+from flask_apscheduler.results import SQLiteResultBackend
+from flask_apscheduler.triggers import CalendarIntervalTrigger, SpreadTrigger, get_spread_offset, intern_trigger
+from flask_apscheduler.watchdog import Watchdog
 from pytz import utc
-from unittest import TestCase
+from unittest import TestCase, mock
 
 
 class TestScheduler(TestCase):
@@ -37,6 +58,21 @@ class TestScheduler(TestCase):
         self.scheduler.shutdown()
         self.assertFalse(self.scheduler.running)
 
+    def test_result_backend_lifecycle(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        backend = SQLiteResultBackend(path=os.path.join(directory, 'results.sqlite'))
+        self.app.config['SCHEDULER_RESULT_BACKEND'] = backend
+
+        self.scheduler.init_app(self.app)
+        self.assertIsNone(backend._connection)
+
+        self.scheduler.start()
+        self.assertIsNotNone(backend._connection)
+
+        self.scheduler.shutdown()
+        self.assertIsNone(backend._connection)
+
     def test_load_jobs_from_config(self):
         self.app.config['JOBS'] = [
             {
@@ -97,6 +133,29 @@ class TestScheduler(TestCase):
         self.scheduler.shutdown()
         self.assertFalse(self.scheduler.running)
 
+    def test_add_async_listener(self):
+        done = threading.Event()
+        threads = []
+
+        def listener(event):
+            threads.append(threading.current_thread())
+            done.set()
+
+        self.scheduler.init_app(self.app)
+        async_listener = self.scheduler.add_listener(listener, apscheduler.events.EVENT_JOB_EXECUTED,
+                                                     async_dispatch=True)
+        self.scheduler.start()
+        self.scheduler.add_job('job1', job1, trigger='interval', hours=1, next_run_time=datetime.datetime.now())
+        self.assertTrue(done.wait(5))
+        self.scheduler.shutdown()
+
+        self.assertEqual(threads[0].name, 'APScheduler-AsyncListener')
+        self.assertEqual(async_listener.dropped, 0)
+
+        self.scheduler.remove_listener(listener)
+        self.assertFalse(async_listener._thread.is_alive())
+        self.assertNotIn(async_listener, [callback for callback, _ in self.scheduler.scheduler._listeners])
+
     def test_add_remove_job(self):
         @self.scheduler.task('interval', seconds=10, id='job1')
         def decorated_job():
@@ -148,6 +207,449 @@ class TestScheduler(TestCase):
         self.scheduler.shutdown()
         self.assertFalse(self.scheduler.running)
 
+    def test_shutdown_with_drain_timeout(self):
+        started = threading.Event()
+        finished = threading.Event()
+
+        def slow_job():
+            started.set()
+            finished.wait(5)
+
+        self.scheduler.init_app(self.app)
+        self.scheduler.start()
+        self.scheduler.add_job('slow_job', slow_job, trigger='date')
+        self.assertTrue(started.wait(5))
+
+        running_jobs = self.scheduler.shutdown(drain_timeout=0.1)
+        finished.set()
+
+        self.assertEqual(running_jobs, ['slow_job'])
+        self.assertFalse(self.scheduler.running)
+
+    def test_shutdown_with_drain_timeout_drained(self):
+        self.scheduler.init_app(self.app)
+        self.scheduler.start()
+        self.scheduler.add_job('job1', job1, trigger='date')
+
+        running_jobs = self.scheduler.shutdown(drain_timeout=5)
+
+        self.assertEqual(running_jobs, [])
+        self.assertFalse(self.scheduler.running)
+
+    def test_shutdown_on_signal(self):
+        received = []
+        previous_handler = signal.signal(signal.SIGUSR1, lambda signum, frame: received.append(signum))
+
+        try:
+            self.scheduler.init_app(self.app)
+            self.scheduler.start()
+            self.scheduler.shutdown_on_signal(signals=(signal.SIGUSR1,), drain_timeout=1)
+
+            os.kill(os.getpid(), signal.SIGUSR1)
+            time.sleep(0.1)
+
+            self.assertFalse(self.scheduler.running)
+            self.assertEqual(received, [signal.SIGUSR1])
+        finally:
+            signal.signal(signal.SIGUSR1, previous_handler)
+
+    def test_job_timeout(self):
+        cancelled = threading.Event()
+        timeouts = []
+
+        def hung_job():
+            if get_cancel_event().wait(5):
+                cancelled.set()
+
+        self.scheduler.init_app(self.app)
+        self.scheduler.add_listener(timeouts.append, EVENT_JOB_TIMEOUT)
+        self.scheduler.start()
+        self.scheduler.add_job('hung_job', hung_job, trigger='interval', hours=1, next_run_time=datetime.datetime.now(), timeout=0.1)
+
+        self.assertTrue(cancelled.wait(5))
+        self.assertEqual(len(timeouts), 1)
+        self.assertEqual(timeouts[0].job_id, 'hung_job')
+        self.assertEqual(timeouts[0].timeout, 0.1)
+        self.assertEqual(self.scheduler._get_running_jobs(), [])
+        self.scheduler.shutdown()
+
+    def test_expired_deadline_is_not_cancelled(self):
+        watchdog = Watchdog()
+        expired = threading.Event()
+        handle = watchdog.watch(0, expired.set)
+
+        self.assertTrue(expired.wait(5))
+        watchdog.cancel(handle)
+        watchdog.cancel(watchdog.watch(60, expired.set))
+
+        self.assertEqual(watchdog._cancelled, {handle + 1})
+
+    def test_job_timeout_from_job_defaults(self):
+        self.app.config['SCHEDULER_JOB_DEFAULTS'] = {'timeout': 30}
+        self.scheduler.init_app(self.app)
+        self.scheduler.add_job('job1', job1, trigger='interval', hours=1)
+        self.scheduler.add_job('job2', job1, trigger='interval', hours=1, timeout=5)
+
+        self.assertEqual(self.scheduler.get_job_options('job1'), {'timeout': 30})
+        self.assertEqual(self.scheduler.get_job_options('job2'), {'timeout': 5})
+
+        self.scheduler.modify_job('job1', timeout=10)
+        self.assertEqual(self.scheduler.get_job_options('job1'), {'timeout': 10})
+
+        self.scheduler.remove_job('job2')
+        self.assertEqual(self.scheduler.get_job_options('job2'), {'timeout': 30})
+
+    def test_replaced_job_does_not_keep_options(self):
+        self.scheduler.init_app(self.app)
+        self.scheduler.start(paused=True)
+        self.scheduler.add_job('job1', job1, trigger='interval', hours=1, timeout=3, priority=5)
+        self.scheduler.add_job('job1', job1, trigger='interval', hours=2, replace_existing=True)
+
+        self.assertEqual(self.scheduler.get_job_options('job1'), {})
+        self.scheduler.shutdown()
+
+    def test_options_ignored_by_default_executor(self):
+        self.app.config['SCHEDULER_EXECUTORS'] = {'default': {'type': 'threadpool'}}
+        self.scheduler.init_app(self.app)
+        self.scheduler.add_job('job1', job1, trigger='interval', hours=1, timeout=5, priority=1)
+
+        with self.assertLogs('flask_apscheduler', 'WARNING') as logs:
+            self.scheduler.start(paused=True)
+
+        self.assertIn('ignored for its jobs: timeout, priority.', logs.output[0])
+        self.scheduler.shutdown()
+
+    def test_add_job_with_spread(self):
+        self.scheduler.init_app(self.app)
+        self.scheduler.start(paused=True)
+        job_a = self.scheduler.add_job('job_a', job1, trigger='cron', minute='*/5', spread=60)
+        job_b = self.scheduler.add_job('job_b', job1, trigger='cron', minute='*/5', spread=60)
+        job_c = self.scheduler.add_job('job_c', job1, trigger='cron', minute='*/5')
+
+        self.assertIsInstance(job_a.trigger, SpreadTrigger)
+        period = datetime.timedelta(minutes=5)
+        self.assertEqual((job_a.next_run_time - job_c.next_run_time) % period, get_spread_offset('job_a', 60))
+        self.assertEqual((job_b.next_run_time - job_c.next_run_time) % period, get_spread_offset('job_b', 60))
+        self.assertEqual(utils.job_to_dict(job_a)['spread'], 60)
+        self.assertEqual(utils.job_to_dict(job_a)['minute'], '*/5')
+
+        job_a = self.scheduler.modify_job('job_a', trigger='cron', minute='*/10')
+        self.assertEqual(job_a.trigger.spread, 60)
+
+        job_a = self.scheduler.modify_job('job_a', spread=None)
+        self.assertNotIsInstance(job_a.trigger, SpreadTrigger)
+        self.scheduler.shutdown()
+
+    def test_spread_change_keeps_paused_job_paused(self):
+        self.scheduler.init_app(self.app)
+        self.scheduler.start(paused=True)
+        self.scheduler.add_job('job1', job1, trigger='cron', minute='*/5')
+        self.scheduler.pause_job('job1')
+
+        job = self.scheduler.modify_job('job1', spread=30)
+        self.assertEqual(job.trigger.spread, 30)
+        self.assertIsNone(job.next_run_time)
+
+        job = self.scheduler.modify_job('job1', spread=None)
+        self.assertNotIsInstance(job.trigger, SpreadTrigger)
+        self.assertIsNone(self.scheduler.get_job('job1').next_run_time)
+        self.scheduler.shutdown()
+
+    def test_add_job_with_spread_from_job_defaults(self):
+        self.app.config['SCHEDULER_JOB_DEFAULTS'] = {'spread': 30}
+        self.scheduler.init_app(self.app)
+        job = self.scheduler.add_job('job1', job1, trigger='interval', minutes=5)
+        self.assertEqual(job.trigger.spread, 30)
+
+    def test_spread_does_not_delay_date_jobs(self):
+        self.app.config['SCHEDULER_JOB_DEFAULTS'] = {'spread': 30}
+        self.scheduler.init_app(self.app)
+        self.scheduler.start(paused=True)
+        run_date = datetime.datetime(2030, 1, 1, tzinfo=datetime.timezone.utc)
+        job_a = self.scheduler.add_job('job_a', job1, trigger='date', run_date=run_date)
+        job_b = self.scheduler.add_job('job_b', job1, trigger='date', run_date=run_date, spread=60)
+        # calendarinterval needs APScheduler 3.11.
+        trigger = 'calendarinterval' if CalendarIntervalTrigger else 'interval'
+        job_c = self.scheduler.add_job('job_c', job1, trigger=trigger, days=1)
+
+        self.assertNotIsInstance(job_a.trigger, SpreadTrigger)
+        self.assertNotIsInstance(job_b.trigger, SpreadTrigger)
+        self.assertEqual(job_b.next_run_time, run_date)
+        self.assertEqual(job_c.trigger.spread, 30)
+
+        job_c = self.scheduler.modify_job('job_c', trigger='date', run_date=run_date)
+        self.assertNotIsInstance(job_c.trigger, SpreadTrigger)
+        self.assertEqual(job_c.next_run_time, run_date)
+        self.scheduler.shutdown()
+
+    def test_identical_triggers_are_shared(self):
+        self.scheduler.init_app(self.app)
+        self.scheduler.start(paused=True)
+        job_a = self.scheduler.add_job('job_a', job1, trigger='cron', hour=3, minute=0)
+        job_b = self.scheduler.add_job('job_b', job1, trigger='cron', hour=3, minute=0)
+        job_c = self.scheduler.add_job('job_c', job1, trigger='cron', hour=4, minute=0, jitter=10)
+        job_d = self.scheduler.add_job('job_d', job1, trigger='cron', hour=4, minute=0, jitter=10)
+
+        self.assertIs(job_a.trigger, job_b.trigger)
+        self.assertIsInstance(job_a.trigger, apscheduler.triggers.cron.CronTrigger)
+        self.assertIsNot(job_c.trigger, job_d.trigger)
+
+        job_b = self.scheduler.modify_job('job_b', trigger='cron', hour=4, minute=0)
+        job_e = self.scheduler.add_job('job_e', job1, trigger='cron', hour=4, minute=0)
+        self.assertIs(job_b.trigger, job_e.trigger)
+        self.assertEqual(utils.job_to_dict(job_e)['hour'], '4')
+        self.scheduler.shutdown()
+
+    def test_triggers_of_persistent_jobstores_are_not_shared(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        jobstore = SQLiteJobStore(path=os.path.join(directory, 'jobs.sqlite'))
+        self.app.config['SCHEDULER_JOBSTORES'] = {'default': jobstore}
+        self.scheduler.init_app(self.app)
+        self.scheduler.start(paused=True)
+        job_a = self.scheduler.add_job('job_a', job1, trigger='cron', hour=3, minute=0)
+        job_b = self.scheduler.add_job('job_b', job1, trigger='cron', hour=3, minute=0)
+        self.scheduler.shutdown()
+
+        self.assertIsNot(job_a.trigger, job_b.trigger)
+
+    def test_shared_trigger_memoizes_next_fire_time(self):
+        trigger = intern_trigger(apscheduler.triggers.cron.CronTrigger(hour=3, minute=0, timezone=utc))
+        now = datetime.datetime(2030, 1, 1, tzinfo=utc)
+        next_fire_time = trigger.get_next_fire_time(None, now)
+
+        self.assertIs(trigger.get_next_fire_time(None, now), next_fire_time)
+        self.assertEqual(next_fire_time, datetime.datetime(2030, 1, 1, 3, tzinfo=utc))
+        self.assertEqual(trigger.get_next_fire_time(next_fire_time, now + datetime.timedelta(hours=3)),
+                         datetime.datetime(2030, 1, 2, 3, tzinfo=utc))
+
+        # the shared trigger is serialized as the APScheduler trigger.
+        self.assertIs(type(pickle.loads(pickle.dumps(trigger))), apscheduler.triggers.cron.CronTrigger)
+
+    def test_modify_job_writes_once(self):
+        self.scheduler.init_app(self.app)
+        self.scheduler.start(paused=True)
+        self.scheduler.add_job('job1', job1, trigger='cron', hour=3, minute=0)
+        self.scheduler.pause_job('job1')
+        events = []
+        self.scheduler.add_listener(events.append, apscheduler.events.EVENT_JOB_MODIFIED)
+
+        job = self.scheduler.modify_job('job1', trigger='cron', hour=4, minute=0, name='renamed')
+
+        # the trigger and the name are applied together, and the paused job is rescheduled.
+        self.assertEqual(len(events), 1)
+        self.assertEqual(job.name, 'renamed')
+        self.assertEqual(job.next_run_time.hour, 4)
+        self.assertIs(self.scheduler.get_job('job1').trigger, job.trigger)
+
+        next_run_time = datetime.datetime(2030, 1, 1, tzinfo=utc)
+        job = self.scheduler.modify_job('job1', trigger='cron', hour=5, minute=0, next_run_time=next_run_time)
+        self.assertEqual(job.next_run_time, next_run_time)
+        self.scheduler.shutdown()
+
+    def test_spread_offset_is_stable(self):
+        self.assertEqual(get_spread_offset('job1', 60), get_spread_offset('job1', 60))
+        self.assertLess(get_spread_offset('job1', 60), datetime.timedelta(seconds=60))
+
+    def test_job_profile(self):
+        done = threading.Event()
+
+        def profiled_job():
+            busy_loop(0.2)
+            done.set()
+
+        self.scheduler.init_app(self.app)
+        self.scheduler.start()
+        self.scheduler.add_job('profiled_job', profiled_job, trigger='interval', hours=1, next_run_time=datetime.datetime.now(), profile=1)
+        self.assertTrue(done.wait(5))
+        self.scheduler.shutdown()
+
+        profile = self.scheduler.get_job_profile('profiled_job')
+        self.assertEqual(profile.runs, 1)
+        self.assertGreater(profile.samples, 0)
+
+        stacks = profile.to_collapsed().splitlines()
+        self.assertTrue(all(stack.startswith('profiled_job (test_scheduler.py:') for stack in stacks))
+        self.assertTrue(any(';busy_loop (test_scheduler.py:' in stack for stack in stacks))
+
+    def test_concurrent_coroutine_jobs_are_profiled_separately(self):
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        self.addCleanup(loop.close)
+        self.addCleanup(thread.join)
+        self.addCleanup(loop.call_soon_threadsafe, loop.stop)
+
+        done = threading.Event()
+
+        async def coroutine_job_a():
+            await asyncio.sleep(0.15)
+            busy_loop(0.15)
+
+        async def coroutine_job_b():
+            busy_loop(0.1)
+            await asyncio.sleep(0.3)
+            done.set()
+
+        scheduler = APScheduler(scheduler=AsyncIOScheduler(event_loop=loop))
+        scheduler.init_app(self.app)
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0), loop).result()
+        loop.call_soon_threadsafe(scheduler.start)
+
+        now = datetime.datetime.now()
+        scheduler.add_job('job_a', coroutine_job_a, trigger='date', run_date=now, profile=1)
+        scheduler.add_job('job_b', coroutine_job_b, trigger='date', run_date=now, profile=1)
+        self.assertTrue(done.wait(5))
+        loop.call_soon_threadsafe(scheduler.shutdown, False)
+
+        for job_id, name in (('job_a', 'coroutine_job_a'), ('job_b', 'coroutine_job_b')):
+            profile = scheduler.get_job_profile(job_id)
+            self.assertGreater(profile.samples, 0)
+
+            stacks = profile.to_collapsed().splitlines()
+            self.assertTrue(all(stack.startswith(f'{name} (test_scheduler.py:') for stack in stacks))
+
+    def test_job_not_profiled(self):
+        done = threading.Event()
+
+        self.scheduler.init_app(self.app)
+        self.scheduler.start()
+        self.scheduler.add_job('job1', done.set, trigger='interval', hours=1, next_run_time=datetime.datetime.now(), profile=0)
+        self.assertTrue(done.wait(5))
+        self.scheduler.shutdown()
+
+        self.assertIsNone(self.scheduler.get_job_profile('job1'))
+
+    def test_memory_peak_without_reset_peak(self):
+        # tracemalloc.reset_peak() does not exist before Python 3.9.
+        names = ('is_tracing', 'start', 'stop', 'get_traced_memory', 'take_snapshot')
+        legacy_tracemalloc = types.SimpleNamespace(**{name: getattr(tracemalloc, name) for name in names})
+        tracer = MemoryTracer()
+
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        bytearray(8 * 1024 * 1024)  # the peak of the process, reached before the execution
+
+        with mock.patch.object(memtrace, 'tracemalloc', legacy_tracemalloc):
+            state = tracer.begin()
+            data = bytearray(1024 * 1024)
+            peak, retained, _ = tracer.end(state)
+
+        self.assertGreaterEqual(retained, len(data))
+        self.assertEqual(peak, retained)
+
+    def test_job_memory_usage(self):
+        done = threading.Event()
+        events = []
+
+        def leaking_job():
+            LEAKED.append(bytearray(1024 * 1024))
+            done.set()
+
+        self.scheduler.init_app(self.app)
+        self.scheduler.add_listener(events.append, EVENT_JOB_MEMORY_THRESHOLD)
+        self.scheduler.start()
+        self.scheduler.add_job('leaking_job', leaking_job, trigger='interval', hours=1,
+                               next_run_time=datetime.datetime.now(), trace_memory=True,
+                               memory_threshold=512 * 1024)
+        self.assertTrue(done.wait(5))
+        self.scheduler.shutdown()
+
+        memory_usage = self.scheduler.get_job_memory_usage('leaking_job')
+        self.assertGreaterEqual(memory_usage.retained, 1024 * 1024)
+        self.assertGreaterEqual(memory_usage.peak, memory_usage.retained)
+        self.assertIn('test_scheduler.py', memory_usage.top_allocations[0][0])
+        self.assertFalse(tracemalloc.is_tracing())
+
+        self.assertEqual(len(events), 1)
+        self.assertIs(events[0].memory_usage, memory_usage)
+        LEAKED.clear()
+
+    def test_job_memory_below_threshold(self):
+        done = threading.Event()
+        events = []
+
+        self.scheduler.init_app(self.app)
+        self.scheduler.add_listener(events.append, EVENT_JOB_MEMORY_THRESHOLD)
+        self.scheduler.start()
+        self.scheduler.add_job('job1', done.set, trigger='interval', hours=1, next_run_time=datetime.datetime.now(),
+                               trace_memory=True, memory_threshold=512 * 1024)
+        self.assertTrue(done.wait(5))
+        self.scheduler.shutdown()
+
+        self.assertLess(self.scheduler.get_job_memory_usage('job1').retained, 512 * 1024)
+        self.assertEqual(events, [])
+
+    def test_adaptive_misfire_policy(self):
+        runs = []
+        events = []
+
+        self.scheduler.init_app(self.app)
+        self.scheduler.add_listener(events.append, EVENT_JOB_MISFIRE_DECISION)
+        self.scheduler.misfire_policy.record_duration('job1', 10)
+        self.scheduler.start()
+        job = self.scheduler.add_job('job1', runs.append, args=[1], trigger='interval', seconds=1,
+                                     next_run_time=datetime.datetime.now() - datetime.timedelta(seconds=10),
+                                     misfire_policy='adaptive')
+        time.sleep(0.5)
+        self.scheduler.shutdown()
+
+        self.assertIsNone(job.misfire_grace_time)
+        self.assertFalse(job.coalesce)
+
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0].decision, 'coalesce')
+        self.assertGreaterEqual(len(events[0].scheduled_run_times), 10)
+        self.assertEqual(runs, [1])
+
+    def test_adaptive_misfire_policy_skip(self):
+        runs = []
+        events = []
+
+        self.scheduler.init_app(self.app)
+        self.scheduler.add_listener(events.append, EVENT_JOB_MISSED | EVENT_JOB_SUBMITTED)
+        self.scheduler.misfire_policy.decide = lambda *args: (SKIP, 'saturated')
+
+        with self.assertNoLogs('apscheduler.scheduler', 'ERROR'):
+            self.scheduler.start()
+            self.scheduler.add_job('job1', runs.append, args=[1], trigger='interval', hours=1,
+                                   next_run_time=datetime.datetime.now() - datetime.timedelta(seconds=10),
+                                   misfire_policy='adaptive')
+            time.sleep(0.5)
+            self.scheduler.shutdown()
+
+        self.assertEqual([event.code for event in events], [EVENT_JOB_MISSED])
+        self.assertEqual(runs, [])
+        self.assertEqual(logging.getLogger('apscheduler.scheduler').filters, [])
+
+    def test_adaptive_misfire_policy_needs_tracking_executor(self):
+        self.app.config['SCHEDULER_EXECUTORS'] = {'plain': {'type': 'threadpool'}}
+        self.scheduler.init_app(self.app)
+        self.scheduler.start(paused=True)
+        job = self.scheduler.add_job('job1', job1, trigger='interval', hours=1, executor='plain',
+                                     misfire_policy='adaptive')
+        self.scheduler.shutdown()
+
+        self.assertEqual(job.misfire_grace_time, 1)
+        self.assertTrue(job.coalesce)
+
+    def test_adaptive_misfire_policy_forgets_removed_jobs(self):
+        self.scheduler.add_job('job1', job1, trigger='interval', seconds=1, misfire_policy='adaptive')
+        self.scheduler.misfire_policy.record_duration('job1', 1)
+        self.scheduler.remove_job('job1')
+
+        self.assertIsNone(self.scheduler.misfire_policy.get_average_duration('job1'))
+
+
+LEAKED = []
+
+
+def busy_loop(seconds):
+    end = time.monotonic() + seconds
+
+    while time.monotonic() < end:
+        pass
+
 
 def job1():
     pass
@@ -0,0 +1,88 @@
+import datetime
+
+from flask_apscheduler import APScheduler
+from pytz import utc
+from unittest import TestCase
+
+START = datetime.datetime(2030, 1, 1, tzinfo=utc)
+
+
+def job1():
+    pass
+
+
+class TestSimulation(TestCase):
+    def setUp(self):
+        self.scheduler = APScheduler()
+        self.scheduler.scheduler.configure(timezone=utc)
+
+    def test_runs_every_fire_time(self):
+        self.scheduler.add_job('job1', job1, trigger='interval', minutes=1, start_date=START)
+
+        report = self.scheduler.simulate(START, START + datetime.timedelta(hours=1))
+
+        self.assertEqual(report.runs, 60)
+        self.assertEqual(report.misfires, 0)
+        self.assertEqual(report.peak_concurrency, 1)
+        self.assertEqual(report.jobs['job1'].runs, 60)
+
+    def test_queueing_and_misfires(self):
+        for i in range(20):
+            self.scheduler.add_job(f'job{i}', job1, trigger='cron', hour=0, misfire_grace_time=5,
+                                   start_date=START)
+
+        report = self.scheduler.simulate(START, START + datetime.timedelta(hours=1), durations=2,
+                                         executors={'default': 5})
+
+        # 5 executions start at once, then 5 every 2 seconds, the ones starting after 5 seconds misfire.
+        self.assertEqual(report.runs, 15)
+        self.assertEqual(report.misfires, 5)
+        self.assertEqual(report.peak_concurrency, 5)
+        self.assertEqual(report.executors['default'].peak_queue, 20)
+        self.assertEqual(report.executors['default'].max_wait, datetime.timedelta(seconds=4))
+        self.assertEqual(report.get_hotspots(1), [(START, 20)])
+
+    def test_peak_queue_counts_the_whole_burst(self):
+        self.scheduler.add_job('slow', job1, trigger='cron', minute='*', start_date=START)
+        for i in range(8):
+            self.scheduler.add_job(f'job{i}', job1, trigger='cron', hour=0, minute=1, start_date=START)
+
+        report = self.scheduler.simulate(START, START + datetime.timedelta(minutes=2),
+                                         durations={'slow': 90, 'job0': 1}, executors={'default': 3})
+
+        # the slow job holds a worker when the burst of 8 runs arrives, they all queue before being dispatched.
+        self.assertEqual(report.executors['default'].peak_queue, 8)
+        self.assertEqual(report.peak_concurrency, 3)
+        self.assertEqual(report.runs, 9)
+        self.assertEqual(report.skipped, 1)
+
+    def test_max_instances(self):
+        self.scheduler.add_job('job1', job1, trigger='interval', seconds=10, start_date=START, max_instances=1)
+
+        report = self.scheduler.simulate(START, START + datetime.timedelta(minutes=1), durations={'job1': 15})
+
+        self.assertEqual(report.runs, 3)
+        self.assertEqual(report.skipped, 3)
+
+    def test_durations_callable(self):
+        self.scheduler.add_job('job1', job1, trigger='interval', seconds=10, start_date=START)
+        calls = []
+
+        def duration(job, run_time):
+            calls.append((job.id, run_time))
+            return 1
+
+        self.scheduler.simulate(START, START + datetime.timedelta(seconds=30), durations=duration)
+
+        self.assertEqual(calls, [('job1', START + datetime.timedelta(seconds=i * 10)) for i in range(3)])
+
+    def test_paused_jobs_are_not_simulated(self):
+        self.scheduler.start(paused=True)
+        self.scheduler.add_job('job1', job1, trigger='interval', minutes=1, start_date=START)
+        self.scheduler.pause_job('job1')
+
+        report = self.scheduler.simulate(START, START + datetime.timedelta(hours=1))
+        self.scheduler.shutdown()
+
+        self.assertEqual(report.runs, 0)
+        self.assertEqual(report.to_dict()['jobs'], {})
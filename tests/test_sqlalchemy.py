@@ -0,0 +1,127 @@
+import os
+import tempfile
+
+from flask import Flask
+from flask_apscheduler import APScheduler
+from unittest import TestCase, skipUnless
+
+try:
+    import sqlalchemy
+    from flask_apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+except ImportError:
+    sqlalchemy = None
+
+try:
+    import flask_sqlalchemy
+except ImportError:
+    flask_sqlalchemy = None
+
+
+def job1():
+    pass
+
+
+@skipUnless(sqlalchemy, "SQLAlchemy is not installed")
+class TestSQLAlchemyJobStore(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.url = 'sqlite:///' + os.path.join(self.directory.name, 'app.sqlite')
+        self.app = Flask(__name__)
+        self.app.config['SCHEDULER_JOBSTORES'] = {'default': {'type': 'sqlalchemy', 'tablename': 'jobs'}}
+        self.scheduler = None
+
+    def tearDown(self):
+        if self.scheduler and self.scheduler.running:
+            self.scheduler.shutdown()
+
+        self.directory.cleanup()
+
+    def create_scheduler(self, engine):
+        self.app.config['SCHEDULER_SQLALCHEMY_ENGINE'] = engine
+        self.scheduler = APScheduler(app=self.app)
+        self.scheduler.start(paused=True)
+        return self.scheduler.scheduler._lookup_jobstore('default')
+
+    def test_engine_is_shared(self):
+        engine = sqlalchemy.create_engine(self.url)
+        pool = engine.pool
+        jobstore = self.create_scheduler(engine)
+
+        self.scheduler.add_job('job1', job1, trigger='interval', hours=1)
+        self.scheduler.shutdown()
+
+        self.assertIs(jobstore.engine, engine)
+        self.assertEqual(jobstore.jobs_t.name, 'jobs')
+
+        # the engine of the application is not disposed.
+        self.assertIs(engine.pool, pool)
+
+    def test_engine_is_left_to_application_after_fork(self):
+        engine = sqlalchemy.create_engine(self.url)
+        pool = engine.pool
+        jobstore = self.create_scheduler(engine)
+
+        jobstore._reset_after_fork()
+
+        self.assertIs(engine.pool, pool)
+
+    def test_owned_engine_is_reset_after_fork(self):
+        jobstore = SQLAlchemyJobStore(url=self.url)
+        self.addCleanup(jobstore.shutdown)
+        pool = jobstore.engine.pool
+
+        jobstore._reset_after_fork()
+
+        self.assertIsNot(jobstore.engine.pool, pool)
+
+    def test_pool_stats_only_count_jobstore_connections(self):
+        engine = sqlalchemy.create_engine(self.url)
+        jobstore = self.create_scheduler(engine)
+
+        self.scheduler.add_job('job1', job1, trigger='interval', hours=1)
+        stats = jobstore.get_pool_stats()
+
+        with engine.connect():
+            pass
+
+        self.assertGreater(stats['checkouts'], 0)
+        self.assertEqual(stats['checked_out'], 0)
+        self.assertEqual(stats['peak_checked_out'], 1)
+        self.assertEqual(jobstore.get_pool_stats()['checkouts'], stats['checkouts'])
+        self.assertIn('status', stats['pool'])
+
+    def test_listeners_are_removed_on_shutdown(self):
+        engine = sqlalchemy.create_engine(self.url)
+
+        for _ in range(3):
+            jobstore = self.create_scheduler(engine)
+            self.assertTrue(sqlalchemy.event.contains(engine, 'checkout', jobstore._handle_checkout))
+            self.scheduler.shutdown()
+
+            self.assertFalse(sqlalchemy.event.contains(engine, 'checkout', jobstore._handle_checkout))
+            self.assertFalse(sqlalchemy.event.contains(engine, 'checkin', jobstore._handle_checkin))
+
+        self.assertEqual(len(engine.pool.dispatch.checkout), 0)
+        self.assertEqual(len(engine.pool.dispatch.checkin), 0)
+
+    def test_jobstores_with_url_are_kept(self):
+        url = 'sqlite:///' + os.path.join(self.directory.name, 'jobs.sqlite')
+        self.app.config['SCHEDULER_JOBSTORES'] = {'default': {'type': 'sqlalchemy', 'url': url}}
+        jobstore = self.create_scheduler(sqlalchemy.create_engine(self.url))
+
+        self.assertEqual(str(jobstore.engine.url), url)
+
+    def test_unknown_extension(self):
+        self.app.config['SCHEDULER_SQLALCHEMY_ENGINE'] = 'sqlalchemy'
+
+        with self.assertRaises(ValueError):
+            APScheduler(app=self.app)
+
+    @skipUnless(flask_sqlalchemy, "Flask-SQLAlchemy is not installed")
+    def test_engine_of_extension(self):
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = self.url
+        db = flask_sqlalchemy.SQLAlchemy(self.app)
+        jobstore = self.create_scheduler('sqlalchemy')
+
+        with self.app.app_context():
+            self.assertIs(jobstore.engine, db.engine)
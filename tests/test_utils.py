@@ -1,5 +1,7 @@
 from copy import deepcopy
+from datetime import datetime, timedelta, timezone
 from flask_apscheduler import utils
+from flask_apscheduler.triggers import CalendarIntervalTrigger
 from unittest import TestCase
 
 class TestUtils(TestCase):
@@ -21,5 +23,30 @@ class TestUtils(TestCase):
 
         __pop_trigger('date', 'run_date', 'timezone')
         __pop_trigger('interval', 'weeks', 'days', 'hours', 'minutes', 'seconds', 'start_date', 'end_date', 'timezone')
+        __pop_trigger('interval', 'weeks', 'days', 'hours', 'minutes', 'seconds', 'start_date', 'end_date', 'timezone', 'jitter')
         __pop_trigger('cron', 'year', 'month', 'day', 'week', 'day_of_week', 'hour', 'minute', 'second', 'start_date', 'end_date', 'timezone')
+        __pop_trigger('cron', 'year', 'month', 'day', 'week', 'day_of_week', 'hour', 'minute', 'second', 'start_date', 'end_date', 'timezone', 'jitter')
+        if CalendarIntervalTrigger is not None:
+            __pop_trigger('calendarinterval', 'years', 'months', 'weeks', 'days', 'hour', 'minute', 'second', 'start_date', 'end_date', 'timezone', 'jitter')
+        else:
+            self.assertRaises(Exception, utils.pop_trigger, dict(trigger='calendarinterval'))
         self.assertRaises(Exception, utils.pop_trigger, dict(trigger='invalid_trigger'))
+
+    def test_pop_job_options(self):
+        data = dict(id='job1', func='foo:bar', retries=3, on_failure='log')
+
+        options = utils.pop_job_options(data, ('retries', 'on_failure', 'tags'))
+
+        self.assertEqual(options, dict(retries=3, on_failure='log'))
+        self.assertEqual(data, dict(id='job1', func='foo:bar'))
+
+    def test_parse_datetime(self):
+        self.assertIsNone(utils.parse_datetime(None, timezone.utc))
+        self.assertIsNone(utils.parse_datetime('', timezone.utc))
+
+        naive = utils.parse_datetime('2020-12-01 10:30:00', timezone.utc)
+        self.assertEqual(naive, datetime(2020, 12, 1, 10, 30, tzinfo=timezone.utc))
+
+        aware = utils.parse_datetime('2020-12-01T10:30:00+02:00', timezone.utc)
+        self.assertEqual(aware, datetime(2020, 12, 1, 8, 30, tzinfo=timezone.utc))
+        self.assertEqual(aware.utcoffset(), timedelta(hours=2))
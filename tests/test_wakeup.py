@@ -0,0 +1,140 @@
+import os
+import socket
+import tempfile
+import threading
+import time
+
+from flask import Flask
+from flask_apscheduler import APScheduler
+from flask_apscheduler.jobstores.cache import CachingJobStore
+from flask_apscheduler.wakeup import SQLiteWakeupChannel, UnixSocketWakeupChannel
+from unittest import TestCase, skipUnless
+
+try:
+    from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+except ImportError:
+    SQLAlchemyJobStore = None
+
+
+def job1():
+    pass
+
+
+class WakeupChannelTests(object):
+    def create_channel(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.woken = threading.Event()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_notify(self):
+        channel = self.create_channel()
+        channel.start(self.woken.set)
+        self.assertFalse(self.woken.wait(0.1))
+
+        self.create_channel().notify()
+
+        self.assertTrue(self.woken.wait(5))
+        channel.shutdown()
+
+    def test_notify_without_listener(self):
+        self.create_channel().notify()
+
+    def test_remote_add_job_wakes_up_scheduler(self):
+        app = Flask(__name__)
+        app.config['SCHEDULER_WAKEUP_CHANNEL'] = self.create_channel()
+        scheduler = APScheduler(app=app)
+        scheduler.start()
+        scheduler.scheduler.wakeup = self.woken.set
+
+        remote_app = Flask(__name__)
+        remote_app.config['SCHEDULER_WAKEUP_CHANNEL'] = self.create_channel()
+        remote_scheduler = APScheduler(app=remote_app)
+        remote_scheduler.start(paused=True)
+        remote_scheduler.add_job('job1', job1, trigger='interval', seconds=5)
+
+        self.assertTrue(self.woken.wait(5))
+        remote_scheduler.shutdown()
+        scheduler.shutdown()
+
+    @skipUnless(SQLAlchemyJobStore, 'SQLAlchemy is not installed')
+    def test_remote_changes_refresh_cached_job_store(self):
+        url = 'sqlite:///' + os.path.join(self.directory.name, 'jobs.sqlite')
+
+        def create_scheduler():
+            app = Flask(__name__)
+            app.config['SCHEDULER_JOBSTORES'] = {
+                'default': CachingJobStore(SQLAlchemyJobStore(url=url), flush_interval=3600, refresh_interval=None)
+            }
+            app.config['SCHEDULER_WAKEUP_CHANNEL'] = self.create_channel()
+            return APScheduler(app=app)
+
+        scheduler = create_scheduler()
+        scheduler.start()
+        remote_scheduler = create_scheduler()
+        remote_scheduler.start(paused=True)
+
+        remote_scheduler.add_job('job1', job1, trigger='interval', hours=1)
+        self.assertTrue(wait_until(lambda: scheduler.get_job('job1') is not None))
+
+        remote_scheduler.remove_job('job1')
+        self.assertTrue(wait_until(lambda: scheduler.get_job('job1') is None))
+
+        remote_scheduler.shutdown()
+        scheduler.shutdown()
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+
+        time.sleep(0.01)
+
+    return True
+
+
+class TestUnixSocketWakeupChannel(WakeupChannelTests, TestCase):
+    def create_channel(self):
+        return UnixSocketWakeupChannel(os.path.join(self.directory.name, 'scheduler.sock'))
+
+    def test_shutdown_removes_socket(self):
+        channel = self.create_channel()
+        channel.start(self.woken.set)
+        channel.shutdown()
+
+        self.assertFalse(os.path.exists(channel.path))
+
+    def test_socket_is_not_taken_from_live_listener(self):
+        channel = self.create_channel()
+        channel.start(self.woken.set)
+
+        with self.assertRaises(RuntimeError):
+            self.create_channel().start(self.woken.set)
+
+        self.create_channel().notify()
+        self.assertTrue(self.woken.wait(5))
+        channel.shutdown()
+
+    def test_stale_socket_is_replaced(self):
+        channel = self.create_channel()
+        stale_socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        stale_socket.bind(channel.path)
+        stale_socket.close()
+
+        channel.start(self.woken.set)
+        self.create_channel().notify()
+
+        self.assertTrue(self.woken.wait(5))
+        channel.shutdown()
+
+
+class TestSQLiteWakeupChannel(WakeupChannelTests, TestCase):
+    def create_channel(self):
+        return SQLiteWakeupChannel(os.path.join(self.directory.name, 'scheduler.db'), interval=0.05)